@@ -0,0 +1,245 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+# Synthetic package databases used by the benchmarks. Fixtures are generated
+# from a fixed seed so that each run processes identical data.
+
+import json
+import os
+import random
+import sqlite3
+from pathlib import Path
+
+# Changing the fixtures invalidates any saved baseline
+FIXTURE_VERSION = 1
+
+MAINTAINERS = [
+    "Debian X Strike Force <debian-x@lists.debian.org>",
+    "Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>",
+    "Debian Python Team <team+python@tracker.debian.org>",
+    "Debian Perl Group <pkg-perl-maintainers@lists.alioth.debian.org>",
+    "Jane Doe <jane.doe@example.org>",
+    "John Smith <jsmith@example.com>",
+]
+LICENSES = ["GPL-2+", "LGPL-2.1+", "BSD-3-clause", "MIT", "Apache-2.0", "custom"]
+FREEBSD_LICENSES = ["BSD2CLAUSE", "BSD3CLAUSE", "MIT", "GPLv2", "LGPL21", "APACHE20"]
+DEPENDENCIES = 3
+
+
+def dependencies(generator, index, count):
+    # Packages only depend on packages with a higher index so that the
+    # first package has a large dependency tree
+    candidates = range(index + 1, count)
+    if len(candidates) == 0:
+        return []
+    return sorted(
+        set(generator.choice(candidates) for _ in range(DEPENDENCIES))
+    )
+
+
+def write_os_release(root, name, version_id, identity):
+    etc = Path(root) / "etc"
+    etc.mkdir(parents=True, exist_ok=True)
+    (etc / "os-release").write_text(
+        f'NAME="{name}"\nVERSION_ID="{version_id}"\nID={identity}\n'
+        f"VERSION_CODENAME=bench\nHOME_URL=https://example.org/\n"
+    )
+
+
+def generate_deb(directory, count, seed=0):
+    # dpkg status database, copyright files and dpkg -l output
+    generator = random.Random(seed)
+    root = Path(directory) / "root"
+    status = root / "var" / "lib" / "dpkg"
+    status.mkdir(parents=True, exist_ok=True)
+    documents = root / "usr" / "share" / "doc"
+    documents.mkdir(parents=True, exist_ok=True)
+    write_os_release(root, "Debian GNU/Linux", "12", "debian")
+    with open(status / "status", "w") as status_file, open(
+        Path(directory) / "dpkg-list.txt", "w"
+    ) as list_file:
+        list_file.write("Desired=Unknown/Install/Remove/Purge/Hold\n")
+        list_file.write("||/ Name Version Architecture Description\n")
+        list_file.write("+++-====-=======-============-===========\n")
+        for index in range(count):
+            name = f"pkg{index}"
+            version = f"1.{index}-1"
+            depends = [f"pkg{n} (>= 1.0)" for n in dependencies(generator, index, count)]
+            status_file.write(
+                f"Package: {name}\n"
+                "Status: install ok installed\n"
+                "Priority: optional\n"
+                "Section: libs\n"
+                f"Installed-Size: {generator.randint(10, 10000)}\n"
+                f"Maintainer: {generator.choice(MAINTAINERS)}\n"
+                "Architecture: amd64\n"
+                f"Version: {version}\n"
+            )
+            if len(depends) > 0:
+                status_file.write(f"Depends: {', '.join(depends)}\n")
+            if index % 10 == 0:
+                status_file.write(f"Recommends: pkg{count - 1}, not-installed\n")
+            status_file.write(
+                f"Description: synthetic package {index}\n"
+                " Extended description of the package\n"
+                " .\n"
+                " spanning several lines.\n"
+                f"Homepage: https://example.org/{name}\n\n"
+            )
+            list_file.write(
+                f"ii  {name}  {version}  amd64  synthetic package {index}\n"
+            )
+            package_documents = documents / name
+            if index % 10 == 9:
+                # Documentation directory linked to another package
+                if not package_documents.is_symlink():
+                    os.symlink(f"pkg{index - 1}", package_documents)
+                continue
+            package_documents.mkdir(exist_ok=True)
+            (package_documents / "copyright").write_text(
+                "Format: https://www.debian.org/doc/packaging-manuals/copyright-format/1.0/\n"
+                f"Upstream-Name: {name}\n\n"
+                "Files: *\n"
+                f"Copyright: 2024 Author {index}\n"
+                f"License: {generator.choice(LICENSES)}\n"
+                + " License text.\n" * 50
+            )
+    return root
+
+
+def generate_rpm(directory, count, seed=0):
+    # Package records served by the rpm stub and rpm -qa output
+    generator = random.Random(seed)
+    root = Path(directory) / "root"
+    write_os_release(root, "Rocky Linux", "9.4", "rocky")
+    packages = []
+    for index in range(count):
+        name = f"rpkg{index}"
+        requires = [f"librpkg{n}.so.1()(64bit)" for n in dependencies(generator, index, count)]
+        requires.extend(["rpmlib(CompressedFileNames)", "/bin/sh"])
+        packages.append(
+            {
+                "NAME": name,
+                "VERSION": f"{index}.0",
+                "RELEASE": "1.el9",
+                "ARCH": "x86_64",
+                "LICENSE": generator.choice(["GPLv2+", "MIT", "BSD", "LGPLv2+"]),
+                "VENDOR": "Rocky Enterprise Software Foundation",
+                "PACKAGER": "Rocky Linux Build System (Peridot) <releng@rockylinux.org>",
+                "SUMMARY": f"Synthetic package {index}",
+                "URL": f"https://example.org/{name}",
+                "BUILDTIME": 1700000000 + index,
+                "INSTALLTIME": 1710000000 + index,
+                "SIZE": generator.randint(1000, 1000000),
+                "REQUIRENAME": requires,
+                "PROVIDENAME": [name, f"librpkg{index}.so.1()(64bit)"],
+                "FILENAMES": ["/bin/sh", "/usr/bin/bash"] if index == count - 1 else [],
+            }
+        )
+    with open(Path(directory) / "rpmdb.json", "w") as database_file:
+        json.dump(packages, database_file)
+    with open(Path(directory) / "rpm-list.txt", "w") as list_file:
+        for package in packages:
+            list_file.write(
+                f"{package['NAME']}-{package['VERSION']}-{package['RELEASE']}."
+                f"{package['ARCH']}\n"
+            )
+    return root
+
+
+def generate_freebsd(directory, count, seed=0):
+    # pkg database and package list
+    generator = random.Random(seed)
+    root = Path(directory) / "root"
+    database = root / "var" / "db" / "pkg"
+    database.mkdir(parents=True, exist_ok=True)
+    write_os_release(root, "FreeBSD", "14.1", "freebsd")
+    database_file = database / "local.sqlite"
+    if database_file.exists():
+        database_file.unlink()
+    connection = sqlite3.connect(str(database_file))
+    connection.executescript(
+        "CREATE TABLE packages (id INTEGER PRIMARY KEY, origin TEXT, name TEXT, "
+        "version TEXT, comment TEXT, arch TEXT, maintainer TEXT, www TEXT, "
+        "licenselogic INTEGER);"
+        "CREATE TABLE licenses (id INTEGER PRIMARY KEY, name TEXT);"
+        "CREATE TABLE pkg_licenses (package_id INTEGER, license_id INTEGER);"
+        "CREATE TABLE deps (origin TEXT, name TEXT, version TEXT, package_id INTEGER);"
+    )
+    connection.executemany(
+        "INSERT INTO licenses VALUES (?, ?)",
+        [(n + 1, name) for n, name in enumerate(FREEBSD_LICENSES)],
+    )
+    with open(Path(directory) / "pkg-list.txt", "w") as list_file:
+        for index in range(count):
+            name = f"bpkg{index}"
+            version = f"{index}.1"
+            connection.execute(
+                "INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    index + 1,
+                    f"devel/{name}",
+                    name,
+                    version,
+                    f"Synthetic package {index}",
+                    "FreeBSD:14:amd64",
+                    "ports@FreeBSD.org",
+                    f"https://example.org/{name}",
+                    ord("|") if index % 2 else ord("&"),
+                ),
+            )
+            licenses = set(generator.randint(1, len(FREEBSD_LICENSES)) for _ in range(2))
+            for license_id in sorted(licenses):
+                connection.execute(
+                    "INSERT INTO pkg_licenses VALUES (?, ?)", (index + 1, license_id)
+                )
+            for dependency in dependencies(generator, index, count):
+                connection.execute(
+                    "INSERT INTO deps VALUES (?, ?, ?, ?)",
+                    (
+                        f"devel/bpkg{dependency}",
+                        f"bpkg{dependency}",
+                        f"{dependency}.1",
+                        index + 1,
+                    ),
+                )
+            list_file.write(f"{name} {version} FreeBSD:14:amd64 Synthetic package {index}\n")
+    connection.commit()
+    connection.close()
+    return root
+
+
+def generate_windows(directory, count, seed=0):
+    # Output of get-wmiobject -class win32_product
+    with open(Path(directory) / "products.txt", "w", encoding="utf-16-le") as list_file:
+        for index in range(count):
+            list_file.write(
+                f"IdentifyingNumber : {{{index:08d}-0000-0000-0000-000000000000}}\n"
+                f"Name              : Product {index}\n"
+                f"Vendor            : Vendor {index % 20}\n"
+                f"Version           : {index}.0.1\n"
+                f"Caption           : Product {index}\n\n"
+            )
+
+
+GENERATORS = {
+    "deb": generate_deb,
+    "rpm": generate_rpm,
+    "freebsd": generate_freebsd,
+    "windows": generate_windows,
+}
+
+
+def generate(directory, distro, count):
+    # Fixtures are reused if already generated
+    directory = Path(directory) / f"{distro}-{count}"
+    marker = directory / "fixture.json"
+    if marker.exists() and json.loads(marker.read_text()) == {
+        "version": FIXTURE_VERSION,
+        "packages": count,
+    }:
+        return directory
+    directory.mkdir(parents=True, exist_ok=True)
+    GENERATORS[distro](directory, count)
+    marker.write_text(json.dumps({"version": FIXTURE_VERSION, "packages": count}))
+    return directory
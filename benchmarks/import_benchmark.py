@@ -0,0 +1,65 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+# Measures the startup time of the CLI and the time to import each builder.
+# Each measurement is made in a new interpreter; the time taken to start
+# the interpreter is reported separately and is included in each result.
+#
+# Run from the root of the repository
+#   python -m benchmarks.import_benchmark [--repeat N]
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from distro2sbom.distrobuilder.builderregistry import BUILDERS
+
+REPOSITORY = Path(__file__).resolve().parent.parent
+
+
+def commands():
+    yield "interpreter", ["-c", "pass"]
+    yield "import cli", ["-c", "import distro2sbom.cli"]
+    yield "cli --version", ["-m", "distro2sbom.cli", "--version"]
+    yield "cli (invalid option)", ["-m", "distro2sbom.cli", "--jobs", "0"]
+    for distro in BUILDERS:
+        yield f"builder {distro}", [
+            "-c",
+            "from distro2sbom.distrobuilder.builderregistry import get_builder; "
+            f"get_builder('{distro}')",
+        ]
+    yield "sbom generator", ["-c", "import lib4sbom.generator"]
+
+
+def measure(arguments, repeat):
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable] + arguments,
+            cwd=REPOSITORY,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+        )
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed), statistics.median(elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import time benchmark")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    print(f"{'Command':24} {'Min (ms)':>9} {'Median (ms)':>12}")
+    for name, arguments in commands():
+        minimum, median = measure(arguments, args.repeat)
+        print(f"{name:24} {minimum * 1000:9.1f} {median * 1000:12.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
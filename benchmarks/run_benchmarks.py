@@ -0,0 +1,291 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+# Benchmarks the builders against synthetic package databases using stub
+# package manager applications. Each scenario is run in a separate process
+# so that the peak memory of each scenario can be measured.
+#
+# Run from the root of the repository
+#   python -m benchmarks.run_benchmarks [--sizes 500,5000] [--save results.json]
+#   python -m benchmarks.run_benchmarks --baseline results.json
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import fixtures
+
+STUBS = Path(__file__).resolve().parent / "stubs"
+REPOSITORY = Path(__file__).resolve().parent.parent
+DISTROS = ["deb", "rpm", "freebsd", "windows"]
+SCENARIOS = ["system", "package", "parse", "cli", "stream"]
+# Scenarios which are supported by each builder
+SUPPORTED = {
+    "deb": SCENARIOS,
+    "rpm": SCENARIOS,
+    "freebsd": SCENARIOS,
+    "windows": ["parse"],
+}
+# Fixtures of 50000 packages are also supported but are not used by default
+# as SBOM generation for the cli scenario takes a long time
+SIZES = [500, 5000]
+# Differences in time below this (in seconds) are not considered a regression
+MINIMUM_TIME = 0.05
+
+
+def create_builder(distro, directory, scenario):
+    # Builders are imported when required so that import time is not measured
+    root = str(directory / "root")
+    if scenario == "parse":
+        name, release = "Bench", "1"
+    else:
+        name, release = None, None
+    if distro == "deb":
+        from distro2sbom.distrobuilder.dpkgbuilder import DpkgBuilder
+
+        return DpkgBuilder(name, release, root=root, namespace="bench")
+    elif distro == "rpm":
+        from distro2sbom.distrobuilder.rpmbuilder import RpmBuilder
+
+        return RpmBuilder(name, release, namespace="bench")
+    elif distro == "freebsd":
+        from distro2sbom.distrobuilder.freebsdbuilder import FreeBSDBuilder
+
+        return FreeBSDBuilder(name, release, root=root)
+    from distro2sbom.distrobuilder.windowsbuilder import WindowsBuilder
+
+    return WindowsBuilder(name, release)
+
+
+def count_packages(packages):
+    # Packages other than the operating system component
+    return sum(1 for package in packages if package.get("type") != "operating-system")
+
+
+def count_sbom_packages(sbom_file):
+    try:
+        with open(sbom_file) as sbom:
+            packages = json.load(sbom).get("packages", [])
+    except (OSError, ValueError):
+        return 0
+    return sum(
+        1
+        for package in packages
+        if package.get("primaryPackagePurpose") != "OPERATING-SYSTEM"
+    )
+
+
+def run_scenario(distro, scenario, directory):
+    # Returns elapsed time of scenario and number of packages in the SBOM
+    first_package = {"deb": "pkg0", "rpm": "rpkg0", "freebsd": "bpkg0"}
+    package_list = {
+        "deb": "dpkg-list.txt",
+        "rpm": "rpm-list.txt",
+        "freebsd": "pkg-list.txt",
+        "windows": "products.txt",
+    }
+    if scenario in ["cli", "stream"]:
+        from distro2sbom import cli
+
+        sbom_file = directory / "sbom.json"
+        if sbom_file.exists():
+            sbom_file.unlink()
+        arguments = [
+            "distro2sbom",
+            "--distro",
+            distro,
+            "--system",
+            "--root",
+            str(directory / "root"),
+            "--format",
+            "json",
+            "--output-file",
+            str(sbom_file),
+        ]
+        if scenario == "stream":
+            arguments.append("--stream")
+        start = time.perf_counter()
+        cli.main(arguments)
+        elapsed = time.perf_counter() - start
+        return elapsed, count_sbom_packages(sbom_file)
+    start = time.perf_counter()
+    builder = create_builder(distro, directory, scenario)
+    if scenario == "system":
+        builder.process_system()
+    elif scenario == "package":
+        builder.process_distro_package(first_package[distro])
+    else:
+        builder.parse_data(str(directory / package_list[distro]))
+    elapsed = time.perf_counter() - start
+    return elapsed, count_packages(builder.get_packages().values())
+
+
+def peak_memory():
+    # Peak resident memory of this process in MB
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # Reported in bytes rather than kilobytes
+        peak = peak / 1024
+    return peak / 1024
+
+
+def worker(distro, scenario, directory):
+    elapsed, packages = run_scenario(distro, scenario, Path(directory))
+    print(json.dumps({"time": elapsed, "memory": peak_memory(), "packages": packages}))
+    return 0
+
+
+def measure(distro, scenario, directory, repeat):
+    # Best of several runs of scenario in a separate process
+    result = None
+    for _ in range(repeat):
+        with tempfile.NamedTemporaryFile("r") as log_file:
+            environment = dict(os.environ)
+            environment["PATH"] = f"{STUBS}{os.pathsep}{environment.get('PATH', '')}"
+            environment["DISTRO2SBOM_ROOT_PATH"] = str(directory / "root")
+            environment["BENCHMARK_LOG"] = log_file.name
+            environment["BENCHMARK_RPM_DB"] = str(directory / "rpmdb.json")
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.run_benchmarks",
+                    "--worker",
+                    distro,
+                    scenario,
+                    str(directory),
+                ],
+                capture_output=True,
+                text=True,
+                cwd=REPOSITORY,
+                env=environment,
+            )
+            if output.returncode != 0:
+                print(f"[ERROR] {distro} {scenario} failed\n{output.stderr}")
+                return None
+            measurement = json.loads(output.stdout.splitlines()[-1])
+            measurement["subprocesses"] = len(log_file.readlines())
+        # Timings are meaningless if no packages were found
+        if measurement["packages"] == 0:
+            print(f"[ERROR] {distro} {scenario} generated SBOM without any packages")
+            return None
+        if result is None:
+            result = measurement
+        else:
+            result["time"] = min(result["time"], measurement["time"])
+            result["memory"] = min(result["memory"], measurement["memory"])
+    return result
+
+
+def compare(name, result, baseline, threshold):
+    # Returns list of regressions of result against baseline
+    regressions = []
+    if (
+        result["time"] > baseline["time"] * (1 + threshold)
+        and result["time"] - baseline["time"] > MINIMUM_TIME
+    ):
+        regressions.append(f"{name}: time {baseline['time']:.3f}s -> {result['time']:.3f}s")
+    if result["memory"] > baseline["memory"] * (1 + threshold):
+        regressions.append(
+            f"{name}: memory {baseline['memory']:.1f}MB -> {result['memory']:.1f}MB"
+        )
+    if result["subprocesses"] > baseline["subprocesses"]:
+        regressions.append(
+            f"{name}: subprocesses {baseline['subprocesses']} -> {result['subprocesses']}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    argv = argv or sys.argv[1:]
+    if len(argv) > 0 and argv[0] == "--worker":
+        return worker(*argv[1:4])
+    parser = argparse.ArgumentParser(description="distro2sbom benchmarks")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in SIZES),
+        help="comma separated number of packages (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--distros",
+        default=",".join(DISTROS),
+        help="comma separated distro types (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="comma separated scenarios (default: %(default)s)",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="runs of each scenario")
+    parser.add_argument(
+        "--workdir",
+        default=str(Path(tempfile.gettempdir()) / "distro2sbom-benchmarks"),
+        help="directory for generated fixtures (default: %(default)s)",
+    )
+    parser.add_argument("--save", help="file to store results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed fractional increase over baseline (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            baseline_data = json.load(baseline_file)
+        if baseline_data.get("fixture_version") != fixtures.FIXTURE_VERSION:
+            print("[ERROR] Baseline was generated using different fixtures")
+            return -1
+        baseline = baseline_data["results"]
+
+    results = {}
+    regressions = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        for distro in args.distros.split(","):
+            scenarios = [s for s in args.scenarios.split(",") if s in SUPPORTED[distro]]
+            if len(scenarios) == 0:
+                continue
+            directory = fixtures.generate(args.workdir, distro, size)
+            for scenario in scenarios:
+                name = f"{distro}-{scenario}-{size}"
+                result = measure(distro, scenario, directory, args.repeat)
+                if result is None:
+                    regressions.append(f"{name}: failed")
+                    continue
+                results[name] = result
+                print(
+                    f"{name:24} {result['time']:9.3f}s {result['subprocesses']:6d} "
+                    f"subprocesses {result['memory']:8.1f}MB",
+                    flush=True,
+                )
+                if name in baseline:
+                    regressions.extend(
+                        compare(name, result, baseline[name], args.threshold)
+                    )
+
+    if args.save is not None:
+        with open(args.save, "w") as results_file:
+            json.dump(
+                {"fixture_version": fixtures.FIXTURE_VERSION, "results": results},
+                results_file,
+                indent=2,
+            )
+    if len(regressions) > 0:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
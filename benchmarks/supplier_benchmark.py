@@ -0,0 +1,104 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+# Compares parsing the supplier of every package with parsing each
+# distinct supplier once.
+#
+# Run from the root of the repository
+#   python -m benchmarks.supplier_benchmark [--packages N]
+
+import argparse
+import random
+import sys
+import time
+
+from distro2sbom.distrobuilder.distrobuilder import DistroBuilder
+
+# Teams which maintain most packages within a distribution
+TEAMS = [
+    "Debian X Strike Force <debian-x@lists.debian.org>",
+    "Ubuntu Developers <ubuntu-devel-discuss@lists.ubuntu.com>",
+    "Debian Python Team <team+python@tracker.debian.org>",
+    "Debian GNOME Maintainers <pkg-gnome-maintainers@lists.alioth.debian.org>",
+    "Debian Perl Group <pkg-perl-maintainers@lists.alioth.debian.org>",
+    "Debian QA Group <packages@qa.debian.org>",
+    "Fedora Project <packager@fedoraproject.org>",
+    "Rocky Linux Build System (Peridot) <releng@rockylinux.org>",
+]
+
+
+def generate_maintainers(packages, individuals, seed):
+    # Approximately 80% of packages are maintained by a team
+    generator = random.Random(seed)
+    people = [
+        f"Maintainer{n} Surname{n} <maintainer{n}@example.org>"
+        for n in range(individuals)
+    ]
+    return [
+        generator.choice(TEAMS) if generator.random() < 0.8 else generator.choice(people)
+        for _ in range(packages)
+    ]
+
+
+def uncached(maintainers):
+    builder = DistroBuilder()
+    results = []
+    for maintainer in maintainers:
+        if len(maintainer.split()) > 3:
+            supplier_type = "Organization"
+        elif len(maintainer) > 1:
+            supplier_type = "Person"
+        else:
+            results.append(("UNKNOWN", "NOASSERTION", None))
+            continue
+        vendor = builder.format_supplier(maintainer, include_email=False)
+        results.append(
+            (
+                supplier_type,
+                builder.format_supplier(maintainer),
+                vendor.replace(" ", "_").lower(),
+            )
+        )
+    return results
+
+
+def cached(maintainers):
+    # Parsed suppliers are shared by all builders so start with an empty cache
+    DistroBuilder.suppliers.clear()
+    builder = DistroBuilder()
+    return [builder.parse_supplier(maintainer) for maintainer in maintainers]
+
+
+def measure(function, maintainers, repeat):
+    # Best of several runs
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = function(maintainers)
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Supplier parsing benchmark")
+    parser.add_argument("--packages", type=int, default=10000)
+    parser.add_argument("--individuals", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    maintainers = generate_maintainers(args.packages, args.individuals, args.seed)
+    uncached_time, expected = measure(uncached, maintainers, args.repeat)
+    cached_time, results = measure(cached, maintainers, args.repeat)
+    if results != expected:
+        print("[ERROR] Cached supplier parsing gives different results")
+        return -1
+    print(f"Packages: {args.packages}  Distinct suppliers: {len(set(maintainers))}")
+    print(f"Uncached: {uncached_time * 1000:.1f} ms")
+    print(f"Cached:   {cached_time * 1000:.1f} ms")
+    print(f"Speed-up: {uncached_time / cached_time:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,20 +8,18 @@ import textwrap
 from collections import ChainMap
 from pathlib import Path
 
-from lib4sbom.data.document import SBOMDocument
-from lib4sbom.generator import SBOMGenerator
-from lib4sbom.sbom import SBOM
-
-from distro2sbom.distrobuilder.dpkgbuilder import DpkgBuilder
-from distro2sbom.distrobuilder.freebsdbuilder import FreeBSDBuilder
-from distro2sbom.distrobuilder.rpmbuilder import RpmBuilder
-from distro2sbom.distrobuilder.windowsbuilder import WindowsBuilder
+from distro2sbom.distrobuilder.builderregistry import get_builder
+from distro2sbom.distrobuilder.timings import Timings
 from distro2sbom.version import VERSION
 
-# CLI processing
+# CLI processing. Modules which are only required for some options, the
+# builders and the SBOM generator are imported when they are required
+# so that the tool starts quickly.
 
 # Required support applications for package metadata information
-required_apps = {"deb": "dpkg", "rpm": "yum", "freebsd": "pkg"}
+required_apps = {"deb": "dpkg", "rpm": "rpm", "freebsd": "pkg"}
+# File extension for each SBOM format
+FILE_EXTENSIONS = {"tag": "spdx", "json": "json", "yaml": "yaml"}
 
 
 def inpath(binary):
@@ -87,7 +85,13 @@ def main(argv=None):
         "-p",
         "--package",
         action="store",
-        help="identity of package within distribution",
+        help="identity of package within distribution (comma separated list for several "
+        "packages)",
+    )
+    input_group.add_argument(
+        "--package-file",
+        action="store",
+        help="name of file containing identity of packages (one per line) within distribution",
     )
     input_group.add_argument(
         "-s",
@@ -96,6 +100,11 @@ def main(argv=None):
         default=False,
         help="generate SBOM for installed system",
     )
+    input_group.add_argument(
+        "--image",
+        action="store",
+        help="container image (docker save archive or OCI image layout) to analyse",
+    )
     input_group.add_argument(
         "--root",
         action="store",
@@ -106,6 +115,43 @@ def main(argv=None):
         action="store",
         help="namespace for distribution",
     )
+    input_group.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        type=int,
+        default=1,
+        help="number of package queries to run concurrently (default: 1)",
+    )
+    input_group.add_argument(
+        "--cache-dir",
+        action="store",
+        help="directory for cache of package metadata",
+    )
+    input_group.add_argument(
+        "--files",
+        action="store_true",
+        help="include the files of each package using the digests stored in the "
+        "package database",
+    )
+    input_group.add_argument(
+        "--previous",
+        action="store",
+        help="previously generated system SBOM to update",
+    )
+    input_group.add_argument(
+        "--watch",
+        action="store_true",
+        help="regenerate system SBOM whenever the package database changes",
+    )
+    input_group.add_argument(
+        "--watch-interval",
+        action="store",
+        type=int,
+        default=5,
+        help="interval (in seconds) between checks for changes to the package database "
+        "(default: 5)",
+    )
 
     product_group = parser.add_argument_group("Product")
     product_group.add_argument(
@@ -170,6 +216,27 @@ def main(argv=None):
         default="",
         help="output filename (default: output to stdout)",
     )
+    output_group.add_argument(
+        "--output-dir",
+        action="store",
+        help="directory for a separate SBOM for each package",
+    )
+    output_group.add_argument(
+        "--stream",
+        action="store_true",
+        help="write each element of the SBOM as it is generated; output is compressed "
+        "if the output filename ends with .gz or .zst",
+    )
+    output_group.add_argument(
+        "--timings",
+        action="store",
+        help="filename for report of time taken by each processing phase",
+    )
+    output_group.add_argument(
+        "--profile",
+        action="store",
+        help="filename for profile data (cProfile format)",
+    )
 
     parser.add_argument("-V", "--version", action="version", version=VERSION)
 
@@ -177,19 +244,31 @@ def main(argv=None):
         "distro": "auto",
         "input_file": "",
         "output_file": "",
+        "output_dir": "",
         "sbom": "spdx",
         "debug": False,
         "format": "tag",
         "name": None,
         "release": None,
         "package": "",
+        "package_file": "",
         "system": False,
+        "image": "",
         "root": "",
         "distro_namespace": "",
+        "jobs": 1,
+        "cache_dir": "",
+        "files": False,
+        "previous": "",
+        "watch": False,
+        "watch_interval": 5,
         "product_type": "application",
         "product_name": "",
         "product_version": "",
         "product_author": "",
+        "timings": "",
+        "profile": "",
+        "stream": False,
     }
 
     raw_args = parser.parse_args(argv[1:])
@@ -210,12 +289,57 @@ def main(argv=None):
     elif args["input_file"] != "" and args["name"] is None and args["release"] is None:
         print("[ERROR] distro name and release must be specified.")
         return -1
-    elif args["input_file"] == "" and args["package"] == "" and not args["system"]:
+    elif (
+        args["input_file"] == ""
+        and args["package"] == ""
+        and args["package_file"] == ""
+        and not args["system"]
+        and args["image"] == ""
+    ):
         print("[ERROR] distro file or package name must be specified.")
         return -1
+    elif args["image"] != "" and (
+        args["input_file"] != "" or args["package"] != "" or args["package_file"] != ""
+    ):
+        print("[ERROR] container image can only be used with system SBOM.")
+        return -1
+    elif args["image"] != "" and args["distro"] == "windows":
+        print("[ERROR] container image not supported for windows distro.")
+        return -1
     elif args["input_file"] != "" and args["distro_namespace"] == "":
         print("[ERROR] distro namespace must be specified.")
         return -1
+    elif raw_args.jobs < 1:
+        # Parsed values are checked as a value of 0 is replaced by the default
+        print("[ERROR] number of jobs must be at least 1.")
+        return -1
+    elif args["previous"] != "" and not args["system"] and args["image"] == "":
+        print("[ERROR] previous SBOM can only be used with system SBOM.")
+        return -1
+    elif args["watch"] and (not args["system"] or args["input_file"] != ""):
+        print("[ERROR] watch can only be used with system SBOM.")
+        return -1
+    elif args["watch"] and (args["image"] != "" or args["distro"] == "windows"):
+        print("[ERROR] watch not supported for container image or windows distro.")
+        return -1
+    elif args["watch"] and args["output_file"] == "":
+        print("[ERROR] output file must be specified for watch.")
+        return -1
+    elif raw_args.watch_interval < 1:
+        print("[ERROR] watch interval must be at least 1 second.")
+        return -1
+    elif args["output_dir"] != "" and (
+        args["package"] == "" and args["package_file"] == ""
+        or args["system"]
+        or args["input_file"] != ""
+    ):
+        print("[ERROR] output directory can only be used with package SBOM.")
+        return -1
+    elif args["files"] and (
+        args["input_file"] != "" or args["image"] != "" or args["distro"] == "windows"
+    ):
+        print("[ERROR] files can only be used with installed packages.")
+        return -1
 
     # Ensure format is aligned with type of SBOM
     bom_format = args["format"]
@@ -223,7 +347,9 @@ def main(argv=None):
         # Only json format valid for CycloneDX
         bom_format = "json"
 
-    if args["system"]:
+    if args["image"] != "":
+        product_type = "container"
+    elif args["system"]:
         # Always operating system
         product_type = "operating-system"
     else:
@@ -236,55 +362,269 @@ def main(argv=None):
         print("Distro release:", args["release"])
         print("Distro root:", args["root"])
         print("Distro namespace:", args["distro_namespace"])
+        print("Jobs:", args["jobs"])
+        print("Cache directory:", args["cache_dir"])
+        print("Files:", args["files"])
+        print("Previous SBOM:", args["previous"])
+        print("Watch:", args["watch"])
+        print("Watch interval:", args["watch_interval"])
         print("Package:", args["package"])
+        print("Package file:", args["package_file"])
         print("System SBOM:", args["system"])
+        print("Container image:", args["image"])
         print("SBOM type:", args["sbom"])
         print("Format:", bom_format)
         print("Output file:", args["output_file"])
+        print("Output directory:", args["output_dir"])
+        print("Stream output:", args["stream"])
         print("Product Type", product_type)
         print("Product Name", args["product_name"])
         print("Product Version", args["product_version"])
         print("Product Author", args["product_author"])
+        print("Timings file:", args["timings"])
+        print("Profile file:", args["profile"])
+
+    timings = Timings()
+    profiler = None
+    if args["profile"] != "":
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        if args["image"] != "":
+            result = scan_image(args, app_name, bom_format, product_type, timings)
+        elif args["watch"]:
+            result = watch_system(args, app_name, bom_format, product_type, timings)
+        else:
+            result = generate_sbom(args, app_name, bom_format, product_type, timings)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args["profile"])
+        timings.stop()
+        if args["timings"] != "":
+            timings.write(args["timings"])
+    return result
+
+
+def scan_image(args, app_name, bom_format, product_type, timings):
+    from distro2sbom.distrobuilder.containerimage import ContainerImage
+
+    timings.start("image")
+    image = ContainerImage(args["image"], cache_dir=args["cache_dir"], debug=args["debug"])
+    root_path = os.environ.get("DISTRO2SBOM_ROOT_PATH")
+    try:
+        root = image.extract()
+        if root is None:
+            return -1
+        distro_type = args["distro"]
+        if distro_type == "auto":
+            distro_type = image.get_distro_type()
+            if distro_type is None:
+                print("[ERROR] Unable to determine distro type.")
+                return -1
+        # The image is processed as an installed system located at root
+        os.environ["DISTRO2SBOM_ROOT_PATH"] = root
+        return generate_sbom(
+            args.new_child({"distro": distro_type, "root": root, "system": True}),
+            app_name,
+            bom_format,
+            product_type,
+            timings,
+        )
+    finally:
+        if root_path is None:
+            os.environ.pop("DISTRO2SBOM_ROOT_PATH", None)
+        else:
+            os.environ["DISTRO2SBOM_ROOT_PATH"] = root_path
+        image.close()
 
+
+def watch_system(args, app_name, bom_format, product_type, timings):
+    from distro2sbom.distrobuilder.systemwatcher import SystemWatcher
+
+    watcher = SystemWatcher(args["root"], args["watch_interval"], args["debug"])
+    output_file = Path(args["output_file"])
+    # SBOM is written to a temporary file which then replaces the output file
+    # so that a partially written SBOM is never seen
+    temporary_file = output_file.with_name(f".tmp-{output_file.name}")
+    try:
+        while True:
+            result = generate_sbom(
+                args.new_child({"output_file": str(temporary_file)}),
+                app_name,
+                bom_format,
+                product_type,
+                timings,
+                watcher,
+            )
+            if result == 0 and temporary_file.exists():
+                os.replace(temporary_file, output_file)
+                if args["debug"]:
+                    print(f"SBOM updated {output_file}")
+            elif not watcher.has_previous():
+                return result
+            timings.start("watch")
+            watcher.wait()
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if temporary_file.exists():
+            temporary_file.unlink()
+
+
+def get_distro_type(args):
     if args["distro"] == "auto":
         # determine distro type based on availability of key application
-        distro_type = None
         for distro in required_apps:
             if inpath(required_apps[distro]):
-                distro_type = distro
-                break
-        if distro_type is None:
-            print("[ERROR] Unable to determine distro type.")
-            return -1
-    else:
-        distro_type = args["distro"]
-        # Check required application available to produce package level SBOM
-        if args["package"] > "" and not inpath(required_apps[distro_type]):
-            print(
-                "[ERROR] Unable to produce package information for specified distribution."
-            )
-            return -1
+                return distro
+        print("[ERROR] Unable to determine distro type.")
+        return None
+    distro_type = args["distro"]
+    # Check required application available to produce package level SBOM
+    if (args["package"] != "" or args["package_file"] != "") and not inpath(
+        required_apps[distro_type]
+    ):
+        print("[ERROR] Unable to produce package information for specified distribution.")
+        return None
+    return distro_type
 
+
+def get_package_names(args):
+    # Packages are specified as a comma separated list and/or in a file
+    package_names = [name.strip() for name in args["package"].split(",")]
+    if args["package_file"] != "":
+        filePath = Path(args["package_file"])
+        # Check path exists and is a valid file
+        if not (filePath.exists() and filePath.is_file()):
+            print(f"[ERROR] Unable to locate file {args['package_file']}")
+            return None
+        with open(filePath) as package_file:
+            for line in package_file:
+                # Ignore comments
+                package_names.append(line.split("#", 1)[0].strip())
+    # Each package is only processed once
+    package_names = list(dict.fromkeys(name for name in package_names if name != ""))
+    if len(package_names) == 0:
+        print("[ERROR] package name must be specified.")
+        return None
+    return package_names
+
+
+def create_builder(args, distro_type):
+    builder = get_builder(distro_type)
     if distro_type == "deb":
-        sbom_build = DpkgBuilder(
+        sbom_build = builder(
             args["name"],
             args["release"],
             args["debug"],
             root=args["root"],
             namespace=args["distro_namespace"],
+            jobs=args["jobs"],
         )
     elif distro_type == "rpm":
-        sbom_build = RpmBuilder(
+        sbom_build = builder(
             args["name"],
             args["release"],
             args["debug"],
+            root=args["root"],
             namespace=args["distro_namespace"],
+            jobs=args["jobs"],
         )
     elif distro_type == "windows":
-        sbom_build = WindowsBuilder(args["name"], args["release"], args["debug"])
+        sbom_build = builder(args["name"], args["release"], args["debug"])
     elif distro_type == "freebsd":
-        sbom_build = FreeBSDBuilder(args["name"], args["release"], args["debug"])
+        sbom_build = builder(
+            args["name"],
+            args["release"],
+            args["debug"],
+            root=args["root"],
+            jobs=args["jobs"],
+        )
+    return sbom_build
+
+
+def create_sbom(args, product_type, packages, relationships, files=None):
+    from lib4sbom.data.document import SBOMDocument
+    from lib4sbom.sbom import SBOM
+
+    distro_sbom = SBOM()
+    sbom_doc = SBOMDocument()
+    sbom_doc.set_value("lifecycle", "operations")
+    sbom_doc.set_metadata_type(product_type)
+    if args["product_name"] != "":
+        sbom_doc.set_name(args["product_name"])
+    if args["product_version"] != "":
+        sbom_doc.set_metadata_version(args["product_version"])
+    if args["product_author"] != "":
+        sbom_doc.set_metadata_supplier(args["product_author"])
+    distro_sbom.add_document(sbom_doc.get_document())
+    if files:
+        distro_sbom.add_files(files)
+    distro_sbom.add_packages(packages)
+    distro_sbom.add_relationships(relationships)
+    return distro_sbom.get_sbom()
+
+
+def write_sbom(args, app_name, bom_format, project_name, sbom_data):
+    if args["stream"]:
+        from distro2sbom.distrobuilder.sbomwriter import SBOMWriter as SBOMGenerator
+    else:
+        from lib4sbom.generator import SBOMGenerator
+
+    sbom_gen = SBOMGenerator(
+        sbom_type=args["sbom"],
+        format=bom_format,
+        application=app_name,
+        version=VERSION,
+    )
+    sbom_gen.generate(
+        project_name=project_name,
+        sbom_data=sbom_data,
+        filename=args["output_file"],
+    )
 
+
+def generate_sbom(args, app_name, bom_format, product_type, timings, watcher=None):
+    timings.start("detection")
+    distro_type = get_distro_type(args)
+    if distro_type is None:
+        return -1
+
+    timings.start("construction")
+    sbom_build = create_builder(args, distro_type)
+    sbom_build.set_timings(timings)
+
+    cache = None
+    if args["cache_dir"] != "" and args["input_file"] == "":
+        from distro2sbom.distrobuilder.metadatacache import MetadataCache
+
+        cache = MetadataCache(args["cache_dir"])
+        sbom_build.set_cache(cache)
+
+    if args["files"]:
+        # SPDX requires a SHA1 digest of each file
+        sbom_build.set_files("SHA1" if args["sbom"] == "spdx" else None)
+
+    if watcher is not None and watcher.has_previous():
+        # Only analyse packages which have changed since the SBOM was last generated
+        sbom_build.set_previous(watcher.get_packages(), watcher.get_relationships())
+    elif args["previous"] != "":
+        from distro2sbom.distrobuilder.previoussbom import PreviousSBOM
+
+        timings.start("previous")
+        previous_sbom = PreviousSBOM(args["previous"])
+        if not previous_sbom.load():
+            return -1
+        sbom_build.set_previous(
+            previous_sbom.get_packages(), previous_sbom.get_relationships()
+        )
+
+    timings.start("processing")
+    # Requested packages which are not installed
+    missing = []
     if args["input_file"] != "":
         # Check file exists
         filePath = Path(args["input_file"])
@@ -300,44 +640,114 @@ def main(argv=None):
             print("This may take some time...")
         sbom_build.process_system()
     else:
-        sbom_build.process_distro_package(args["package"])
+        package_names = get_package_names(args)
+        if package_names is None:
+            return -1
+        elif args["output_dir"] != "":
+            result = generate_package_sboms(
+                args, app_name, bom_format, product_type, timings, sbom_build, package_names
+            )
+            if cache is not None:
+                cache.close()
+            return result
+        elif len(package_names) > 1:
+            missing = sbom_build.process_distro_packages(package_names)
+        else:
+            sbom_build.process_distro_package(package_names[0])
+
+    if cache is not None:
+        if args["debug"]:
+            print(f"Metadata cache: {cache.hits} hits, {cache.misses} misses")
+        cache.close()
+
+    if args["debug"] and sbom_build.license is not None:
+        print(
+            f"License resolution: {sbom_build.license.hits} hits, "
+            f"{sbom_build.license.misses} misses"
+        )
+
+    timings.set_count("packages", len(sbom_build.get_packages()))
 
     # Only generate if we have some data to process
 
     if len(sbom_build.get_packages()) > 0:
+        files = None
+        if args["files"]:
+            timings.start("files")
+            files = sbom_build.get_files()
+            timings.set_count("files", len(files))
+        timings.start("relationships")
         # Generate SBOM file
-        distro_sbom = SBOM()
-        sbom_doc = SBOMDocument()
-        sbom_doc.set_value("lifecycle", "operations")
-        sbom_doc.set_metadata_type(product_type)
-        if args["product_name"] != "":
-            sbom_doc.set_name(args["product_name"])
-        if args["product_version"] != "":
-            sbom_doc.set_metadata_version(args["product_version"])
-        if args["product_author"] != "":
-            sbom_doc.set_metadata_supplier(args["product_author"])
-        distro_sbom.add_document(sbom_doc.get_document())
-        distro_sbom.add_packages(sbom_build.get_packages())
-        distro_sbom.add_relationships(sbom_build.get_relationships())
-
-        sbom_gen = SBOMGenerator(
-            sbom_type=args["sbom"],
-            format=bom_format,
-            application=app_name,
-            version=VERSION,
-        )
-        sbom_gen.generate(
-            project_name=sbom_build.get_parent(),
-            sbom_data=distro_sbom.get_sbom(),
-            filename=args["output_file"],
+        relationships = sbom_build.get_relationships()
+        timings.set_count("relationships", len(relationships))
+        if watcher is not None:
+            watcher.set_previous(sbom_build.get_packages(), relationships)
+        sbom_data = create_sbom(
+            args, product_type, sbom_build.get_packages(), relationships, files
         )
+
+        timings.start("generation")
+        write_sbom(args, app_name, bom_format, sbom_build.get_parent(), sbom_data)
     else:
-        if args["package"] != "":
-            print(f"[ERROR] Unable to locate package {args['package']}")
+        if not args["system"] and args["input_file"] == "":
+            print(f"[ERROR] Unable to locate package {', '.join(package_names)}")
         return -1
 
+    # SBOM is still generated for the packages which are installed
+    for package_name in missing:
+        print(f"[ERROR] Unable to locate package {package_name}")
+    if len(missing) > 0:
+        return -1
     return 0
 
 
+def generate_package_sboms(
+    args, app_name, bom_format, product_type, timings, sbom_build, package_names
+):
+    # Separate SBOM for each package. Package information obtained for a
+    # package is reused for the other packages which depend on it.
+    output_dir = Path(args["output_dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    result = 0
+    packages = 0
+    sbom_build.resolve(package_names)
+    for package_name in package_names:
+        timings.start("processing")
+        sbom_build.reset()
+        sbom_build.process_distro_package(package_name)
+        if len(sbom_build.get_packages()) == 0:
+            print(f"[ERROR] Unable to locate package {package_name}")
+            result = -1
+            continue
+        packages += len(sbom_build.get_packages())
+        files = None
+        if args["files"]:
+            timings.start("files")
+            files = sbom_build.get_files()
+        timings.start("relationships")
+        sbom_data = create_sbom(
+            args,
+            product_type,
+            sbom_build.get_packages(),
+            sbom_build.get_relationships(),
+            files,
+        )
+        timings.start("generation")
+        output_file = output_dir / (
+            f"{package_name.replace('/', '-')}.{FILE_EXTENSIONS[bom_format]}"
+        )
+        write_sbom(
+            args.new_child({"output_file": str(output_file)}),
+            app_name,
+            bom_format,
+            sbom_build.get_parent(),
+            sbom_data,
+        )
+        if args["debug"]:
+            print(f"SBOM for {package_name} written to {output_file}")
+    timings.set_count("packages", packages)
+    return result
+
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,20 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import importlib
+
+# Module and class of the builder for each type of distribution. Builders
+# are only imported when required as importing a builder also imports the
+# license data.
+BUILDERS = {
+    "deb": ("distro2sbom.distrobuilder.dpkgbuilder", "DpkgBuilder"),
+    "rpm": ("distro2sbom.distrobuilder.rpmbuilder", "RpmBuilder"),
+    "windows": ("distro2sbom.distrobuilder.windowsbuilder", "WindowsBuilder"),
+    "freebsd": ("distro2sbom.distrobuilder.freebsdbuilder", "FreeBSDBuilder"),
+}
+
+
+def get_builder(distro_type):
+    # Return builder class for distribution
+    module_name, class_name = BUILDERS[distro_type]
+    return getattr(importlib.import_module(module_name), class_name)
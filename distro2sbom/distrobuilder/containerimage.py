@@ -0,0 +1,300 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import posixpath
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+
+from distro2sbom.distrobuilder.distrobuilder import ZSTD_MAGIC, zstandard
+
+# Locations within the image which contain package metadata. Only these
+# members of each layer are extracted.
+METADATA_FILES = ["etc/os-release", "usr/lib/os-release", "var/lib/dpkg/status"]
+METADATA_DIRECTORIES = [
+    "var/lib/rpm",
+    "usr/lib/sysimage/rpm",
+    "var/db/pkg",
+    "usr/local/share/licenses",
+]
+DOC_DIRECTORY = "usr/share/doc"
+# Package databases used to identify type of distribution
+DISTRO_FILES = {
+    "deb": ["var/lib/dpkg/status"],
+    "rpm": [
+        "var/lib/rpm/rpmdb.sqlite",
+        "var/lib/rpm/Packages",
+        "var/lib/rpm/Packages.db",
+        "usr/lib/sysimage/rpm/rpmdb.sqlite",
+    ],
+    "freebsd": ["var/db/pkg/local.sqlite"],
+}
+WHITEOUT_PREFIX = ".wh."
+OPAQUE_WHITEOUT = ".wh..wh..opq"
+# Changing the layer cache format invalidates any cached layers
+LAYER_CACHE_VERSION = 1
+
+
+class ContainerImage:
+    def __init__(self, image, cache_dir="", debug=False):
+        self.image = image
+        self.debug = debug
+        self.archive = None
+        self.root = None
+        self.work_dir = None
+        if cache_dir != "":
+            self.layer_dir = Path(cache_dir) / "layers"
+        else:
+            self.layer_dir = None
+        self.layers_processed = 0
+        self.layers_cached = 0
+
+    def is_metadata(self, name):
+        if name in METADATA_FILES:
+            return True
+        for directory in METADATA_DIRECTORIES:
+            if name == directory or name.startswith(f"{directory}/"):
+                return True
+        # Only the copyright file (or a link to another package's
+        # documentation) is required from the documentation
+        if name.startswith(f"{DOC_DIRECTORY}/"):
+            elements = name.split("/")
+            return len(elements) == 4 or (len(elements) == 5 and elements[4] == "copyright")
+        return False
+
+    def contains_metadata(self, directory):
+        # Removal of directory affects package metadata
+        if directory == "":
+            return True
+        return self.is_metadata(directory) or any(
+            location.startswith(f"{directory}/")
+            for location in METADATA_FILES + METADATA_DIRECTORIES + [DOC_DIRECTORY]
+        )
+
+    def normalise(self, name):
+        # Remove leading ./ and / and reject names outside of the image
+        name = posixpath.normpath(name.lstrip("/"))
+        if name == "." or name == ".." or name.startswith("../"):
+            return None
+        return name
+
+    def read(self, name):
+        with self.open(name) as image_file:
+            return json.load(image_file)
+
+    def open(self, name):
+        if self.archive is None:
+            return open(Path(self.image) / name, "rb")
+        image_file = self.archive.extractfile(name)
+        if image_file is None:
+            raise KeyError(name)
+        return image_file
+
+    def exists(self, name):
+        if self.archive is None:
+            return (Path(self.image) / name).is_file()
+        try:
+            self.archive.getmember(name)
+        except KeyError:
+            return False
+        return True
+
+    def get_layers(self):
+        # Returns list of (layer, digest) in order from base layer.
+        # Layers are identified by the digest of their uncompressed content
+        # (the diff_id) so that layers shared between images are identified
+        # regardless of the compression used.
+        if self.exists("manifest.json"):
+            # docker save format
+            manifest = self.read("manifest.json")[0]
+            layers = manifest["Layers"]
+            config = self.read(manifest["Config"])
+        else:
+            # OCI image layout
+            index = self.read("index.json")
+            descriptor = index["manifests"][0]
+            manifest = self.read(self.blob(descriptor["digest"]))
+            # Multi-platform image index: use the first image
+            while "manifests" in manifest:
+                manifest = self.read(self.blob(manifest["manifests"][0]["digest"]))
+            layers = [self.blob(layer["digest"]) for layer in manifest["layers"]]
+            config = self.read(self.blob(manifest["config"]["digest"]))
+        diff_ids = config.get("rootfs", {}).get("diff_ids", [])
+        if len(diff_ids) != len(layers):
+            diff_ids = [None] * len(layers)
+        return list(zip(layers, diff_ids))
+
+    def blob(self, digest):
+        algorithm, value = digest.split(":", 1)
+        return f"blobs/{algorithm}/{value}"
+
+    def open_layer(self, layer_file):
+        # Layers may be uncompressed or compressed with gzip or zstd
+        if layer_file.peek(4)[:4] == ZSTD_MAGIC:
+            if zstandard is None:
+                print(f"[ERROR] zstandard module is required to read {self.image}")
+                return None
+            return tarfile.open(
+                fileobj=zstandard.ZstdDecompressor().stream_reader(layer_file),
+                mode="r|",
+            )
+        return tarfile.open(fileobj=layer_file, mode="r|*")
+
+    def extract_layer(self, layer, directory):
+        # Extract package metadata and whiteouts from layer
+        contents = {
+            "version": LAYER_CACHE_VERSION,
+            "files": [],
+            "symlinks": {},
+            "whiteouts": [],
+            "opaque": [],
+        }
+        files_dir = directory / "files"
+        with self.open(layer) as layer_file:
+            layer_archive = self.open_layer(layer_file)
+            if layer_archive is None:
+                return False
+            with layer_archive:
+                for member in layer_archive:
+                    name = self.normalise(member.name)
+                    if name is None:
+                        continue
+                    parent, filename = posixpath.split(name)
+                    if filename == OPAQUE_WHITEOUT:
+                        if self.contains_metadata(parent):
+                            contents["opaque"].append(parent)
+                    elif filename.startswith(WHITEOUT_PREFIX):
+                        target = posixpath.join(parent, filename[len(WHITEOUT_PREFIX):])
+                        if self.contains_metadata(target):
+                            contents["whiteouts"].append(target)
+                    elif not self.is_metadata(name):
+                        continue
+                    elif member.issym():
+                        contents["symlinks"][name] = member.linkname
+                    elif member.isfile() or member.islnk():
+                        if member.islnk():
+                            # Hard link to file earlier in layer
+                            source = self.normalise(member.linkname)
+                            if source not in contents["files"]:
+                                continue
+                            source_file = files_dir / source
+                        else:
+                            source_file = layer_archive.extractfile(member)
+                        destination = files_dir / name
+                        destination.parent.mkdir(parents=True, exist_ok=True)
+                        if member.islnk():
+                            shutil.copyfile(source_file, destination)
+                        else:
+                            with open(destination, "wb") as destination_file:
+                                shutil.copyfileobj(source_file, destination_file)
+                        contents["files"].append(name)
+        with open(directory / "layer.json", "w") as layer_file:
+            json.dump(contents, layer_file)
+        return True
+
+    def get_layer(self, layer, digest):
+        # Returns directory containing extracted contents of layer
+        self.layers_processed += 1
+        if self.layer_dir is None or digest is None:
+            directory = Path(tempfile.mkdtemp(dir=self.work_dir))
+            return directory if self.extract_layer(layer, directory) else None
+        directory = self.layer_dir / digest.replace(":", "-")
+        if (directory / "layer.json").is_file():
+            with open(directory / "layer.json") as layer_file:
+                if json.load(layer_file).get("version") == LAYER_CACHE_VERSION:
+                    self.layers_cached += 1
+                    return directory
+            shutil.rmtree(directory, ignore_errors=True)
+        # Extract to temporary directory so that an incomplete layer is never
+        # used by another process sharing the cache
+        self.layer_dir.mkdir(parents=True, exist_ok=True)
+        temporary = Path(tempfile.mkdtemp(dir=self.layer_dir))
+        if not self.extract_layer(layer, temporary):
+            shutil.rmtree(temporary, ignore_errors=True)
+            return None
+        try:
+            os.rename(temporary, directory)
+        except OSError:
+            # Layer already extracted by another process
+            shutil.rmtree(temporary, ignore_errors=True)
+        return directory
+
+    def remove(self, path):
+        if path.is_symlink() or path.is_file():
+            path.unlink()
+        elif path.is_dir():
+            shutil.rmtree(path)
+
+    def apply_layer(self, directory):
+        # Whiteouts only apply to the contents of lower layers
+        with open(directory / "layer.json") as layer_file:
+            contents = json.load(layer_file)
+        for opaque in contents["opaque"]:
+            self.remove(self.root / opaque)
+        for whiteout in contents["whiteouts"]:
+            self.remove(self.root / whiteout)
+        for name in contents["files"]:
+            destination = self.root / name
+            self.remove(destination)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(directory / "files" / name, destination)
+        for name, target in contents["symlinks"].items():
+            destination = self.root / name
+            self.remove(destination)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            # Links are resolved within the image rather than the host
+            parent = posixpath.dirname(name)
+            target = posixpath.normpath(
+                posixpath.join("/" if target.startswith("/") else f"/{parent}", target)
+            ).lstrip("/")
+            os.symlink(posixpath.relpath(target or ".", parent or "."), destination)
+
+    def extract(self):
+        # Returns directory containing package metadata of image
+        image_path = Path(self.image)
+        if image_path.is_file():
+            try:
+                self.archive = tarfile.open(self.image)
+            except tarfile.TarError:
+                print(f"[ERROR] Unable to process container image {self.image}")
+                return None
+        elif not image_path.is_dir():
+            print(f"[ERROR] Unable to locate container image {self.image}")
+            return None
+        self.work_dir = tempfile.mkdtemp(prefix="distro2sbom-")
+        self.root = Path(self.work_dir) / "root"
+        self.root.mkdir()
+        try:
+            layers = self.get_layers()
+            for layer, digest in layers:
+                if self.debug:
+                    print(f"Processing layer {layer} ({digest})")
+                directory = self.get_layer(layer, digest)
+                if directory is None:
+                    return None
+                self.apply_layer(directory)
+        except (KeyError, IndexError, ValueError, OSError, tarfile.TarError):
+            print(f"[ERROR] Unable to process container image {self.image}")
+            return None
+        if self.debug:
+            print(
+                f"Container image: {self.layers_processed} layers, "
+                f"{self.layers_cached} layers cached"
+            )
+        return str(self.root)
+
+    def get_distro_type(self):
+        for distro, files in DISTRO_FILES.items():
+            for filename in files:
+                if (self.root / filename).is_file():
+                    return distro
+        return None
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+        if self.work_dir is not None:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
@@ -0,0 +1,68 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+
+class DependencyGraph:
+    def __init__(self):
+        # Metadata record for each visited package (None if package not found)
+        self.records = {}
+
+    def visited(self, package_name):
+        return package_name in self.records
+
+    def found(self, package_name):
+        return self.records.get(package_name) is not None
+
+    def get_record(self, package_name):
+        return self.records.get(package_name)
+
+    def add(self, package_name, record):
+        # Package visited without traversing its dependencies
+        self.records[package_name] = record
+
+    def walk(self, package_name, parent, process, dependencies, link, prefetch=None):
+        # Iterative depth first traversal of the dependencies of a package.
+        #   process(name, parent) returns the metadata record for a package
+        #   (or None if not found) having added it to the SBOM
+        #   dependencies(record) returns the name of the package and the
+        #   names of its dependencies
+        #   link(parent, name) adds a relationship to an already visited package
+        #   prefetch(names) optionally starts queries for the dependencies
+        #   which are yet to be visited
+        worklist = [(package_name, parent)]
+        while len(worklist) > 0:
+            name, parent = worklist.pop()
+            if name in self.records:
+                # Only link to packages which have been found
+                if self.records[name] is not None:
+                    link(parent, name)
+                continue
+            record = process(name, parent)
+            self.records[name] = record
+            if record is not None:
+                node, children = dependencies(record)
+                if prefetch is not None:
+                    prefetch([child for child in children if child not in self.records])
+                # Reversed so that dependencies are processed in the order listed
+                worklist.extend((child, node) for child in reversed(children))
+
+    def resolve(self, package_names, dependencies, query):
+        # Breadth first traversal of the dependencies of packages in which
+        # the packages at each level are queried together so that the
+        # metadata is available before the packages are walked.
+        #   dependencies(record) as for walk
+        #   query(names) returns the metadata record for each of the names
+        #   (None if not found)
+        queued = set(package_names)
+        level = [name for name in package_names if name not in self.records]
+        while len(level) > 0:
+            records = query(level)
+            next_level = []
+            for name in level:
+                if records.get(name) is None:
+                    continue
+                for child in dependencies(records[name])[1]:
+                    if child not in queued and child not in self.records:
+                        queued.add(child)
+                        next_level.append(child)
+            level = next_level
@@ -1,21 +1,81 @@
 # Copyright (C) 2023 Anthony Harrison
 # SPDX-License-Identifier: Apache-2.0
 
+import codecs
+import gzip
+import io
+import lzma
 import os
 import re
 import subprocess
+import time
 import unicodedata
 from pathlib import Path
 
+from lib4sbom.data.file import SBOMFile
+
+from distro2sbom.distrobuilder.dependencygraph import DependencyGraph
+from distro2sbom.distrobuilder.filehasher import FileHasher
+from distro2sbom.distrobuilder.packagestore import PackageStore
+from distro2sbom.distrobuilder.queryexecutor import QueryExecutor
+from distro2sbom.distrobuilder.relationshipstore import RelationshipStore
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Supplier names are assumed to be at least two names <first> <surname>
+NAME_PATTERN = re.compile(r"[a-zA-Z\.\]+ [A-Za-z]+ ")
+# Use RFC-5322 compliant regex (https://regex101.com/library/6EL6YF)
+EMAIL_PATTERN = re.compile(
+    r"((?:[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*|\"(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21\x23-\x5b\x5d-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])*\")@(?:(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]*[a-z0-9])?|\[(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?|[a-z0-9-]*[a-z0-9]:(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21-\x5a\x53-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])+)\]))",
+    re.IGNORECASE,
+)
+SPACES_PATTERN = re.compile(" +")
+# Signatures of supported compressed file formats
+GZIP_MAGIC = b"\x1f\x8b"
+XZ_MAGIC = b"\xfd7zXZ\x00"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Maximum length of a command line used to query several packages. This is
+# well within the limits of all supported platforms.
+MAX_COMMAND_LENGTH = 32000
+# Byte order marks which identify the encoding of a text file
+BOM_ENCODINGS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
 
 class DistroBuilder:
-    def __init__(self, debug=False, ecosystem="generic"):
-        self.sbom_packages = {}
-        self.sbom_relationships = []
+    # Parsed suppliers are shared by all builders within a process
+    suppliers = {}
+
+    def __init__(self, debug=False, ecosystem="generic", jobs=1):
+        self.sbom_packages = PackageStore()
+        self.sbom_relationships = RelationshipStore()
         self.debug = debug
         self.root = os.environ.get("DISTRO2SBOM_ROOT_PATH", "")
         self.namespace = None
+        self.distro = None
         self.ecosystem = ecosystem
+        self.cache = None
+        self.license = None
+        self.previous_packages = None
+        self.previous_relationships = {}
+        self.timings = None
+        # Packages for which an SBOM is requested
+        self.requested = set()
+        # Package information retained when several SBOMs are generated
+        self.components = None
+        # Files of each package are only included if requested
+        self.sbom_file = SBOMFile()
+        self.sbom_files = None
+        self.file_algorithm = None
+        self.unhashed_files = []
+        # Package queries can be run concurrently
+        self.executor = QueryExecutor(jobs)
 
     def get_data(self):
         pass
@@ -26,14 +86,120 @@ class DistroBuilder:
     def process_system(self):
         print("[ERROR] Feature not available")
 
+    def resolve(self, package_names):
+        # Obtain information for packages and their dependencies in advance
+        pass
+
+    def process_distro_packages(self, module_names):
+        # Several packages in a single SBOM. Dependencies which are common
+        # to the packages are only analysed once. Returns the packages which
+        # are not installed.
+        self.parent = f"{self.name}-{self.release}-Packages"
+        self.requested = set(module_names)
+        self.resolve(module_names)
+        for module_name in module_names:
+            if not self.graph.visited(module_name):
+                self.analyze(module_name)
+            elif self.graph.found(module_name):
+                # Package is a dependency of a package already analysed
+                self.sbom_relationship.initialise()
+                self.sbom_relationship.set_relationship(
+                    self.parent,
+                    "DESCRIBES",
+                    self.get_package_key(self.graph.get_record(module_name))[0],
+                )
+                self.sbom_relationships.append(self.sbom_relationship.get_relationship())
+        self.executor.shutdown()
+        return [name for name in module_names if not self.graph.found(name)]
+
+    def reset(self):
+        # Remove packages and relationships so that an SBOM can be generated
+        # for another package. Package information obtained for previous
+        # packages is reused.
+        self.sbom_packages = PackageStore()
+        self.sbom_relationships = RelationshipStore()
+        self.graph = DependencyGraph()
+        if self.sbom_files is not None:
+            self.sbom_files = PackageStore()
+        if self.components is None:
+            self.components = {}
+
+    def open_file(self, filename):
+        # Open file as a binary stream, decompressing if necessary
+        with open(filename, "rb") as data_file:
+            signature = data_file.read(len(XZ_MAGIC))
+        if signature.startswith(GZIP_MAGIC):
+            return gzip.open(filename, "rb")
+        elif signature.startswith(XZ_MAGIC):
+            return lzma.open(filename, "rb")
+        elif signature.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                print(f"[ERROR] zstandard module is required to read {filename}")
+                return None
+            return io.BufferedReader(
+                zstandard.ZstdDecompressor().stream_reader(
+                    open(filename, "rb"), read_across_frames=True
+                )
+            )
+        return open(filename, "rb")
+
+    def read_lines(self, filename, encoding=None):
+        # Return lines of file as they are read so that files of any size
+        # can be processed. Concatenated compressed files are supported.
+        stream = self.open_file(filename)
+        if stream is None:
+            return
+        # Encoding is identified by byte order mark if present
+        prefix = stream.peek(len(codecs.BOM_UTF8))
+        for bom, bom_encoding in BOM_ENCODINGS:
+            if prefix.startswith(bom):
+                encoding = bom_encoding
+                break
+        with io.TextIOWrapper(stream, encoding=encoding) as text_file:
+            yield from text_file
+
     def run_program(self, command_line):
         # Remove any null bytes
         command_line = command_line.replace("\x00", "")
         # Split command line into individual elements
         params = command_line.split()
+        start = time.perf_counter()
         res = subprocess.run(params, capture_output=True, text=True)
+        if self.timings is not None:
+            self.timings.record_command(
+                os.path.basename(params[0]), time.perf_counter() - start
+            )
         return res.stdout.splitlines()
 
+    def run_batches(self, command_line, arguments):
+        # Run command for as many of the arguments as fit within the maximum
+        # length of a command line. Returns the arguments and the output of
+        # each command. If several jobs are specified, the arguments are
+        # shared between at least as many commands which are run concurrently.
+        batch_size = len(arguments)
+        if self.executor.jobs > 1:
+            batch_size = -(-len(arguments) // self.executor.jobs)
+        batches = []
+        batch = []
+        length = len(command_line)
+        for argument in arguments:
+            if len(batch) > 0 and (
+                length + len(argument) + 1 > MAX_COMMAND_LENGTH or len(batch) == batch_size
+            ):
+                batches.append(batch)
+                batch = []
+                length = len(command_line)
+            batch.append(argument)
+            length += len(argument) + 1
+        if len(batch) > 0:
+            batches.append(batch)
+        yield from zip(
+            batches,
+            self.executor.map(
+                self.run_program, [f"{command_line} {' '.join(batch)}" for batch in batches]
+            ),
+        )
+
     def format_supplier(self, supplier_info, include_email=True):
         # See https://stackoverflow.com/questions/1207457/convert-a-unicode-string-to-a-string-in-python-containing-extra-symbols
         # And convert byte object to a string
@@ -44,29 +210,224 @@ class DistroBuilder:
         )
         if " " in name_str:
             # Get names assumed to be at least two names <first> <surname>
-            names = re.findall(r"[a-zA-Z\.\]+ [A-Za-z]+ ", name_str)
+            names = NAME_PATTERN.findall(name_str)
         else:
             # Handle case where only single name provided
             names = [name_str]
         # Get email addresses
-        # Use RFC-5322 compliant regex (https://regex101.com/library/6EL6YF)
-        emails = re.findall(
-            r"((?:[a-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[a-z0-9!#$%&'*+/=?^_`{|}~-]+)*|\"(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21\x23-\x5b\x5d-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])*\")@(?:(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z0-9](?:[a-z0-9-]*[a-z0-9])?|\[(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?|[a-z0-9-]*[a-z0-9]:(?:[\x01-\x08\x0b\x0c\x0e-\x1f\x21-\x5a\x53-\x7f]|\\[\x01-\x09\x0b\x0c\x0e-\x7f])+)\]))",
-            supplier_info,
-            re.IGNORECASE,
-        )
+        emails = EMAIL_PATTERN.findall(supplier_info)
         supplier = " ".join(n for n in names)
         if include_email and len(emails) > 0:
             # Only one email can be specified, so choose last one
             supplier = supplier + "(" + emails[-1] + ")"
-        return re.sub(" +", " ", supplier.strip())
+        return SPACES_PATTERN.sub(" ", supplier.strip())
+
+    def parse_supplier(self, supplier_info):
+        # Return type, name and CPE vendor of supplier. Most packages are
+        # maintained by a small number of suppliers so each distinct
+        # supplier is only parsed once.
+        if supplier_info not in self.suppliers:
+            if len(supplier_info.split()) > 3:
+                supplier_type = "Organization"
+            elif len(supplier_info) > 1:
+                supplier_type = "Person"
+            else:
+                self.suppliers[supplier_info] = ("UNKNOWN", "NOASSERTION", None)
+                return self.suppliers[supplier_info]
+            vendor = self.format_supplier(supplier_info, include_email=False)
+            self.suppliers[supplier_info] = (
+                supplier_type,
+                self.format_supplier(supplier_info),
+                vendor.replace(" ", "_").lower(),
+            )
+        return self.suppliers[supplier_info]
+
+    def set_cache(self, cache):
+        self.cache = cache
+
+    def set_timings(self, timings):
+        self.timings = timings
+
+    def set_previous(self, packages, relationships):
+        # Components and relationships from a previously generated SBOM
+        self.previous_packages = {}
+        for package in packages:
+            self.previous_packages[package["name"]] = package
+        self.previous_relationships = {}
+        for relationship in relationships:
+            if relationship["type"] == "DEPENDS_ON":
+                self.previous_relationships.setdefault(
+                    relationship["source"], []
+                ).append(relationship["target"])
+
+    def get_component_name(self, package_name):
+        # Name of component for installed package
+        return package_name.lower().replace("_", "-")
+
+    def get_previous_package(self, package_name):
+        # Component in previous SBOM for installed package
+        return self.previous_packages.get(self.get_component_name(package_name))
+
+    def carry_over(self, installed, parent):
+        # Reuse components and relationships from the previous SBOM for
+        # installed packages which are unchanged. Returns the packages
+        # which have been added or changed and so need to be analysed.
+        if self.previous_packages is None:
+            return list(installed)
+        components = set(self.get_component_name(name) for name in installed)
+        changed = []
+        for package_name, version in installed.items():
+            package = self.get_previous_package(package_name)
+            if package is None or package["version"] != version:
+                changed.append(package_name)
+                continue
+            name = package["name"]
+            self.sbom_packages[(name, version)] = package
+            # Previous component is used as the record of the package
+            self.graph.add(package_name, package)
+            self.sbom_relationship.initialise()
+            self.sbom_relationship.set_relationship(parent, "DEPENDS_ON", name)
+            self.sbom_relationships.append(self.sbom_relationship.get_relationship())
+            # Only retain relationships to packages which are still installed
+            for dependency in self.previous_relationships.get(name, []):
+                if dependency in components:
+                    self.sbom_relationship.initialise()
+                    self.sbom_relationship.set_relationship(
+                        name, "DEPENDS_ON", dependency
+                    )
+                    self.sbom_relationships.append(
+                        self.sbom_relationship.get_relationship()
+                    )
+            self.add_files(package_name, name)
+        if self.debug:
+            print(
+                f"Previous SBOM: {len(installed) - len(changed)} packages unchanged, "
+                f"{len(changed)} packages to analyse"
+            )
+        return changed
+
+    def get_package_key(self, metadata):
+        # Return name, version and architecture of package
+        return None
+
+    def set_files(self, algorithm=None):
+        # Include the files of each package using the digests stored in
+        # the package database. Files are hashed if a digest using the
+        # specified algorithm is required (e.g. SHA1 for SPDX).
+        self.sbom_files = PackageStore()
+        self.file_algorithm = algorithm
+
+    def get_package_files(self, package_name):
+        # Return filename, digest algorithm and digest of each file of the
+        # package. Digest is None if not stored in the package database.
+        return []
+
+    def add_files(self, package_name, package):
+        if self.sbom_files is None:
+            return
+        for filename, algorithm, digest in self.get_package_files(package_name):
+            checksums = [] if digest is None else [(algorithm, digest)]
+            if digest is None or self.file_algorithm not in (None, algorithm):
+                # Hashed once all packages have been processed
+                self.unhashed_files.append((package, filename, checksums))
+            else:
+                self.add_file(package, filename, checksums)
+
+    def add_file(self, package, filename, checksums):
+        self.sbom_file.initialise()
+        self.sbom_file.set_name(filename)
+        for algorithm, digest in checksums:
+            self.sbom_file.set_checksum(algorithm, digest)
+        self.sbom_files[filename] = self.sbom_file.get_file()
+        self.sbom_relationship.initialise()
+        self.sbom_relationship.set_relationship(package, "CONTAINS", filename)
+        self.sbom_relationship.set_target_type("file")
+        self.sbom_relationships.append(self.sbom_relationship.get_relationship())
+
+    def get_algorithms(self, checksums):
+        # Digests to calculate for a file. SHA256 is used if no digest is stored.
+        algorithms = []
+        if self.file_algorithm is not None:
+            algorithms.append(self.file_algorithm)
+        if len(checksums) == 0 and "SHA256" not in algorithms:
+            algorithms.append("SHA256")
+        return algorithms
+
+    def get_files(self):
+        if self.sbom_files is None:
+            return {}
+        if len(self.unhashed_files) > 0:
+            hasher = FileHasher(self.root)
+            # Files which can not be read are not included
+            unhashed_files = [
+                (package, filename, checksums)
+                for package, filename, checksums in self.unhashed_files
+                if hasher.is_file(filename)
+            ]
+            if self.debug:
+                print(f"Hashing {len(unhashed_files)} files")
+            digests = hasher.hash_files(
+                [
+                    (filename, self.get_algorithms(checksums))
+                    for _, filename, checksums in unhashed_files
+                ]
+            )
+            for (package, filename, checksums), digest in zip(unhashed_files, digests):
+                if digest is not None:
+                    self.add_file(package, filename, checksums + list(digest.items()))
+            self.unhashed_files = []
+        return self.sbom_files
+
+    def build_package(self, package_name, metadata):
+        pass
+
+    def set_package(self, package_name, metadata):
+        if self.components is not None:
+            if package_name not in self.components:
+                self.cache_package(package_name, metadata)
+                self.components[package_name] = dict(self.sbom_package.get_package())
+            self.sbom_package.initialise()
+            self.sbom_package.copy_package(self.components[package_name])
+        else:
+            self.cache_package(package_name, metadata)
+
+    def cache_package(self, package_name, metadata):
+        if self.cache is None:
+            self.build_package(package_name, metadata)
+            return
+        # Reuse package information if package has not changed since cached
+        name, version, architecture = self.get_package_key(metadata)
+        digest = self.cache.digest(
+            metadata, self.name, self.release, self.namespace, self.distro
+        )
+        package_info = self.cache.get(
+            self.ecosystem, name, version, architecture, digest
+        )
+        if package_info is not None:
+            self.sbom_package.initialise()
+            self.sbom_package.copy_package(package_info)
+        else:
+            self.build_package(package_name, metadata)
+            self.cache.put(
+                self.ecosystem,
+                name,
+                version,
+                architecture,
+                digest,
+                self.sbom_package.get_package(),
+            )
+
+    def get(self, metadata, attribute):
+        if attribute in metadata:
+            return metadata[attribute].lstrip()
+        return ""
 
     def get_packages(self):
         return self.sbom_packages
 
     def get_relationships(self):
         if self.debug:
-            print(self.sbom_relationships)
+            print(list(self.sbom_relationships))
         return self.sbom_relationships
 
     def get_parent(self):
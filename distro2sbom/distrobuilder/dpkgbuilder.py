@@ -1,23 +1,27 @@
 # Copyright (C) 2025 Anthony Harrison
 # SPDX-License-Identifier: Apache-2.0
 
+import os
 import re
+from itertools import chain
 from pathlib import Path
 
 from lib4sbom.data.package import SBOMPackage
 from lib4sbom.data.relationship import SBOMRelationship
-from lib4sbom.license import LicenseScanner
 
+from distro2sbom.distrobuilder.dependencygraph import DependencyGraph
 from distro2sbom.distrobuilder.distrobuilder import DistroBuilder
+from distro2sbom.distrobuilder.dpkgdatabase import DpkgDatabase
+from distro2sbom.distrobuilder.licenseresolver import LicenseResolver
 
 
 class DpkgBuilder(DistroBuilder):
-    def __init__(self, name, release, debug=False, root="", namespace=""):
-        super().__init__(debug, ecosystem="deb")
+    def __init__(self, name, release, debug=False, root="", namespace="", jobs=1):
+        super().__init__(debug, ecosystem="deb", jobs=jobs)
         self.sbom_package = SBOMPackage()
         self.sbom_relationship = SBOMRelationship()
-        self.license = LicenseScanner()
-        self.distro_packages = []
+        self.license = LicenseResolver()
+        self.graph = DependencyGraph()
         self.set_namespace(namespace)
         self.system_data = self.get_system()
         if name is None and release is None:
@@ -30,13 +34,15 @@ class DpkgBuilder(DistroBuilder):
             self.distro = self.get_namespace()
         self.parent = f"Distro-{self.name}"
         self.root = root
+        self.database = DpkgDatabase(self.root)
         self.recommends = {}
+        self.copyright_files = {}
 
     def parse_data(self, filename):
         # Process file containing installed applications
-        with open(filename) as dir_file:
-            lines = dir_file.readlines()
-        if len(lines) > 0:
+        lines = self.read_lines(filename)
+        first_line = next(lines, None)
+        if first_line is not None:
             # Something to process
             distro_root = self.name.lower().replace("_", "-")
             self.sbom_package.initialise()
@@ -57,7 +63,7 @@ class DpkgBuilder(DistroBuilder):
                 self.parent, "DESCRIBES", distro_root
             )
             self.sbom_relationships.append(self.sbom_relationship.get_relationship())
-            for line in lines:
+            for line in chain([first_line], lines):
                 # Only process installed packages
                 if line[:2] == "ii":
                     line_element = re.sub(
@@ -103,24 +109,29 @@ class DpkgBuilder(DistroBuilder):
                         self.sbom_relationship.get_relationship()
                     )
 
-    def get(self, attribute):
-        if attribute in self.metadata:
-            return self.metadata[attribute].lstrip()
-        return ""
-
     def get_metadata_from_file(self, package):
-        # Location of Debian copyright files
-        base_file = f"{self.root}/usr/share/doc/{package}/copyright"
+        # Location of Debian copyright files. Documentation directories are
+        # often links to the directory of another package so each copyright
+        # file is only processed once.
+        copyright_file = os.path.realpath(
+            f"{self.root}/usr/share/doc/{package}/copyright"
+        )
+        if copyright_file not in self.copyright_files:
+            self.copyright_files[copyright_file] = self.read_copyright_file(
+                copyright_file
+            )
+        return self.copyright_files[copyright_file]
+
+    def read_copyright_file(self, copyright_file):
         copyright_text = ""
         license_text = "NOASSERTION"
-        filename = Path(base_file)
+        filename = Path(copyright_file)
         # Check path exists and is a valid file
         if filename.exists() and filename.is_file():
             with open(filename, "r", errors="replace") as f:
-                lines = f.readlines()
                 copyright_found = False
                 license_found = False
-                for line in lines:
+                for line in f:
                     # Search for first Copyright and License statements
                     if copyright_found:
                         copyright_info = line.strip().rstrip("\n")
@@ -137,6 +148,9 @@ class DpkgBuilder(DistroBuilder):
                         if len(license_info) > 0:
                             license_text = license_info
                             license_found = True
+                    if license_found and len(copyright_text) > 0 and not copyright_found:
+                        # No need to read rest of file
+                        break
         return license_text, copyright_text
 
     def dpkg_command(self, command_string):
@@ -145,84 +159,156 @@ class DpkgBuilder(DistroBuilder):
             command = f"{command} --root {self.root}"
         return self.run_program(f"{command} {command_string}")
 
+    def query_package(self, package_name):
+        # Use package database if available to avoid running dpkg
+        if self.database.available():
+            return self.database.get_package(package_name)
+        out = self.dpkg_command(f"-s {package_name}")
+        for stanza in self.database.parse(out):
+            return stanza
+        return None
+
+    def query_packages(self, package_names):
+        # Query several packages with a single dpkg command. Returns the
+        # metadata for each package (None if not found).
+        pending = [
+            name for name in package_names if not self.executor.has(self.query_package, name)
+        ]
+        command = "dpkg"
+        if self.root != "":
+            command = f"{command} --root {self.root}"
+        for batch, out in self.run_batches(f"{command} -s", pending):
+            stanzas = {}
+            for stanza in self.database.parse(out):
+                package = stanza.get("Package", "")
+                stanzas.setdefault(package, stanza)
+                stanzas.setdefault(f"{package}:{stanza.get('Architecture', '')}", stanza)
+            for name in batch:
+                self.executor.set(self.query_package, name, stanzas.get(name))
+        return {name: self.executor.get(self.query_package, name) for name in package_names}
+
+    def prefetch(self, package_names):
+        # Only worth querying in advance if dpkg needs to be run
+        if not self.database.available():
+            self.query_packages(package_names)
+        # Copyright files are read ahead of processing the packages unless
+        # package information is likely to be cached
+        if self.cache is None:
+            self.executor.prefetch(self.get_metadata_from_file, package_names)
+
+    def get_component_name(self, package_name):
+        # Remove any architecture qualifier
+        return super().get_component_name(package_name.split(":")[0])
+
+    def get_package_key(self, metadata):
+        return (
+            self.get(metadata, "Package").lower().replace("_", "-"),
+            self.get(metadata, "Version"),
+            self.get(metadata, "Architecture"),
+        )
+
+    def get_package_files(self, package_name):
+        metadata = self.executor.get(self.query_package, package_name)
+        if metadata is None:
+            return
+        package = self.get(metadata, "Package")
+        info_directory = f"{self.root}/var/lib/dpkg/info"
+        # Information files of Multi-Arch: same packages include the architecture
+        info_name = f"{package}:{self.get(metadata, 'Architecture')}"
+        if not os.path.exists(f"{info_directory}/{info_name}.list"):
+            info_name = package
+        # MD5 digests of configuration files are stored in the status database.
+        # Obsolete configuration files are flagged and are not included.
+        for conffile in self.get(metadata, "Conffiles").split("\n"):
+            fields = conffile.split()
+            if len(fields) == 2 and len(fields[1]) == 32:
+                yield fields[0], "MD5", fields[1]
+        # MD5 digests of all other files are stored in the md5sums file
+        try:
+            with open(f"{info_directory}/{info_name}.md5sums", errors="replace") as f:
+                for line in f:
+                    fields = line.rstrip("\n").split(None, 1)
+                    if len(fields) == 2:
+                        yield f"/{fields[1]}", "MD5", fields[0]
+            return
+        except OSError:
+            pass
+        # Files of packages without a md5sums file need to be hashed
+        try:
+            with open(f"{info_directory}/{info_name}.list", errors="replace") as f:
+                for line in f:
+                    filename = line.rstrip("\n")
+                    if filename not in ("", "/."):
+                        yield filename, None, None
+        except OSError:
+            if self.debug:
+                print(f"No file information for {package_name}")
+
+    def build_package(self, package_name, metadata):
+        self.sbom_package.initialise()
+        package = self.get(metadata, "Package").lower().replace("_", "-")
+        version = self.get(metadata, "Version")
+        if len(package) == 0:
+            print(f"error with {package_name} processing")
+        self.sbom_package.set_name(package)
+        self.sbom_package.set_version(version)
+        self.sbom_package.set_filesanalysis(False)
+        license_text, copyright = self.executor.get(
+            self.get_metadata_from_file, package_name
+        )
+        license = self.license.find_license(license_text)
+        self.sbom_package.set_licensedeclared(license)
+        self.sbom_package.set_licenseconcluded(license)
+        if license != "NOASSERTION":
+            license_comment = (
+                "This information was automatically extracted from the package."
+            )
+            if license_text != "NOASSERTION" and license != license_text:
+                self.sbom_package.set_licensedeclared("NOASSERTION")
+                license_comment = f"{license_comment} {self.sbom_package.get_name()} declares {license_text} which is not currently a valid SPDX License identifier or expression."
+            if self.license.deprecated(license):
+                license_comment = f"{license_comment} {license} is now deprecated."
+            self.sbom_package.set_licensecomments(license_comment)
+        elif license_text != "NOASSERTION":
+            license_comment = f"{self.sbom_package.get_name()} declares {license_text} which is not currently a valid SPDX License identifier or expression."
+            if self.license.deprecated(license):
+                license_comment = f"{license_comment} {license} is now deprecated."
+            self.sbom_package.set_licensecomments(license_comment)
+        supplier_type, supplier, vendor = self.parse_supplier(
+            self.get(metadata, "Maintainer")
+        )
+        self.sbom_package.set_supplier(supplier_type, supplier)
+        description = self.get(metadata, "Description")
+        if description != "":
+            # Only use synopsis (first line) of description
+            self.sbom_package.set_summary(description.split("\n")[0])
+        if self.get(metadata, "Homepage") != "":
+            self.sbom_package.set_homepage(self.get(metadata, "Homepage"))
+        # Add copyright information
+        if len(copyright) > 0:
+            self.sbom_package.set_copyrighttext(copyright)
+        self.sbom_package.set_purl(
+            self.get_purl(
+                package, version, self.get(metadata, "Architecture"), self.distro
+            )
+        )
+        if vendor is not None:
+            cpe_version = version.replace(":", "\\:")
+            self.sbom_package.set_cpe(
+                f"cpe:2.3:a:{vendor}:{package}:{cpe_version}:*:*:*:*:*:*:*"
+            )
+
     def process_package(self, package_name, parent="-"):
         self.set_namespace(self.system_data.get("id"))
         if self.debug:
             print(f"Process package {package_name}. Parent {parent}")
-        # Check if we have already processed this package
-        if package_name in self.distro_packages:
-            self.sbom_relationship.initialise()
-            self.sbom_relationship.set_relationship(
-                parent.lower(), "DEPENDS_ON", package_name.lower().replace("_", "-")
-            )
-            self.sbom_relationships.append(self.sbom_relationship.get_relationship())
-            return 0
-        self.distro_packages.append(package_name)
-        out = self.dpkg_command(f"-s {package_name}")
+        metadata = self.executor.get(self.query_package, package_name)
         # If package not found, no metadata returned
-        if len(out) > 0:
-            self.metadata = {}
-            for line in out:
-                if ":" in line:
-                    entry = line.split(":")
-                    # store all data after keyword
-                    self.metadata[entry[0]] = (
-                        line.split(f"{entry[0]}:", 1)[1].strip().rstrip("\n")
-                    )
-            self.sbom_package.initialise()
-            package = self.get("Package").lower().replace("_", "-")
-            version = self.get("Version")
-            if len(package) == 0:
-                print(f"error with {package_name} processing")
-            self.sbom_package.set_name(package)
-            self.sbom_package.set_version(version)
-            if parent == "-":
+        if metadata is not None:
+            self.set_package(package_name, metadata)
+            package = self.sbom_package.get_name()
+            if parent == "-" or package_name in self.requested:
                 self.sbom_package.set_type("application")
-            self.sbom_package.set_filesanalysis(False)
-            license_text, copyright = self.get_metadata_from_file(package_name)
-            license = self.license.find_license(license_text)
-            self.sbom_package.set_licensedeclared(license)
-            self.sbom_package.set_licenseconcluded(license)
-            if license != "NOASSERTION":
-                license_comment = (
-                    "This information was automatically extracted from the package."
-                )
-                if license_text != "NOASSERTION" and license != license_text:
-                    self.sbom_package.set_licensedeclared("NOASSERTION")
-                    license_comment = f"{license_comment} {self.sbom_package.get_name()} declares {license_text} which is not currently a valid SPDX License identifier or expression."
-                if self.license.deprecated(license):
-                    license_comment = f"{license_comment} {license} is now deprecated."
-                self.sbom_package.set_licensecomments(license_comment)
-            elif license_text != "NOASSERTION":
-                license_comment = f"{self.sbom_package.get_name()} declares {license_text} which is not currently a valid SPDX License identifier or expression."
-                if self.license.deprecated(license):
-                    license_comment = f"{license_comment} {license} is now deprecated."
-                self.sbom_package.set_licensecomments(license_comment)
-            supplier = self.get("Maintainer")
-            if len(supplier.split()) > 3:
-                self.sbom_package.set_supplier(
-                    "Organization", self.format_supplier(supplier)
-                )
-            elif len(supplier) > 1:
-                self.sbom_package.set_supplier("Person", self.format_supplier(supplier))
-            else:
-                self.sbom_package.set_supplier("UNKNOWN", "NOASSERTION")
-            if self.get("Description") != "":
-                self.sbom_package.set_summary(self.get("Description"))
-            if self.get("Homepage") != "":
-                self.sbom_package.set_homepage(self.get("Homepage"))
-            # Add copyright information
-            if len(copyright) > 0:
-                self.sbom_package.set_copyrighttext(copyright)
-            self.sbom_package.set_purl(
-                self.get_purl(package, version, self.get("Architecture"), self.distro)
-            )
-            if len(supplier) > 1:
-                component_supplier = self.format_supplier(supplier, include_email=False)
-                cpe_version = version.replace(":", "\\:")
-                self.sbom_package.set_cpe(
-                    f"cpe:2.3:a:{component_supplier.replace(' ', '_').lower()}:{package}:{cpe_version}:*:*:*:*:*:*:*"
-                )
             # Store package data
             self.sbom_packages[
                 (self.sbom_package.get_name(), self.sbom_package.get_value("version"))
@@ -238,27 +324,51 @@ class DpkgBuilder(DistroBuilder):
                     self.parent, "DESCRIBES", package
                 )
             self.sbom_relationships.append(self.sbom_relationship.get_relationship())
+            self.add_files(package_name, package)
             # Remember recommends packages
-            if self.get("Recommends") != "":
-                self.recommends[package] = self.get("Recommends")
+            if self.get(metadata, "Recommends") != "":
+                self.recommends[package] = self.get(metadata, "Recommends")
         elif self.debug:
             print(f"Package {package_name} not found")
-        return len(out) > 0
+        return metadata
 
-    def analyze(self, parent, dependencies):
-        if len(dependencies) == 0:
-            return
-        else:
-            for r in dependencies.split(","):
-                # Remove version string information
-                dependency = r.strip().split(" ")[0].replace(":any", "")
-                if len(dependency) > 0 and self.process_package(dependency, parent):
-                    self.analyze(dependency.strip(), self.get("Depends"))
+    def add_dependency(self, parent, package_name):
+        # Relationship to package which has already been processed
+        self.sbom_relationship.initialise()
+        self.sbom_relationship.set_relationship(
+            parent.lower(), "DEPENDS_ON", package_name.lower().replace("_", "-")
+        )
+        self.sbom_relationships.append(self.sbom_relationship.get_relationship())
+
+    def get_dependencies(self, metadata):
+        dependencies = []
+        for r in self.get(metadata, "Depends").split(","):
+            # Remove version string information
+            dependency = r.strip().split(" ")[0].replace(":any", "")
+            if len(dependency) > 0:
+                dependencies.append(dependency)
+        return self.get(metadata, "Package"), dependencies
+
+    def resolve(self, package_names):
+        # Packages and their dependencies are queried in batches if dpkg needs to be run
+        if not self.database.available():
+            self.graph.resolve(package_names, self.get_dependencies, self.query_packages)
+
+    def analyze(self, package_name, parent="-"):
+        self.resolve([package_name])
+        self.graph.walk(
+            package_name,
+            parent,
+            self.process_package,
+            self.get_dependencies,
+            self.add_dependency,
+            self.prefetch,
+        )
 
     def process_distro_package(self, module_name):
         self.parent = f"{self.name}-{self.release}-Package-{module_name}"
-        if self.process_package(module_name):
-            self.analyze(self.get("Package"), self.get("Depends"))
+        self.analyze(module_name)
+        self.executor.shutdown()
 
     def process_system(self):
         distro_root = self.name.lower().replace("_", "-")
@@ -284,6 +394,25 @@ class DpkgBuilder(DistroBuilder):
         self.sbom_relationship.set_relationship(self.parent, "DESCRIBES", distro_root)
         self.sbom_relationships.append(self.sbom_relationship.get_relationship())
         # Get installed packages
+        installed = self.get_installed()
+        # Only analyse packages which have changed since previous SBOM
+        changed = self.carry_over(installed, distro_root)
+        self.prefetch(changed)
+        for module_name in changed:
+            if self.debug:
+                print(f"Processing... {module_name}")
+            self.analyze(module_name, distro_root)
+        self.executor.shutdown()
+        self.process_recommends()
+
+    def get_installed(self):
+        # Return version of each installed package
+        if self.database.available():
+            return {
+                package_name: self.get(self.database.get_package(package_name), "Version")
+                for package_name in self.database.get_installed()
+            }
+        installed = {}
         out = self.dpkg_command("-l")
         for line in out:
             if line[:2] == "ii":
@@ -291,12 +420,8 @@ class DpkgBuilder(DistroBuilder):
                 line_element = re.sub(" +", " ", line[2:].strip().rstrip("\n")).split(
                     " "
                 )
-                module_name = line_element[0]
-                if self.debug:
-                    print(f"Processing... {module_name}")
-                if self.process_package(module_name, distro_root):
-                    self.analyze(self.get("Package"), self.get("Depends"))
-        self.process_recommends()
+                installed[line_element[0]] = line_element[1]
+        return installed
 
     def process_recommends(self):
         # Add additional dependencies if recommended packages are installed
@@ -306,9 +431,9 @@ class DpkgBuilder(DistroBuilder):
                 # Remove any version string information
                 dependency = r.strip().split(" ")[0].replace(":any", "")
                 if self.debug:
-                    print (f"Check if {dependency} included. {dependency in self.distro_packages}")
+                    print (f"Check if {dependency} included. {self.graph.found(dependency)}")
                 # if dependency installed, then add extra relationship
-                if dependency in self.distro_packages:
+                if self.graph.found(dependency):
                     if self.debug:
                         print (f"Add relationship from {package} to {dependency}")
                     self.sbom_relationship.initialise()
@@ -0,0 +1,84 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+from pathlib import Path
+
+
+class DpkgDatabase:
+    def __init__(self, root=""):
+        self.root = root
+        self.status_file = f"{self.root}/var/lib/dpkg/status"
+        self.packages = {}
+        self.installed = []
+        self.loaded = False
+        self.found = False
+
+    def available(self):
+        self.load()
+        return self.found
+
+    def parse(self, lines):
+        # Split control file data into stanzas separated by blank lines.
+        # Continuation lines (starting with whitespace) are appended to the
+        # previous field separated by a newline.
+        stanza = {}
+        field = None
+        for line in lines:
+            line = line.rstrip("\n")
+            if len(line.strip()) == 0:
+                if len(stanza) > 0:
+                    yield stanza
+                stanza = {}
+                field = None
+            elif line[0] in " \t":
+                if field is not None:
+                    stanza[field] = f"{stanza[field]}\n{line.strip()}"
+            elif ":" in line:
+                field, value = line.split(":", 1)
+                stanza[field] = value.strip()
+        if len(stanza) > 0:
+            yield stanza
+
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        filePath = Path(self.status_file)
+        # Check path exists and is a valid file
+        if not (filePath.exists() and filePath.is_file()):
+            return
+        self.found = True
+        architectures = {}
+        with open(self.status_file, errors="replace") as status_file:
+            for stanza in self.parse(status_file):
+                status = stanza.get("Status", "").split()
+                # Only index packages which are installed
+                if len(status) < 3 or status[2] != "installed":
+                    continue
+                package = stanza.get("Package", "")
+                if len(package) == 0:
+                    continue
+                architecture = stanza.get("Architecture", "")
+                self.packages[f"{package}:{architecture}"] = stanza
+                # First entry for package name is used for unqualified lookups
+                if package not in self.packages:
+                    self.packages[package] = stanza
+                if status[0] == "install":
+                    architectures.setdefault(package, []).append(architecture)
+        # Installed packages are listed in the same order as dpkg -l.
+        # Package names are only qualified by architecture if multiple
+        # architectures of the package are installed.
+        for package in sorted(architectures):
+            if len(architectures[package]) > 1:
+                for architecture in sorted(architectures[package]):
+                    self.installed.append(f"{package}:{architecture}")
+            else:
+                self.installed.append(package)
+
+    def get_package(self, package_name):
+        self.load()
+        return self.packages.get(package_name)
+
+    def get_installed(self):
+        self.load()
+        return self.installed
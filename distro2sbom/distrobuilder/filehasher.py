@@ -0,0 +1,51 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import mmap
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FileHasher:
+    # Digests of installed files which do not have a digest stored in the
+    # package database. Files are memory mapped rather than read into memory
+    # and are hashed concurrently as hashlib releases the GIL whilst hashing.
+    def __init__(self, root="", jobs=None):
+        self.root = root
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def is_file(self, filename):
+        # Only regular files (not links or directories) are hashed
+        try:
+            return stat.S_ISREG(os.lstat(f"{self.root}{filename}").st_mode)
+        except OSError:
+            return False
+
+    def hash_file(self, filename, algorithms):
+        # Returns digest of file for each algorithm (None if file can not be
+        # read). All digests are calculated from a single pass of the file.
+        try:
+            with open(f"{self.root}{filename}", "rb") as data_file:
+                digests = [hashlib.new(algorithm.lower()) for algorithm in algorithms]
+                # Empty files can not be memory mapped
+                if os.fstat(data_file.fileno()).st_size > 0:
+                    with mmap.mmap(
+                        data_file.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as data:
+                        for digest in digests:
+                            digest.update(data)
+                return {
+                    algorithm: digest.hexdigest()
+                    for algorithm, digest in zip(algorithms, digests)
+                }
+        except (OSError, ValueError):
+            return None
+
+    def hash_files(self, files):
+        # Files are specified as filename and algorithms
+        if self.jobs == 1 or len(files) < 2:
+            return [self.hash_file(filename, algorithms) for filename, algorithms in files]
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            return list(pool.map(lambda file: self.hash_file(*file), files))
@@ -3,21 +3,25 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import os
+import string
+from itertools import chain
 
 from lib4sbom.data.package import SBOMPackage
 from lib4sbom.data.relationship import SBOMRelationship
-from lib4sbom.license import LicenseScanner
 
+from distro2sbom.distrobuilder.dependencygraph import DependencyGraph
 from distro2sbom.distrobuilder.distrobuilder import DistroBuilder
+from distro2sbom.distrobuilder.freebsddatabase import FreeBSDDatabase
+from distro2sbom.distrobuilder.licenseresolver import LicenseResolver
 
 
 class FreeBSDBuilder(DistroBuilder):
-    def __init__(self, name, release, debug=False, root=""):
-        super().__init__(debug)
+    def __init__(self, name, release, debug=False, root="", jobs=1):
+        super().__init__(debug, jobs=jobs)
         self.sbom_package = SBOMPackage()
         self.sbom_relationship = SBOMRelationship()
-        self.license = LicenseScanner()
-        self.distro_packages = []
+        self.license = LicenseResolver()
+        self.graph = DependencyGraph()
         self.system_data = self.get_system()
         if name is None and release is None:
             self.name = self.system_data["name"].replace(" ", "-")
@@ -27,12 +31,14 @@ class FreeBSDBuilder(DistroBuilder):
             self.release = release
         self.parent = f"Distro-{self.name}"
         self.root = root
+        self.database = FreeBSDDatabase(self.root)
+        self.package_files = None
 
     def parse_data(self, filename):
         # Process file containing installed applications
-        with open(filename) as dir_file:
-            lines = dir_file.readlines()
-        if len(lines) > 0:
+        lines = self.read_lines(filename)
+        first_line = next(lines, None)
+        if first_line is not None:
             # Something to process
             distro_root = self.name.lower().replace("_", "-")
             self.sbom_package.initialise()
@@ -58,7 +64,7 @@ class FreeBSDBuilder(DistroBuilder):
                 self.parent, "DESCRIBES", distro_root
             )
             self.sbom_relationships.append(self.sbom_relationship.get_relationship())
-            for line in lines:
+            for line in chain([first_line], lines):
                 line_element = line.strip().split()
                 if len(line_element) >= 2:
                     package = line_element[0].lower().replace("_", "-")
@@ -120,82 +126,205 @@ class FreeBSDBuilder(DistroBuilder):
 
         return arch_map.get(arch, arch)
 
-    def get(self, attribute):
-        if attribute in self.metadata:
-            return self.metadata[attribute].lstrip()
-        return ""
-
     def pkg_command(self, command_string):
         command = "pkg"
         if self.root != "":
             command = f"{command} --rootdir {self.root}"
         return self.run_program(f"{command} {command_string}")
 
-    def process_package(self, package_name, parent="-"):
-        if self.debug:
-            print(f"Process package {package_name}. Parent {parent}")
-        # Check if we have already processed this package
-        if package_name in self.distro_packages:
-            self.sbom_relationship.initialise()
-            self.sbom_relationship.set_relationship(
-                parent.lower(), "DEPENDS_ON", package_name.lower().replace("_", "-")
-            )
-            self.sbom_relationships.append(self.sbom_relationship.get_relationship())
-            return 0
-        self.distro_packages.append(package_name)
+    def query_package(self, package_name):
+        # Use package database if available to avoid running pkg
+        if self.database.available():
+            return self.database.get_package(package_name)
         out = self.pkg_command(f"info {package_name}")
-        # If package not found, no metadata returned
-        if len(out) > 0:
-            self.metadata = {}
-            current_key = None
-            for line in out:
-                if ":" in line:
-                    key, value = line.split(":", 1)
-                    current_key = key.strip()
-                    self.metadata[current_key] = value.strip()
-                elif current_key:
-                    self.metadata[current_key] += " " + line.strip()
-            package = self.get("Name").lower().replace("_", "-")
-            version = self.get("Version")
-            if len(package) == 0:
-                print(f"error with {package_name} processing")
-            self.sbom_package.initialise()
-            self.sbom_package.set_name(package)
-            self.sbom_package.set_version(version)
-            if parent == "-":
-                self.sbom_package.set_type("application")
-            self.sbom_package.set_filesanalysis(False)
+        if len(out) == 0:
+            return None
+        metadata = self.parse_info(out)
+        # Dependencies are reported as <name>-<version>
+        dependencies = []
+        for line in self.pkg_command(f"info -d {package_name}"):
+            if line[:1] in " \t" and len(line.strip()) > 0:
+                dependencies.append(line.strip().rsplit("-", 1)[0])
+        metadata["Depends"] = " ".join(dependencies)
+        return metadata
 
-            license = self.get_licenses(package_name)
-            self.sbom_package.set_licensedeclared(license)
-            self.sbom_package.set_licenseconcluded(license)
+    def parse_info(self, lines):
+        metadata = {}
+        current_key = None
+        for line in lines:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                current_key = key.strip()
+                metadata[current_key] = value.strip()
+            elif current_key:
+                metadata[current_key] += " " + line.strip()
+        return metadata
 
-            supplier = self.get("Maintainer")
-            if len(supplier.split()) > 3:
-                self.sbom_package.set_supplier(
-                    "Organization", self.format_supplier(supplier)
+    def split_info(self, lines):
+        # Output for each package starts with a line containing the name and
+        # version of the package followed by the Name field
+        package_lines = []
+        for line in lines:
+            if line[:1] not in " \t" and line.split(":", 1)[0].strip() == "Name":
+                header = None
+                if len(package_lines) > 0 and ":" not in package_lines[-1]:
+                    header = package_lines.pop()
+                while len(package_lines) > 0 and len(package_lines[-1].strip()) == 0:
+                    package_lines.pop()
+                if len(package_lines) > 0:
+                    yield package_lines
+                package_lines = [] if header is None else [header]
+            package_lines.append(line)
+        while len(package_lines) > 0 and len(package_lines[-1].strip()) == 0:
+            package_lines.pop()
+        if len(package_lines) > 0:
+            yield package_lines
+
+    def split_dependencies(self, lines):
+        # Dependencies are reported as <name>-<version> following the
+        # <name>-<version> of each package
+        dependencies = {}
+        current = None
+        for line in lines:
+            if line[:1] in " \t":
+                if current is not None and len(line.strip()) > 0:
+                    current.append(line.strip().rsplit("-", 1)[0])
+            elif len(line.strip()) > 0:
+                current = dependencies.setdefault(
+                    line.strip().rstrip(":").rsplit("-", 1)[0], []
                 )
-            elif len(supplier) > 1:
-                self.sbom_package.set_supplier("Person", self.format_supplier(supplier))
+        return dependencies
+
+    def query_packages(self, package_names):
+        # Query several packages with a single pkg command for the package
+        # information and a single pkg command for the dependencies. Returns
+        # the metadata for each package (None if not found).
+        pending = [
+            name for name in package_names if not self.executor.has(self.query_package, name)
+        ]
+        command = "pkg"
+        if self.root != "":
+            command = f"{command} --rootdir {self.root}"
+        for batch, out in self.run_batches(f"{command} info", pending):
+            packages = {}
+            for package_lines in self.split_info(out):
+                metadata = self.parse_info(package_lines)
+                packages.setdefault(self.get(metadata, "Name"), metadata)
+            if len(batch) == 1 and len(packages) > 0:
+                # Package may not be identified by name (e.g. origin)
+                packages = {batch[0]: next(iter(packages.values()))}
+            dependencies = {}
+            for dependency_batch, dependency_out in self.run_batches(
+                f"{command} info -d", [name for name in batch if name in packages]
+            ):
+                found = self.split_dependencies(dependency_out)
+                if len(dependency_batch) == 1 and len(found) > 0:
+                    found = {dependency_batch[0]: next(iter(found.values()))}
+                dependencies.update(found)
+            for name in batch:
+                metadata = packages.get(name)
+                if metadata is not None:
+                    metadata["Depends"] = " ".join(dependencies.get(name, []))
+                self.executor.set(self.query_package, name, metadata)
+        return {name: self.executor.get(self.query_package, name) for name in package_names}
+
+    def prefetch(self, package_names):
+        # Only worth querying in advance if pkg needs to be run
+        if not self.database.available():
+            self.query_packages(package_names)
+
+    def set_files(self, algorithm=None):
+        super().set_files(algorithm)
+        self.database.include_files = True
+
+    def get_file_digest(self, checksum):
+        # Checksums are stored as <type>$<value>. Type 1 is a hexadecimal
+        # SHA256 digest (older packages do not specify the type).
+        if "$" in checksum:
+            checksum_type, checksum = checksum.split("$", 1)
+            if checksum_type != "1":
+                return None
+        if len(checksum) == 64 and all(c in string.hexdigits for c in checksum):
+            return checksum
+        return None
+
+    def get_package_files(self, package_name):
+        if self.database.available():
+            files = self.database.get_files(package_name)
+        else:
+            if self.package_files is None:
+                # Files of all packages are obtained in a single query
+                self.package_files = {}
+                for line in self.pkg_command("query -a %n|%Fs|%Fp"):
+                    if line.count("|") >= 2:
+                        name, checksum, path = line.split("|", 2)
+                        self.package_files.setdefault(name, []).append((path, checksum))
+            files = self.package_files.get(package_name, [])
+        for path, checksum in files:
+            digest = self.get_file_digest(checksum)
+            if digest is not None:
+                yield path, "SHA256", digest
             else:
-                self.sbom_package.set_supplier("UNKNOWN", "NOASSERTION")
-            if self.get("Comment") != "":
-                self.sbom_package.set_summary(self.get("Comment"))
-            if self.get("WWW") != "":
-                self.sbom_package.set_homepage(self.get("WWW"))
-            arch_component = self.get_arch(self.get("Architecture"))
-            if len(arch_component) > 0:
-                arch_component = f"&arch={arch_component}"
-            self.sbom_package.set_purl(
-                f"pkg:generic/{package}@{version}?distro=freebsd{arch_component}"
+                yield path, None, None
+
+    def get_package_key(self, metadata):
+        return (
+            self.get(metadata, "Name").lower().replace("_", "-"),
+            self.get(metadata, "Version"),
+            self.get(metadata, "Architecture"),
+        )
+
+    def build_package(self, package_name, metadata):
+        package = self.get(metadata, "Name").lower().replace("_", "-")
+        version = self.get(metadata, "Version")
+        if len(package) == 0:
+            print(f"error with {package_name} processing")
+        self.sbom_package.initialise()
+        self.sbom_package.set_name(package)
+        self.sbom_package.set_version(version)
+        self.sbom_package.set_filesanalysis(False)
+
+        if len(metadata.get("Licenses", [])) > 0:
+            license = self.database.get_license_operator(metadata).join(
+                self.translate_license_to_spdx(entry)
+                for entry in metadata["Licenses"]
             )
-            if len(supplier) > 1:
-                component_supplier = "freebsd"
-                # self.format_supplier(supplier, include_email=False)
-                cpe_version = version.replace(":", "\\:")
-                self.sbom_package.set_cpe(
-                    f"cpe:2.3:a:{component_supplier.replace(' ', '_').lower()}:{package}:{cpe_version}:*:*:*:*:*:*:*"
-                )
+        else:
+            license = self.get_licenses(package_name)
+        self.sbom_package.set_licensedeclared(license)
+        self.sbom_package.set_licenseconcluded(license)
+
+        supplier_type, supplier, vendor = self.parse_supplier(
+            self.get(metadata, "Maintainer")
+        )
+        self.sbom_package.set_supplier(supplier_type, supplier)
+        if self.get(metadata, "Comment") != "":
+            self.sbom_package.set_summary(self.get(metadata, "Comment"))
+        if self.get(metadata, "WWW") != "":
+            self.sbom_package.set_homepage(self.get(metadata, "WWW"))
+        arch_component = self.get_arch(self.get(metadata, "Architecture"))
+        if len(arch_component) > 0:
+            arch_component = f"&arch={arch_component}"
+        self.sbom_package.set_purl(
+            f"pkg:generic/{package}@{version}?distro=freebsd{arch_component}"
+        )
+        if vendor is not None:
+            component_supplier = "freebsd"
+            cpe_version = version.replace(":", "\\:")
+            self.sbom_package.set_cpe(
+                f"cpe:2.3:a:{component_supplier}:{package}:{cpe_version}:*:*:*:*:*:*:*"
+            )
+
+    def process_package(self, package_name, parent="-"):
+        if self.debug:
+            print(f"Process package {package_name}. Parent {parent}")
+        metadata = self.executor.get(self.query_package, package_name)
+        # If package not found, no metadata returned
+        if metadata is not None:
+            self.set_package(package_name, metadata)
+            package = self.sbom_package.get_name()
+            if parent == "-" or package_name in self.requested:
+                self.sbom_package.set_type("application")
             # Store package data
             self.sbom_packages[
                 (self.sbom_package.get_name(), self.sbom_package.get_value("version"))
@@ -211,29 +340,52 @@ class FreeBSDBuilder(DistroBuilder):
                     self.parent, "DESCRIBES", package
                 )
             self.sbom_relationships.append(self.sbom_relationship.get_relationship())
+            self.add_files(package_name, package)
         elif self.debug:
             print(f"Package {package_name} not found")
-        return len(out) > 0
+        return metadata
+
+    def add_dependency(self, parent, package_name):
+        # Relationship to package which has already been processed
+        self.sbom_relationship.initialise()
+        self.sbom_relationship.set_relationship(
+            parent.lower(), "DEPENDS_ON", package_name.lower().replace("_", "-")
+        )
+        self.sbom_relationships.append(self.sbom_relationship.get_relationship())
 
-    def analyze(self, parent, dependencies):
-        if not dependencies:
-            return
-        for dependency in dependencies.split():
+    def get_dependencies(self, metadata):
+        dependencies = []
+        for dependency in self.get(metadata, "Depends").split():
             # FreeBSD dependencies might include version requirements, strip them
             dependency = dependency.split(">")[0].split("<")[0].split("=")[0].strip()
-            if dependency and self.process_package(dependency, parent):
-                # Recursively get dependencies for this package
-                sub_dependencies = self.pkg_command(f"info -d {dependency}")
-                self.analyze(dependency, " ".join(sub_dependencies))
+            if dependency:
+                dependencies.append(dependency)
+        return self.get(metadata, "Name"), dependencies
+
+    def resolve(self, package_names):
+        # Packages and their dependencies are queried in batches if pkg needs to be run
+        if not self.database.available():
+            self.graph.resolve(package_names, self.get_dependencies, self.query_packages)
+
+    def analyze(self, package_name, parent="-"):
+        self.resolve([package_name])
+        self.graph.walk(
+            package_name,
+            parent,
+            self.process_package,
+            self.get_dependencies,
+            self.add_dependency,
+            self.prefetch,
+        )
 
     def process_distro_package(self, module_name):
         self.parent = f"{self.name}-{self.release}-Package-{module_name}"
-        if self.process_package(module_name):
-            self.analyze(self.get("Package"), self.get("Depends"))
+        self.analyze(module_name)
+        self.executor.shutdown()
 
     def get_licenses(self, product):
         LICENSE_BASE = "/usr/local/share/licenses/"
-        directory_path = f"{LICENSE_BASE}{product}"
+        directory_path = f"{self.root}{LICENSE_BASE}{product}"
         licenses = []
         ignore = ["LICENSE", "catalog.mk"]
         if os.path.isdir(directory_path):
@@ -293,6 +445,10 @@ class FreeBSDBuilder(DistroBuilder):
             "RUBY": "Ruby",
         }
 
+        # Licenses in the package database use the same names as the map
+        if freebsd_license in license_map:
+            return license_map[freebsd_license]
+
         # Remove common suffixes and convert to uppercase
         cleaned_license = (
             freebsd_license.upper().replace("LICENSE", "").replace(".TXT", "").strip()
@@ -329,14 +485,28 @@ class FreeBSDBuilder(DistroBuilder):
         self.sbom_relationship.set_relationship(self.parent, "DESCRIBES", distro_root)
         self.sbom_relationships.append(self.sbom_relationship.get_relationship())
         # Get installed packages
+        installed = self.get_installed()
+        # Only analyse packages which have changed since previous SBOM
+        changed = self.carry_over(installed, distro_root)
+        self.prefetch(changed)
+        for module_name in changed:
+            if self.debug:
+                print(f"Processing... {module_name}")
+            self.analyze(module_name, distro_root)
+        self.executor.shutdown()
+
+    def get_installed(self):
+        # Return version of each installed package
+        if self.database.available():
+            return {
+                package_name: self.get(self.database.get_package(package_name), "Version")
+                for package_name in self.database.get_installed()
+            }
+        installed = {}
         out = self.pkg_command("query %n:%v")
         for line in out:
             if ":" in line:
                 package_info = line.split(":", 1)
                 if len(package_info) == 2:
-                    module_name = package_info[0].strip()
-                    if self.debug:
-                        print(f"Processing... {module_name}")
-                    if self.process_package(module_name, distro_root):
-                        dependencies = self.pkg_command(f"info -d {module_name}")
-                        self.analyze(module_name, " ".join(dependencies))
+                    installed[package_info[0].strip()] = package_info[1].strip()
+        return installed
@@ -0,0 +1,111 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import sqlite3
+from pathlib import Path
+
+# pkg license logic values
+LICENSE_AND = ord("&")
+
+
+class FreeBSDDatabase:
+    def __init__(self, root=""):
+        self.root = root
+        self.database_file = f"{self.root}/var/db/pkg/local.sqlite"
+        self.packages = {}
+        self.loaded = False
+        self.found = False
+        # Files are only retrieved if requested
+        self.include_files = False
+        self.files = {}
+
+    def available(self):
+        self.load()
+        return self.found
+
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        filePath = Path(self.database_file)
+        # Check path exists and is a valid file
+        if not (filePath.exists() and filePath.is_file()):
+            return
+        try:
+            # Open read only so that package database is never modified
+            connection = sqlite3.connect(
+                f"{filePath.resolve().as_uri()}?mode=ro", uri=True
+            )
+        except sqlite3.Error as e:
+            print(f"[ERROR] Unable to open {self.database_file}: {e}")
+            return
+        try:
+            self.read_packages(connection)
+            self.found = True
+        except sqlite3.Error as e:
+            print(f"[ERROR] Unable to read {self.database_file}: {e}")
+            self.packages = {}
+        finally:
+            connection.close()
+
+    def read_packages(self, connection):
+        package_ids = {}
+        # Attribute names are the same as reported by pkg info
+        for row in connection.execute(
+            "SELECT id, name, version, comment, arch, maintainer, www, licenselogic "
+            "FROM packages ORDER BY name"
+        ):
+            record = {
+                "Name": row[1],
+                "Version": row[2],
+                "Comment": row[3] or "",
+                "Architecture": row[4] or "",
+                "Maintainer": row[5] or "",
+                "WWW": row[6] or "",
+                "Licenses": [],
+                "License Logic": row[7],
+                "Depends": [],
+            }
+            package_ids[row[0]] = record
+            self.packages[record["Name"]] = record
+        for package_id, license in connection.execute(
+            "SELECT pkg_licenses.package_id, licenses.name FROM pkg_licenses "
+            "JOIN licenses ON licenses.id = pkg_licenses.license_id "
+            "ORDER BY licenses.name"
+        ):
+            if package_id in package_ids:
+                package_ids[package_id]["Licenses"].append(license)
+        for package_id, dependency in connection.execute(
+            "SELECT package_id, name FROM deps ORDER BY name"
+        ):
+            if package_id in package_ids:
+                package_ids[package_id]["Depends"].append(dependency)
+        for record in package_ids.values():
+            record["Depends"] = " ".join(record["Depends"])
+        if self.include_files:
+            for package_id, path, checksum in connection.execute(
+                "SELECT package_id, path, sha256 FROM files ORDER BY path"
+            ):
+                if package_id in package_ids:
+                    self.files.setdefault(package_ids[package_id]["Name"], []).append(
+                        (path, checksum or "")
+                    )
+
+    def get_license_operator(self, record):
+        if record.get("License Logic") == LICENSE_AND:
+            return " AND "
+        # Assume licenses are any of.
+        return " OR "
+
+    def get_package(self, package_name):
+        self.load()
+        return self.packages.get(package_name)
+
+    def get_installed(self):
+        self.load()
+        return list(self.packages.keys())
+
+    def get_files(self, package_name):
+        # Returns path and checksum of each file of package
+        self.load()
+        return self.files.get(package_name, [])
@@ -0,0 +1,36 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+from lib4sbom.license import LicenseScanner
+
+
+class LicenseResolver:
+    # Results are cached by license string as many packages declare the
+    # same license. The scanner and results are shared by all resolvers
+    # within a process.
+    scanner = None
+    licenses = {}
+    deprecated_licenses = {}
+
+    def __init__(self):
+        if LicenseResolver.scanner is None:
+            LicenseResolver.scanner = LicenseScanner()
+        self.license = LicenseResolver.scanner
+        self.hits = 0
+        self.misses = 0
+
+    def find_license(self, license_text):
+        if license_text in self.licenses:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.licenses[license_text] = self.license.find_license(license_text)
+        return self.licenses[license_text]
+
+    def deprecated(self, license):
+        if license in self.deprecated_licenses:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.deprecated_licenses[license] = self.license.deprecated(license)
+        return self.deprecated_licenses[license]
@@ -0,0 +1,87 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+CACHE_FILE = "distro2sbom.db"
+# Time (in seconds) to wait for another process to finish updating the cache
+LOCK_TIMEOUT = 60
+# Entries not used within this period (in days) are removed
+MAX_AGE = 30
+
+
+class MetadataCache:
+    def __init__(self, cache_dir, max_age=MAX_AGE):
+        self.max_age = max_age
+        self.cache_file = Path(cache_dir) / CACHE_FILE
+        self.used = []
+        # New entries are written when the cache is closed so that the
+        # database is only locked briefly if shared by several processes
+        self.pending = []
+        self.hits = 0
+        self.misses = 0
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.cache_file), timeout=LOCK_TIMEOUT)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS packages ("
+            "ecosystem TEXT NOT NULL, name TEXT NOT NULL, version TEXT NOT NULL, "
+            "architecture TEXT NOT NULL, digest TEXT NOT NULL, data TEXT NOT NULL, "
+            "last_used INTEGER NOT NULL, "
+            "PRIMARY KEY (ecosystem, name, version, architecture))"
+        )
+        self.connection.commit()
+
+    def digest(self, *items):
+        # Fingerprint of the package database record(s) used to create an entry
+        return hashlib.sha256(
+            json.dumps(items, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, ecosystem, name, version, architecture, digest):
+        key = (ecosystem, name, version, architecture)
+        row = self.connection.execute(
+            "SELECT digest, data FROM packages WHERE ecosystem = ? AND name = ? "
+            "AND version = ? AND architecture = ?",
+            key,
+        ).fetchone()
+        # Entry is invalid if package database record has changed
+        if row is None or row[0] != digest:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used.append(key)
+        return json.loads(row[1])
+
+    def put(self, ecosystem, name, version, architecture, digest, data):
+        self.pending.append(
+            (
+                ecosystem,
+                name,
+                version,
+                architecture,
+                digest,
+                json.dumps(data),
+                int(time.time()),
+            )
+        )
+
+    def close(self):
+        now = int(time.time())
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO packages VALUES (?, ?, ?, ?, ?, ?, ?)", self.pending
+        )
+        self.connection.executemany(
+            "UPDATE packages SET last_used = ? WHERE ecosystem = ? AND name = ? "
+            "AND version = ? AND architecture = ?",
+            [(now, *key) for key in self.used],
+        )
+        # Evict entries which have not been used recently
+        self.connection.execute(
+            "DELETE FROM packages WHERE last_used < ?", (now - self.max_age * 86400,)
+        )
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,82 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+from collections.abc import Mapping
+
+# Attributes whose values are typically the same for many packages
+SHARED_ATTRIBUTES = [
+    "type",
+    "supplier_type",
+    "supplier",
+    "originator_type",
+    "originator",
+    "downloadlocation",
+    "licensedeclared",
+    "licenseconcluded",
+    "licensecomments",
+    "copyrighttext",
+    "homepage",
+]
+
+
+class PackageRecord:
+    # Values of the attributes of a package. The names of the attributes
+    # are shared by all packages with the same set of attributes.
+    __slots__ = ("attributes", "values")
+
+    def __init__(self, attributes, values):
+        self.attributes = attributes
+        self.values = values
+
+
+class PackageStore(Mapping):
+    # Packages (keyed by name and version) stored as compact records rather
+    # than package dictionaries. Values which are repeated across packages
+    # (e.g. supplier, license and NOASSERTION) are only stored once. Package
+    # dictionaries are only created when a package is retrieved so that
+    # they can be generated as the SBOM is output.
+    def __init__(self):
+        self.records = {}
+        self.shared = {}
+
+    def share(self, value):
+        if isinstance(value, str):
+            return self.shared.setdefault(value, value)
+        return value
+
+    def compact(self, value):
+        # Lists are stored as tuples
+        if isinstance(value, list):
+            return tuple(self.compact(element) for element in value)
+        return value
+
+    def expand(self, value):
+        if isinstance(value, tuple):
+            return [self.expand(element) for element in value]
+        return value
+
+    def __setitem__(self, key, package):
+        attributes = tuple(package)
+        self.records[key] = PackageRecord(
+            self.shared.setdefault(attributes, attributes),
+            tuple(
+                self.share(value) if attribute in SHARED_ATTRIBUTES else self.compact(value)
+                for attribute, value in package.items()
+            ),
+        )
+
+    def __getitem__(self, key):
+        record = self.records[key]
+        return {
+            attribute: self.expand(value)
+            for attribute, value in zip(record.attributes, record.values)
+        }
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
@@ -0,0 +1,113 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+from pathlib import Path
+
+import yaml
+from lib4sbom.exception import SBOMParserException
+from lib4sbom.parser import SBOMParser
+
+
+class PreviousSBOM:
+    def __init__(self, filename):
+        self.filename = filename
+        self.packages = []
+        self.relationships = []
+
+    def load(self):
+        filePath = Path(self.filename)
+        # Check path exists and is a valid file
+        if not (filePath.exists() and filePath.is_file()):
+            print(f"[ERROR] Unable to locate file {self.filename}")
+            return False
+        try:
+            with open(self.filename, encoding="utf-8") as sbom_file:
+                sbom_string = sbom_file.read()
+        except (OSError, UnicodeDecodeError):
+            print(f"[ERROR] Unable to read SBOM {self.filename}")
+            return False
+        # Format is identified from the content so that the SBOM can be
+        # reused whatever the name of the file
+        parser = SBOMParser()
+        try:
+            parser.parse_string(sbom_string)
+        except SBOMParserException:
+            print(f"[ERROR] Unable to process SBOM {self.filename}")
+            return False
+        licenses = self.get_spdx_licenses(sbom_string)
+        for package in parser.get_packages():
+            if "version" not in package:
+                continue
+            package = dict(package)
+            # Licenses which are not a single SPDX identifier are not retained
+            # by the parser so use the values from the document
+            if package.get("id") in licenses:
+                concluded, declared = licenses[package["id"]]
+                if concluded is not None:
+                    package["licenseconcluded"] = concluded
+                if declared is not None:
+                    package["licensedeclared"] = declared
+            # Tag value format reports files analysis as text
+            if isinstance(package.get("filesanalysis"), str):
+                package["filesanalysis"] = package["filesanalysis"].lower() == "true"
+            # Identities are reassigned when the SBOM is generated
+            package.pop("bom-ref", None)
+            package["id"] = f'{package["name"]}_{package["version"]}'
+            self.packages.append(package)
+        self.relationships = parser.get_relationships()
+        return True
+
+    def get_format(self, sbom_string):
+        # SBOMs are generated in JSON, YAML or SPDX tag value format
+        if sbom_string.lstrip().startswith("{"):
+            return "json"
+        for line in sbom_string.splitlines():
+            if line.startswith("SPDXVersion:"):
+                return "tag"
+        return "yaml"
+
+    def get_spdx_licenses(self, sbom_string):
+        # Return concluded and declared license of each package in SPDX document
+        licenses = {}
+        sbom_format = self.get_format(sbom_string)
+        if sbom_format != "tag":
+            try:
+                if sbom_format == "json":
+                    document = json.loads(sbom_string)
+                else:
+                    document = yaml.safe_load(sbom_string)
+            except (ValueError, yaml.YAMLError):
+                return licenses
+            if not isinstance(document, dict) or "spdxVersion" not in document:
+                # Not SPDX
+                return licenses
+            for package in document.get("packages", []):
+                licenses[package.get("SPDXID")] = (
+                    package.get("licenseConcluded"),
+                    package.get("licenseDeclared"),
+                )
+            return licenses
+        # Tag value format
+        package_id = None
+        for line in sbom_string.splitlines():
+            if ":" not in line:
+                continue
+            tag, value = line.split(":", 1)
+            value = value.strip()
+            if tag == "PackageName":
+                package_id = None
+            elif tag == "SPDXID":
+                package_id = value
+                licenses[package_id] = (None, None)
+            elif tag == "PackageLicenseConcluded" and package_id is not None:
+                licenses[package_id] = (value, licenses[package_id][1])
+            elif tag == "PackageLicenseDeclared" and package_id is not None:
+                licenses[package_id] = (licenses[package_id][0], value)
+        return licenses
+
+    def get_packages(self):
+        return self.packages
+
+    def get_relationships(self):
+        return self.relationships
@@ -0,0 +1,55 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class QueryExecutor:
+    def __init__(self, jobs=1):
+        self.jobs = max(1, jobs)
+        self.pool = None
+        self.results = {}
+
+    def submit(self, query, item):
+        key = (query, item)
+        if key in self.results:
+            return
+        # Queries are run when the result is requested if only a single job
+        if self.jobs > 1:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.jobs)
+            self.results[key] = self.pool.submit(query, item)
+
+    def prefetch(self, query, items):
+        for item in items:
+            self.submit(query, item)
+
+    def map(self, query, items):
+        # Results of a query for each item in the order of the items
+        if self.jobs == 1 or len(items) < 2:
+            return (query(item) for item in items)
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.jobs)
+        return self.pool.map(query, items)
+
+    def has(self, query, item):
+        return (query, item) in self.results
+
+    def set(self, query, item, result):
+        # Result obtained by a query for several items
+        self.results[(query, item)] = result
+
+    def get(self, query, item):
+        # Results are always returned in the order requested, independent of
+        # the order in which the queries complete.
+        key = (query, item)
+        if key not in self.results:
+            self.results[key] = query(item)
+        elif isinstance(self.results[key], Future):
+            self.results[key] = self.results[key].result()
+        return self.results[key]
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
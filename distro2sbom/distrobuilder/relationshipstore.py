@@ -0,0 +1,71 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+# An element is identified by its name, id and type (package or file)
+SOURCE_ATTRIBUTES = ("source", "source_id", "source_type")
+TARGET_ATTRIBUTES = ("target", "target_id", "target_type")
+# Relationship is stored as a single integer containing the index of the
+# source element, the index of the target element and the index of the type
+TYPE_BITS = 8
+ELEMENT_BITS = 32
+
+
+class RelationshipStore:
+    # Relationships (in lib4sbom format) stored as the indexes of the
+    # source and target elements and type of relationship. Duplicate
+    # relationships are only stored once and relationships are returned
+    # in the order in which they were first added.
+    def __init__(self):
+        self.elements = {}
+        self.element_list = []
+        self.types = {}
+        self.type_list = []
+        self.relationships = {}
+
+    def index(self, indexes, values, value):
+        index = indexes.get(value)
+        if index is None:
+            index = indexes[value] = len(values)
+            values.append(value)
+        return index
+
+    def get_element(self, relationship, attributes):
+        name, id, element_type = attributes
+        return self.index(
+            self.elements,
+            self.element_list,
+            (relationship[name], relationship.get(id), relationship.get(element_type)),
+        )
+
+    def append(self, relationship):
+        source = self.get_element(relationship, SOURCE_ATTRIBUTES)
+        target = self.get_element(relationship, TARGET_ATTRIBUTES)
+        relationship_type = self.index(self.types, self.type_list, relationship["type"])
+        self.relationships[
+            (((source << ELEMENT_BITS) | target) << TYPE_BITS) | relationship_type
+        ] = None
+
+    def get_relationship(self, key):
+        relationship_type = key & ((1 << TYPE_BITS) - 1)
+        key = key >> TYPE_BITS
+        source = self.element_list[key >> ELEMENT_BITS]
+        target = self.element_list[key & ((1 << ELEMENT_BITS) - 1)]
+        relationship = {
+            "source": source[0],
+            "type": self.type_list[relationship_type],
+            "target": target[0],
+            "source_id": source[1],
+            "target_id": target[1],
+        }
+        if source[2] is not None:
+            relationship["source_type"] = source[2]
+        if target[2] is not None:
+            relationship["target_type"] = target[2]
+        return relationship
+
+    def __iter__(self):
+        for key in self.relationships:
+            yield self.get_relationship(key)
+
+    def __len__(self):
+        return len(self.relationships)
@@ -0,0 +1,52 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+from collections import OrderedDict
+
+# Maximum number of generated SBOMs retained. The least recently used SBOM
+# is removed when the limit is reached.
+MAX_RESPONSES = 128
+
+
+class ResponseCache:
+    # Generated SBOMs keyed by the set of installed packages, the package
+    # (if any) and the type and format of SBOM. All of the SBOMs are
+    # invalidated when the set of installed packages changes.
+    def __init__(self, max_responses=MAX_RESPONSES):
+        self.max_responses = max_responses
+        self.fingerprint = None
+        self.responses = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_fingerprint(self, packages):
+        # Fingerprint of the name and version of each installed package
+        digest = hashlib.sha256()
+        for name, version in sorted(packages):
+            digest.update(f"{name}\0{version}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def set_packages(self, packages):
+        # Returns True if the set of installed packages has changed
+        fingerprint = self.get_fingerprint(packages)
+        if fingerprint == self.fingerprint:
+            return False
+        self.fingerprint = fingerprint
+        self.responses.clear()
+        return True
+
+    def get(self, package, sbom_type, bom_format):
+        key = (package, sbom_type, bom_format)
+        response = self.responses.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.responses.move_to_end(key)
+        return response
+
+    def put(self, package, sbom_type, bom_format, response):
+        self.responses[(package, sbom_type, bom_format)] = response
+        if len(self.responses) > self.max_responses:
+            self.responses.popitem(last=False)
@@ -0,0 +1,324 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import sqlite3
+import time
+from pathlib import Path
+
+from distro2sbom.distrobuilder.rpmheader import (
+    RPMTAG_ARCH,
+    RPMTAG_BUILDTIME,
+    RPMTAG_FILEDIGESTALGO,
+    RPMTAG_INSTALLTIME,
+    RPMTAG_LICENSE,
+    RPMTAG_NAME,
+    RPMTAG_PACKAGER,
+    RPMTAG_PROVIDENAME,
+    RPMTAG_RELEASE,
+    RPMTAG_REQUIRENAME,
+    RPMTAG_SIZE,
+    RPMTAG_SUMMARY,
+    RPMTAG_URL,
+    RPMTAG_VENDOR,
+    RPMTAG_VERSION,
+    RpmHeader,
+)
+
+# Package attributes to retrieve for each installed package. Keys match
+# the keywords reported by rpm -qi (spaces are replaced by underscores
+# within the query format).
+RPM_TAGS = {
+    "Name": "NAME",
+    "Version": "VERSION",
+    "Release": "RELEASE",
+    "Architecture": "ARCH",
+    "License": "LICENSE",
+    "Vendor": "VENDOR",
+    "Packager": "PACKAGER",
+    "Summary": "SUMMARY",
+    "URL": "URL",
+    "Build Date": "BUILDTIME:date",
+    "Install Date": "INSTALLTIME:date",
+    "Size": "SIZE",
+}
+
+# Header tags for the same attributes when the database is read directly
+HEADER_TAGS = {
+    "Name": RPMTAG_NAME,
+    "Version": RPMTAG_VERSION,
+    "Release": RPMTAG_RELEASE,
+    "Architecture": RPMTAG_ARCH,
+    "License": RPMTAG_LICENSE,
+    "Vendor": RPMTAG_VENDOR,
+    "Packager": RPMTAG_PACKAGER,
+    "Summary": RPMTAG_SUMMARY,
+    "URL": RPMTAG_URL,
+    "Size": RPMTAG_SIZE,
+}
+HEADER_DATES = {"Build Date": RPMTAG_BUILDTIME, "Install Date": RPMTAG_INSTALLTIME}
+
+# Digest algorithms of files (OpenPGP hash algorithm identifiers). MD5 is
+# used if the algorithm is not specified.
+DIGEST_ALGORITHMS = {
+    "1": "MD5",
+    "2": "SHA1",
+    "8": "SHA256",
+    "9": "SHA384",
+    "10": "SHA512",
+    "11": "SHA224",
+}
+
+# Locations of sqlite package database. Berkeley DB and NDB databases
+# are queried using rpm.
+SQLITE_DATABASES = ["var/lib/rpm/rpmdb.sqlite", "usr/lib/sysimage/rpm/rpmdb.sqlite"]
+
+
+class RpmDatabase:
+    def __init__(self, builder, rpm_options="", root=""):
+        self.builder = builder
+        self.root = root
+        if self.root != "":
+            rpm_options = f"--root {self.root} {rpm_options}"
+        self.rpm_options = rpm_options
+        # Packages are identified by name unless several instances of the
+        # package are installed (e.g. multilib or kernel packages), in which
+        # case each instance is identified by name-version-release.arch
+        self.packages = {}
+        self.names = {}
+        self.duplicates = set()
+        self.provides = {}
+        self.loaded = False
+        self.database_file = None
+        # Files are only retrieved if requested
+        self.include_files = False
+        self.files = {}
+
+    def get_database_file(self):
+        # The database is only read directly if rpm has not been configured
+        # to use a different database
+        if self.root == "" and self.rpm_options != "":
+            return None
+        for database in SQLITE_DATABASES:
+            filePath = Path(f"{self.root}/{database}")
+            # Check path exists and is a valid file
+            if filePath.exists() and filePath.is_file():
+                return filePath
+        return None
+
+    def query_format(self):
+        # No spaces are allowed as command line is split on whitespace
+        query = "".join(
+            f"{key.replace(' ', '_')}\\t%{{{tag}}}\\n" for key, tag in RPM_TAGS.items()
+        )
+        query = f"{query}[Requires\\t%{{REQUIRENAME}}\\n][Provides\\t%{{PROVIDENAME}}\\n]"
+        if self.include_files:
+            query = (
+                f"{query}File_Digest_Algorithm\\t%{{FILEDIGESTALGO}}\\n"
+                "[File\\t%{FILEDIGESTS}\\t%{FILEMODES}\\t%{FILEFLAGS}\\t%{FILENAMES}\\n]"
+            )
+        return query
+
+    def parse(self, lines):
+        record = None
+        for line in lines:
+            if "\t" not in line:
+                continue
+            keyword, value = line.rstrip("\n").split("\t", 1)
+            keyword = keyword.replace("_", " ")
+            if keyword == "Name":
+                # Start of new package
+                if record is not None:
+                    yield record
+                record = {"Requires": [], "Provides": []}
+            if record is None:
+                continue
+            if value == "(none)":
+                # Attribute not specified
+                value = ""
+            if keyword in ["Requires", "Provides"]:
+                record[keyword].append(value)
+            elif keyword == "File":
+                digest, mode, flags, filename = value.split("\t", 3)
+                record.setdefault("Files", []).append(
+                    (filename, digest, int(mode), int(flags))
+                )
+            else:
+                record[keyword] = value
+        if record is not None:
+            yield record
+
+    def get_record(self, header):
+        record = {key: header.get_string(tag) for key, tag in HEADER_TAGS.items()}
+        for key, tag in HEADER_DATES.items():
+            value = header.get(tag)
+            # Same format as the rpm date formatter
+            record[key] = (
+                time.strftime("%c", time.localtime(value[0])) if value else ""
+            )
+        record["Requires"] = header.get_list(RPMTAG_REQUIRENAME)
+        record["Provides"] = header.get_list(RPMTAG_PROVIDENAME)
+        if self.include_files:
+            record["File Digest Algorithm"] = header.get_string(RPMTAG_FILEDIGESTALGO)
+            record["Files"] = header.get_files()
+        return record
+
+    def read_headers(self, connection):
+        # Packages are read in the same order as reported by rpm -qa. An
+        # invalid header raises ValueError.
+        for (blob,) in connection.execute("SELECT blob FROM Packages ORDER BY hnum"):
+            yield RpmHeader(blob)
+
+    def read_database(self):
+        try:
+            # Open read only so that package database is never modified
+            connection = sqlite3.connect(
+                f"{self.database_file.resolve().as_uri()}?mode=ro", uri=True
+            )
+        except sqlite3.Error as e:
+            print(f"[ERROR] Unable to open {self.database_file}: {e}")
+            return None
+        try:
+            return [self.get_record(header) for header in self.read_headers(connection)]
+        except (sqlite3.Error, ValueError) as e:
+            # Packages with invalid headers would be omitted so rpm is used
+            # to query all of the packages
+            print(f"[ERROR] Unable to read {self.database_file}: {e}")
+            return None
+        finally:
+            connection.close()
+
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        records = None
+        self.database_file = self.get_database_file()
+        if self.database_file is not None:
+            records = self.read_database()
+        if records is None:
+            self.database_file = None
+            # Single query to get metadata for all installed packages
+            records = self.parse(
+                self.builder.run_program(
+                    f"rpm {self.rpm_options} -qa --queryformat={self.query_format()}"
+                )
+            )
+        records = list(records)
+        names = set()
+        for record in records:
+            if record["Name"] in names:
+                self.duplicates.add(record["Name"])
+            names.add(record["Name"])
+        for record in records:
+            package_name = self.get_package_name(
+                record["Name"], record["Version"], record["Release"], record["Architecture"]
+            )
+            self.packages[package_name] = record
+            # First instance is used if package is identified by name
+            self.names.setdefault(record["Name"], package_name)
+            if self.include_files:
+                # Files are not part of the package metadata
+                self.files[package_name] = (
+                    record.pop("File Digest Algorithm", ""),
+                    record.pop("Files", []),
+                )
+            for capability in record["Provides"]:
+                # First provider of capability is used
+                if capability not in self.provides:
+                    self.provides[capability] = package_name
+        self.resolve_files()
+        for package_name, record in self.packages.items():
+            record["Depends"] = ",".join(self.get_dependencies(package_name, record))
+
+    def get_package_name(self, name, version, release, architecture):
+        # Same form as used by rpm to identify an installed package
+        if name not in self.duplicates:
+            return name
+        return f"{name}-{version}-{release}.{architecture}"
+
+    def has_duplicates(self, name):
+        return name in self.duplicates
+
+    def resolve_files(self):
+        # File dependencies are not included in the provides of a package
+        # so find the owning packages of all unresolved files.
+        files = set()
+        for record in self.packages.values():
+            for requirement in record["Requires"]:
+                if requirement.startswith("/") and requirement not in self.provides:
+                    files.add(requirement)
+        if self.database_file is not None:
+            self.find_database_owners(files)
+            return
+        # Files are queried in as few rpm commands as possible
+        for batch, out in self.builder.run_batches(
+            f"rpm {self.rpm_options} -qf --queryformat=[%{{FILENAMES}}\\t%{{=NAME}}\\n]",
+            sorted(files),
+        ):
+            self.find_owners(batch, out)
+
+    def find_owners(self, files, out):
+        requested = set(files)
+        for line in out:
+            if "\t" not in line:
+                # File not owned by any package
+                continue
+            filename, package = line.split("\t", 1)
+            if filename in requested and filename not in self.provides:
+                self.provides[filename] = self.names.get(package, package)
+
+    def find_database_owners(self, files):
+        # File lists are only decoded when a file dependency is unresolved
+        if len(files) == 0:
+            return
+        connection = sqlite3.connect(
+            f"{self.database_file.resolve().as_uri()}?mode=ro", uri=True
+        )
+        try:
+            for header in self.read_headers(connection):
+                for filename in header.get_filenames():
+                    if filename in files and filename not in self.provides:
+                        self.provides[filename] = self.get_package_name(
+                            header.get_string(RPMTAG_NAME),
+                            header.get_string(RPMTAG_VERSION),
+                            header.get_string(RPMTAG_RELEASE),
+                            header.get_string(RPMTAG_ARCH),
+                        )
+        except (sqlite3.Error, ValueError) as e:
+            print(f"[ERROR] Unable to read {self.database_file}: {e}")
+        finally:
+            connection.close()
+
+    def get_dependencies(self, package_name, record):
+        dependencies = []
+        for requirement in record["Requires"]:
+            # Ignore rpm internal capabilities
+            if requirement.startswith("rpmlib("):
+                continue
+            dependency = self.provides.get(requirement)
+            if (
+                dependency is not None
+                and dependency != package_name
+                and dependency not in dependencies
+            ):
+                dependencies.append(dependency)
+        return dependencies
+
+    def find_package(self, package_name):
+        # Packages may also be identified by name if several are installed
+        return package_name if package_name in self.packages else self.names.get(package_name)
+
+    def get_package(self, package_name):
+        self.load()
+        return self.packages.get(self.find_package(package_name))
+
+    def get_installed(self):
+        self.load()
+        return list(self.packages.keys())
+
+    def get_files(self, package_name):
+        # Returns digest algorithm and filename, digest, mode and flags of
+        # each file of package
+        self.load()
+        algorithm, files = self.files.get(self.find_package(package_name), ("", []))
+        return DIGEST_ALGORITHMS.get(algorithm or "1"), files
@@ -0,0 +1,140 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import struct
+
+# Header tags
+RPMTAG_NAME = 1000
+RPMTAG_VERSION = 1001
+RPMTAG_RELEASE = 1002
+RPMTAG_EPOCH = 1003
+RPMTAG_SUMMARY = 1004
+RPMTAG_BUILDTIME = 1006
+RPMTAG_INSTALLTIME = 1008
+RPMTAG_SIZE = 1009
+RPMTAG_VENDOR = 1011
+RPMTAG_LICENSE = 1014
+RPMTAG_PACKAGER = 1015
+RPMTAG_URL = 1020
+RPMTAG_ARCH = 1022
+RPMTAG_FILEMODES = 1030
+RPMTAG_FILEDIGESTS = 1035
+RPMTAG_FILEFLAGS = 1037
+RPMTAG_PROVIDENAME = 1047
+RPMTAG_REQUIRENAME = 1049
+RPMTAG_DIRINDEXES = 1116
+RPMTAG_BASENAMES = 1117
+RPMTAG_DIRNAMES = 1118
+RPMTAG_FILEDIGESTALGO = 5011
+
+# Data types
+RPM_CHAR_TYPE = 1
+RPM_INT8_TYPE = 2
+RPM_INT16_TYPE = 3
+RPM_INT32_TYPE = 4
+RPM_INT64_TYPE = 5
+RPM_STRING_TYPE = 6
+RPM_BIN_TYPE = 7
+RPM_STRING_ARRAY_TYPE = 8
+RPM_I18NSTRING_TYPE = 9
+
+INTEGER_FORMATS = {
+    RPM_CHAR_TYPE: "B",
+    RPM_INT8_TYPE: "B",
+    RPM_INT16_TYPE: "H",
+    RPM_INT32_TYPE: "I",
+    RPM_INT64_TYPE: "Q",
+}
+INDEX_ENTRY = struct.Struct(">iIiI")
+
+
+class RpmHeader:
+    # Header blob as stored in the rpm database (a header without the
+    # leading magic): index length and data length followed by the
+    # index entries (tag, type, offset, count) and the data store.
+    def __init__(self, blob):
+        if len(blob) < 8:
+            raise ValueError("Header too short")
+        index_length, data_length = struct.unpack_from(">II", blob)
+        data_start = 8 + index_length * INDEX_ENTRY.size
+        if data_start + data_length > len(blob):
+            raise ValueError("Header truncated")
+        self.data = bytes(blob[data_start : data_start + data_length])
+        self.entries = {}
+        for entry in INDEX_ENTRY.iter_unpack(bytes(blob[8:data_start])):
+            tag, tag_type, offset, count = entry
+            if offset < 0 or offset > data_length:
+                raise ValueError(f"Invalid offset for tag {tag}")
+            # Only the first instance of a tag is used
+            if tag not in self.entries:
+                self.entries[tag] = (tag_type, offset, count)
+
+    def strings(self, offset, count):
+        strings = []
+        for _ in range(count):
+            end = self.data.find(b"\x00", offset)
+            if end < 0:
+                raise ValueError("Unterminated string")
+            strings.append(self.data[offset:end].decode("utf-8", errors="replace"))
+            offset = end + 1
+        return strings
+
+    def get(self, tag):
+        # Returns string, list of strings, list of integers or bytes
+        if tag not in self.entries:
+            return None
+        tag_type, offset, count = self.entries[tag]
+        if tag_type == RPM_STRING_TYPE:
+            return self.strings(offset, 1)[0]
+        elif tag_type in [RPM_STRING_ARRAY_TYPE, RPM_I18NSTRING_TYPE]:
+            return self.strings(offset, count)
+        elif tag_type in INTEGER_FORMATS:
+            integer_format = f">{count}{INTEGER_FORMATS[tag_type]}"
+            if offset + struct.calcsize(integer_format) > len(self.data):
+                raise ValueError(f"Invalid data for tag {tag}")
+            return list(struct.unpack_from(integer_format, self.data, offset))
+        elif tag_type == RPM_BIN_TYPE:
+            return self.data[offset : offset + count]
+        return None
+
+    def get_string(self, tag):
+        # Single value of tag as a string ("" if tag not present)
+        value = self.get(tag)
+        if value is None:
+            return ""
+        if isinstance(value, list):
+            return str(value[0]) if len(value) > 0 else ""
+        return str(value)
+
+    def get_list(self, tag):
+        value = self.get(tag)
+        if value is None:
+            return []
+        if isinstance(value, list):
+            return value
+        return [value]
+
+    def get_filenames(self):
+        dirnames = self.get_list(RPMTAG_DIRNAMES)
+        basenames = self.get_list(RPMTAG_BASENAMES)
+        dirindexes = self.get_list(RPMTAG_DIRINDEXES)
+        return [
+            f"{dirnames[index]}{basename}"
+            for basename, index in zip(basenames, dirindexes)
+            if index < len(dirnames)
+        ]
+
+    def get_files(self):
+        # Returns filename, digest, mode and flags of each file
+        dirnames = self.get_list(RPMTAG_DIRNAMES)
+        return [
+            (f"{dirnames[index]}{basename}", digest, mode, flags)
+            for basename, index, digest, mode, flags in zip(
+                self.get_list(RPMTAG_BASENAMES),
+                self.get_list(RPMTAG_DIRINDEXES),
+                self.get_list(RPMTAG_FILEDIGESTS),
+                self.get_list(RPMTAG_FILEMODES),
+                self.get_list(RPMTAG_FILEFLAGS),
+            )
+            if index < len(dirnames)
+        ]
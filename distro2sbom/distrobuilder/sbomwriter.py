@@ -0,0 +1,256 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import gzip
+import io
+import json
+import sys
+from pathlib import Path
+
+from lib4sbom.generator import SBOMGenerator
+
+from distro2sbom.distrobuilder.distrobuilder import zstandard
+
+# Elements of the SBOM data used to generate the document header. The files,
+# packages and relationships are written incrementally.
+HEADER_ELEMENTS = ["type", "version", "uuid", "bom_version", "property", "document"]
+
+
+class SBOMWriter(SBOMGenerator):
+    # Writes the SBOM to the output as each element is generated rather than
+    # building the complete document (and its serialised form) in memory.
+    # The document header and each element are generated by lib4sbom so the
+    # content is the same as the SBOM produced by the SBOMGenerator.
+    # Internals of the SBOMGenerator are used so the supported versions of
+    # lib4sbom are restricted in requirements.txt.
+    def __init__(self, sbom_type="spdx", format="tag", application="", version=""):
+        super().__init__(
+            sbom_type=sbom_type, format=format, application=application, version=version
+        )
+        self.output = None
+
+    def is_supported(self):
+        # SPDX (tag and JSON) and CycloneDX (JSON) only
+        return not self.generate_spdx3 and self.format in ["tag", "json"]
+
+    def open_output(self, filename):
+        # Output is compressed based on the suffix of the filename. If the
+        # file can't be created, the output is sent to the console.
+        if filename == "":
+            return sys.stdout
+        suffix = Path(filename).suffix.lower()
+        if suffix == ".zst" and zstandard is None:
+            print(f"[ERROR] zstandard module is required to write {filename}")
+            return sys.stdout
+        try:
+            if suffix == ".gz":
+                return gzip.open(filename, "wt", encoding="utf-8")
+            elif suffix == ".zst":
+                return io.TextIOWrapper(
+                    zstandard.ZstdCompressor().stream_writer(open(filename, "wb")),
+                    encoding="utf-8",
+                )
+            return open(filename, "w", encoding="utf-8")
+        except OSError:
+            print(f"[ERROR] Unable to create file {filename}")
+            return sys.stdout
+
+    def write(self, text):
+        self.output.write(text)
+
+    def write_lines(self):
+        # Write (and discard) the tag value lines generated so far
+        for line in self.bom.doc:
+            self.write(f"{line}\n")
+        self.bom.doc = []
+
+    def write_header(self):
+        # Document header without the closing brace
+        self.write(json.dumps(self.bom.doc, indent=2)[:-2])
+
+    def write_list(self, key, items, always=True):
+        # Write members of list as they are generated. The list is omitted
+        # if it is empty unless always is set.
+        count = 0
+        for item in items:
+            if count == 0:
+                self.write(f',\n  "{key}": [')
+            else:
+                self.write(",")
+            self.write("\n    " + json.dumps(item, indent=2).replace("\n", "\n    "))
+            count += 1
+        if count > 0:
+            self.write("\n  ]")
+        elif always:
+            self.write(f',\n  "{key}": []')
+
+    def generate(self, project_name, sbom_data, filename=""):
+        if not self.is_supported():
+            # SPDX 3 and YAML documents are not streamed
+            super().generate(project_name, sbom_data, filename)
+            return
+        if len(sbom_data) == 0:
+            return
+        self.output = self.open_output(filename)
+        self.element_set = {}
+        if project_name == "":
+            project_name = "Default_project"
+        # Header is generated from the document data only
+        header_data = {
+            key: value for key, value in sbom_data.items() if key in HEADER_ELEMENTS
+        }
+        try:
+            if self.sbom_type == "spdx":
+                self._generate_spdx(project_name, header_data)
+                self.write_spdx(sbom_data)
+            else:
+                self._generate_cyclonedx(project_name, header_data)
+                self.write_cyclonedx(sbom_data)
+        finally:
+            if self.output is not sys.stdout:
+                self.output.close()
+
+    def spdx_files(self, sbom_data):
+        project_id = self.bom.SPDX_PROJECT_ID
+        id = 1
+        for file in sbom_data.get("files", {}).values():
+            file_id = file["id"]
+            if file_id == "NOT_DEFINED" or not self._validate_id(file_id):
+                file_id = str(id) + "-" + file["name"]
+            self.bom.generateFileDetails(file["name"], file_id, file, project_id, "CONTAINS")
+            self._save_element(file["name"], file_id)
+            id = id + 1
+            yield file_id
+
+    def spdx_packages(self, sbom_data):
+        project_id = self.bom.SPDX_PROJECT_ID
+        id = 1
+        for package in sbom_data.get("packages", {}).values():
+            if "name" not in package:
+                if self.debug:
+                    print(f"[ERROR] Name missing in {package}")
+                continue
+            product = package["name"]
+            my_id = package.get("id", None)
+            if not self._validate_id(my_id):
+                my_id = f"{id}-{product}"
+            self._save_element(product, my_id, my_id)
+            self.bom.generatePackageDetails(product, my_id, package, project_id, "DESCRIBES")
+            id = id + 1
+            yield my_id
+
+    def spdx_ident(self, relationship, element):
+        ident = self._get_element(relationship[element], relationship[f"{element}_id"])
+        if relationship.get(f"{element}_type") == "file":
+            return self.bom.file_ident(ident)
+        return self.bom.package_ident(ident)
+
+    def spdx_relationships(self, sbom_data):
+        # Duplicate relationships are only written once
+        written = set()
+        for relationship in sbom_data.get("relationships", []):
+            if (
+                relationship["source"] in self.element_set
+                and relationship["target"] in self.element_set
+            ):
+                source_ident = self.spdx_ident(relationship, "source")
+                target_ident = self.spdx_ident(relationship, "target")
+                relationship_type = relationship["type"].strip()
+                key = (source_ident, target_ident, relationship_type)
+                if source_ident == target_ident or key in written:
+                    continue
+                written.add(key)
+                yield {
+                    "spdxElementId": source_ident,
+                    "relatedSpdxElement": target_ident,
+                    "relationshipType": relationship_type,
+                }
+            elif self.debug:
+                print(
+                    "[ERROR] Relationship not copied between",
+                    relationship["source"],
+                    " and ",
+                    relationship["target"],
+                )
+
+    def write_spdx(self, sbom_data):
+        if len(sbom_data.get("licenses", [])) > 0:
+            # User defined licenses are written with the package licenses
+            self.bom.addLicenseDetails(sbom_data["licenses"])
+        if self.format == "tag":
+            self.write_lines()
+            for _ in self.spdx_files(sbom_data):
+                self.write_lines()
+            for _ in self.spdx_packages(sbom_data):
+                self.write_lines()
+            self.bom.generateLicenseDetails()
+            self.bom.generateComment("\n")
+            self.write_lines()
+            for relationship in self.spdx_relationships(sbom_data):
+                self.write(
+                    f"Relationship: {relationship['spdxElementId']} "
+                    f"{relationship['relationshipType']} "
+                    f"{relationship['relatedSpdxElement']}\n"
+                )
+        else:
+            self.write_header()
+            self.write_list(
+                "files",
+                (self.bom.file_component.pop() for _ in self.spdx_files(sbom_data)),
+                always=False,
+            )
+            self.write_list(
+                "packages", (self.bom.component.pop() for _ in self.spdx_packages(sbom_data))
+            )
+            # Licenses are only known once all of the packages are generated
+            self.bom.generateLicenseDetails()
+            self.write_list("hasExtractedLicensingInfos", self.bom.licenses, always=False)
+            self.write_list("relationships", self.spdx_relationships(sbom_data))
+            self.write("\n}\n")
+
+    def cyclonedx_components(self, sbom_data):
+        id = 1
+        for file in sbom_data.get("files", {}).values():
+            my_id = file["id"]
+            if my_id == "NOT_DEFINED":
+                my_id = str(id) + "-" + file["name"]
+            self._save_element(file["name"], my_id)
+            self.bom.generateComponent(my_id, "file", file, sbom_data.get("licenses"))
+            id = id + 1
+            yield self.bom.component.pop()
+        id = 1
+        for package in sbom_data.get("packages", {}).values():
+            product = package["name"]
+            my_id = package.get("bom-ref", None)
+            if my_id is None:
+                my_id = package.get("id", None)
+                if not self._validate_id(my_id):
+                    my_id = f"{id}-{product}"
+            self._save_element(product, my_id, my_id)
+            self.bom.generateComponent(
+                self._get_element(product, my_id),
+                "library",
+                package,
+                sbom_data.get("licenses"),
+            )
+            id = id + 1
+            yield self.bom.component.pop()
+
+    def cyclonedx_dependencies(self, sbom_data):
+        # Dependencies of each component in order of first reference
+        dependencies = {}
+        for relationship in sbom_data.get("relationships", []):
+            parent_id = self._get_element(relationship["source"], relationship["source_id"])
+            package_id = self._get_element(relationship["target"], relationship["target_id"])
+            if parent_id is None or package_id is None or parent_id == package_id:
+                continue
+            depends_on = dependencies.setdefault(parent_id, {})
+            depends_on[package_id] = True
+        for parent_id, depends_on in dependencies.items():
+            yield {"ref": parent_id, "dependsOn": list(depends_on)}
+
+    def write_cyclonedx(self, sbom_data):
+        self.write_header()
+        self.write_list("components", self.cyclonedx_components(sbom_data), always=False)
+        self.write_list("dependencies", self.cyclonedx_dependencies(sbom_data), always=False)
+        self.write("\n}\n")
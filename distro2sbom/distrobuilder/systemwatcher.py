@@ -0,0 +1,79 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+from pathlib import Path
+
+# Package databases which are updated when packages are installed, upgraded
+# or removed. Sqlite databases may be updated through the write ahead log.
+DATABASE_FILES = [
+    "var/lib/dpkg/status",
+    "var/lib/rpm/rpmdb.sqlite",
+    "var/lib/rpm/rpmdb.sqlite-wal",
+    "var/lib/rpm/Packages",
+    "var/lib/rpm/Packages.db",
+    "usr/lib/sysimage/rpm/rpmdb.sqlite",
+    "usr/lib/sysimage/rpm/rpmdb.sqlite-wal",
+    "var/db/pkg/local.sqlite",
+    "var/db/pkg/local.sqlite-wal",
+]
+
+
+class SystemWatcher:
+    # Detects changes to the package database of a system by polling the
+    # modification time and size of the database files. The packages and
+    # relationships of the most recently generated SBOM are retained so
+    # that only the packages which have changed are analysed when the SBOM
+    # is regenerated.
+    def __init__(self, root="", interval=5, debug=False):
+        self.root = Path(root if root != "" else "/")
+        self.interval = interval
+        self.debug = debug
+        self.signature = self.get_signature()
+        self.packages = None
+        self.relationships = None
+
+    def get_signature(self):
+        signature = []
+        for filename in DATABASE_FILES:
+            try:
+                status = (self.root / filename).stat()
+            except OSError:
+                continue
+            signature.append((filename, status.st_mtime_ns, status.st_size))
+        return signature
+
+    def has_changed(self):
+        # Returns True if the database has changed since the last check
+        signature = self.get_signature()
+        if signature == self.signature:
+            return False
+        if self.debug:
+            print("Package database changed")
+        self.signature = signature
+        return True
+
+    def wait(self):
+        # Wait until the database has changed and no further changes have
+        # been made during the polling interval (e.g. whilst an upgrade of
+        # many packages is in progress)
+        changed = False
+        while True:
+            time.sleep(self.interval)
+            if self.has_changed():
+                changed = True
+            elif changed:
+                return
+
+    def set_previous(self, packages, relationships):
+        self.packages = packages
+        self.relationships = relationships
+
+    def has_previous(self):
+        return self.packages is not None
+
+    def get_packages(self):
+        return self.packages.values()
+
+    def get_relationships(self):
+        return self.relationships
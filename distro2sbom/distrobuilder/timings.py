@@ -0,0 +1,73 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import math
+import threading
+import time
+
+
+class Timings:
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.phases = {}
+        self.phase = None
+        self.phase_start = None
+        # Latency of each invocation of an application
+        self.commands = {}
+        self.counts = {}
+        # Commands may be run concurrently
+        self.lock = threading.Lock()
+
+    def start(self, phase):
+        # Starting a phase ends the current phase
+        self.stop()
+        self.phase = phase
+        self.phase_start = time.perf_counter()
+
+    def stop(self):
+        if self.phase is not None:
+            elapsed = time.perf_counter() - self.phase_start
+            self.phases[self.phase] = self.phases.get(self.phase, 0.0) + elapsed
+            self.phase = None
+
+    def record_command(self, command, elapsed):
+        with self.lock:
+            self.commands.setdefault(command, []).append(elapsed)
+
+    def set_count(self, name, value):
+        self.counts[name] = value
+
+    def percentile(self, values, percent):
+        # Nearest rank of sorted values
+        rank = max(math.ceil(percent / 100 * len(values)), 1)
+        return values[rank - 1]
+
+    def get_report(self):
+        commands = {}
+        for command, latencies in sorted(self.commands.items()):
+            latencies = sorted(latencies)
+            commands[command] = {
+                "count": len(latencies),
+                "total": sum(latencies),
+                "min": latencies[0],
+                "mean": sum(latencies) / len(latencies),
+                "median": self.percentile(latencies, 50),
+                "p90": self.percentile(latencies, 90),
+                "p99": self.percentile(latencies, 99),
+                "max": latencies[-1],
+            }
+        return {
+            "elapsed": time.perf_counter() - self.start_time,
+            "phases": self.phases,
+            "subprocesses": {
+                "count": sum(command["count"] for command in commands.values()),
+                "total": sum(command["total"] for command in commands.values()),
+                "commands": commands,
+            },
+            "counts": self.counts,
+        }
+
+    def write(self, filename):
+        with open(filename, "w") as timings_file:
+            json.dump(self.get_report(), timings_file, indent=2)
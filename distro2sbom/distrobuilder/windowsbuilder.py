@@ -3,6 +3,7 @@
 
 import platform
 import re
+from itertools import chain
 
 from lib4sbom.data.package import SBOMPackage
 from lib4sbom.data.relationship import SBOMRelationship
@@ -33,9 +34,9 @@ class WindowsBuilder(DistroBuilder):
         # Process product file
         metadata = {}
         # Files generated on Windows appear to be UTF-16 little endian
-        with open(filename, encoding="utf-16-le") as dir_file:
-            lines = dir_file.readlines()
-        if len(lines) > 0:
+        lines = self.read_lines(filename, encoding="utf-16-le")
+        first_line = next(lines, None)
+        if first_line is not None:
             # Something to process
             distro_root = self.name.lower().replace("_", "-")
             self.sbom_package.initialise()
@@ -57,7 +58,7 @@ class WindowsBuilder(DistroBuilder):
             )
             self.sbom_relationships.append(self.sbom_relationship.get_relationship())
 
-            for line in lines:
+            for line in chain([first_line], lines):
                 # Process non-blank lines
                 processed_line = line.strip().rstrip("\n")
                 if len(processed_line) > 0:
@@ -103,5 +104,9 @@ class WindowsBuilder(DistroBuilder):
     def process_distro_package(self, module_name):
         print("[ERROR] Feature not available")
 
+    def process_distro_packages(self, module_names):
+        print("[ERROR] Feature not available")
+        return list(module_names)
+
     def get_system(self):
         print("[ERROR] Feature not available")
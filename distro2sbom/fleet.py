@@ -0,0 +1,329 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+import yaml
+
+from distro2sbom import cli
+from distro2sbom.version import VERSION
+
+# Fleet processing. Each target within the manifest is processed by the
+# CLI within a pool of worker processes so that the import of modules and
+# the license and supplier caches are shared by the targets processed by
+# each worker.
+
+# Target attributes are the same as the CLI options
+TARGET_OPTIONS = [
+    "distro",
+    "input-file",
+    "name",
+    "release",
+    "package",
+    "package-file",
+    "image",
+    "root",
+    "distro-namespace",
+    "jobs",
+    "previous",
+    "sbom",
+    "format",
+    "product-type",
+    "product-name",
+    "product-version",
+    "product-author",
+    "output-file",
+]
+TARGET_FLAGS = ["system", "stream", "files"]
+
+
+def load_manifest(filename):
+    # Returns list of targets
+    filePath = Path(filename)
+    # Check path exists and is a valid file
+    if not (filePath.exists() and filePath.is_file()):
+        print(f"[ERROR] Unable to locate file {filename}")
+        return None
+    try:
+        with open(filename) as manifest_file:
+            if filePath.suffix.lower() in [".yaml", ".yml"]:
+                manifest = yaml.safe_load(manifest_file)
+            else:
+                manifest = json.load(manifest_file)
+    except (ValueError, yaml.YAMLError):
+        print(f"[ERROR] Unable to process manifest {filename}")
+        return None
+    if isinstance(manifest, dict):
+        manifest = manifest.get("targets")
+    if not isinstance(manifest, list):
+        print(f"[ERROR] Unable to find targets in manifest {filename}")
+        return None
+    targets = []
+    identities = set()
+    for number, target in enumerate(manifest, start=1):
+        if not isinstance(target, dict):
+            print(f"[ERROR] Target {number} is not valid")
+            return None
+        target = dict(target)
+        target["id"] = str(target.get("id", f"target-{number}"))
+        if target["id"] in identities:
+            print(f"[ERROR] Duplicate target {target['id']}")
+            return None
+        identities.add(target["id"])
+        for attribute in target:
+            if attribute not in TARGET_OPTIONS + TARGET_FLAGS + ["id"]:
+                print(f"[ERROR] Invalid attribute {attribute} for target {target['id']}")
+                return None
+        targets.append(target)
+    return targets
+
+
+def get_arguments(target, options):
+    # Convert target to CLI arguments
+    target = dict(target)
+    target.setdefault("sbom", options["sbom"])
+    target.setdefault("format", options["format"])
+    if "output-file" not in target:
+        bom_format = target["format"]
+        if target["sbom"] != "spdx":
+            bom_format = "json"
+        target["output-file"] = str(
+            Path(options["output_dir"]) / f"{target['id']}.{cli.FILE_EXTENSIONS[bom_format]}"
+        )
+    # A root is assumed to contain an installed system
+    if "root" in target and not any(
+        attribute in target for attribute in ["input-file", "package", "package-file", "image"]
+    ):
+        target["system"] = True
+    arguments = ["distro2sbom"]
+    for attribute, value in target.items():
+        if attribute in TARGET_FLAGS:
+            if value:
+                arguments.append(f"--{attribute}")
+        elif attribute in TARGET_OPTIONS:
+            arguments.extend([f"--{attribute}", str(value)])
+    if options["cache_dir"] != "":
+        arguments.extend(["--cache-dir", options["cache_dir"]])
+    return arguments, target["output-file"]
+
+
+def check_target(target):
+    # Returns reason why target can not be processed (None if target is valid)
+    if "root" not in target:
+        return None
+    root = Path(str(target["root"]))
+    if not root.is_dir():
+        return f"Unable to locate root {root}"
+    # Name and release of system are otherwise taken from the os-release file
+    if "name" not in target and "release" not in target:
+        if not (root / "etc" / "os-release").is_file():
+            return f"Unable to locate {root / 'etc' / 'os-release'}. Specify name and release"
+    return None
+
+
+def process_target(target, options):
+    # Runs in worker process
+    arguments, output_file = get_arguments(target, options)
+    reason = check_target(target)
+    if reason is not None:
+        result = {
+            "id": target["id"],
+            "output": output_file,
+            "errors": [f"[ERROR] Target {target['id']}: {reason}"],
+            "elapsed": 0.0,
+            "status": "failed",
+            "timings": None,
+        }
+        if options["debug"]:
+            result["log"] = ""
+        return result
+    descriptor, timings_file = tempfile.mkstemp(suffix=".json")
+    os.close(descriptor)
+    arguments.extend(["--timings", timings_file])
+    result = {"id": target["id"], "output": output_file, "errors": []}
+    # The location of the os-release file of a root
+    root_path = os.environ.get("DISTRO2SBOM_ROOT_PATH")
+    if "root" in target:
+        os.environ["DISTRO2SBOM_ROOT_PATH"] = str(target["root"])
+    output = io.StringIO()
+    errors = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output), redirect_stderr(errors):
+            status = cli.main(arguments)
+    except SystemExit:
+        # Invalid option value reported by argument parser
+        status = -1
+        message = errors.getvalue().strip().splitlines()
+        result["errors"].append(
+            f"[ERROR] {message[-1] if len(message) > 0 else 'Invalid options for target'}"
+        )
+    except Exception as e:
+        status = -1
+        result["errors"].append(f"[ERROR] Target {target['id']}: {type(e).__name__}: {e}")
+    finally:
+        if root_path is None:
+            os.environ.pop("DISTRO2SBOM_ROOT_PATH", None)
+        else:
+            os.environ["DISTRO2SBOM_ROOT_PATH"] = root_path
+    result["elapsed"] = time.perf_counter() - start
+    result["status"] = "ok" if status == 0 else "failed"
+    result["errors"] = [
+        line for line in output.getvalue().splitlines() if line.startswith("[ERROR]")
+    ] + result["errors"]
+    try:
+        with open(timings_file) as timings:
+            result["timings"] = json.load(timings)
+    except ValueError:
+        result["timings"] = None
+    os.remove(timings_file)
+    if options["debug"]:
+        result["log"] = output.getvalue()
+    return result
+
+
+def print_summary(results, elapsed):
+    print(f"{'Target':30} {'Status':8} {'Time (s)':>9} {'Packages':>9}  Output")
+    for result in results:
+        packages = ""
+        if result["timings"] is not None:
+            packages = result["timings"]["counts"].get("packages", "")
+        print(
+            f"{result['id']:30} {result['status']:8} {result['elapsed']:9.2f} "
+            f"{packages:>9}  {result['output'] if result['status'] == 'ok' else ''}"
+        )
+        for error in result["errors"]:
+            print(f"    {error}")
+    failed = len([result for result in results if result["status"] != "ok"])
+    print(f"{len(results)} targets, {failed} failed in {elapsed:.2f} seconds")
+
+
+def main(argv=None):
+    argv = argv or sys.argv
+    app_name = "distro2sbom-fleet"
+    parser = argparse.ArgumentParser(
+        prog=app_name,
+        description=textwrap.dedent(
+            """
+            Distro2Sbom fleet mode generates a Software Bill of Materials for
+            each of the targets specified in a manifest.
+            """
+        ),
+    )
+    input_group = parser.add_argument_group("Input")
+    input_group.add_argument(
+        "-m",
+        "--manifest",
+        action="store",
+        default="",
+        help="manifest (JSON or YAML) of targets",
+    )
+    input_group.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of targets to process concurrently (default: number of CPUs)",
+    )
+    input_group.add_argument(
+        "--cache-dir",
+        action="store",
+        default="",
+        help="directory for cache of package metadata shared by all targets",
+    )
+
+    output_group = parser.add_argument_group("Output")
+    output_group.add_argument(
+        "-d",
+        "--debug",
+        action="store_true",
+        default=False,
+        help="add debug information",
+    )
+    output_group.add_argument(
+        "--sbom",
+        action="store",
+        default="spdx",
+        choices=["spdx", "cyclonedx"],
+        help="default type of sbom to generate (default: spdx)",
+    )
+    output_group.add_argument(
+        "--format",
+        action="store",
+        default="tag",
+        choices=["tag", "json", "yaml"],
+        help="default format of software bill of materials (sbom) (default: tag)",
+    )
+    output_group.add_argument(
+        "--output-dir",
+        action="store",
+        default=".",
+        help="directory for generated SBOMs (default: current directory)",
+    )
+    output_group.add_argument(
+        "--report",
+        action="store",
+        default="",
+        help="filename for summary report (JSON)",
+    )
+
+    parser.add_argument("-V", "--version", action="version", version=VERSION)
+
+    args = vars(parser.parse_args(argv[1:]))
+
+    if args["manifest"] == "":
+        print("[ERROR] manifest must be specified.")
+        return -1
+    elif args["jobs"] < 1:
+        print("[ERROR] number of jobs must be at least 1.")
+        return -1
+
+    if args["debug"]:
+        print("Manifest:", args["manifest"])
+        print("Jobs:", args["jobs"])
+        print("Cache directory:", args["cache_dir"])
+        print("SBOM type:", args["sbom"])
+        print("Format:", args["format"])
+        print("Output directory:", args["output_dir"])
+        print("Report file:", args["report"])
+
+    targets = load_manifest(args["manifest"])
+    if targets is None:
+        return -1
+
+    Path(args["output_dir"]).mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=min(args["jobs"], max(len(targets), 1))) as pool:
+        futures = [pool.submit(process_target, target, args) for target in targets]
+        results = []
+        for future in futures:
+            result = future.result()
+            if args["debug"]:
+                print(f"Target {result['id']}")
+                print(result.pop("log"))
+            results.append(result)
+    elapsed = time.perf_counter() - start
+
+    print_summary(results, elapsed)
+    if args["report"] != "":
+        with open(args["report"], "w") as report_file:
+            json.dump({"elapsed": elapsed, "targets": results}, report_file, indent=2)
+
+    if any(result["status"] != "ok" for result in results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,421 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import argparse
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import tempfile
+import textwrap
+import threading
+from collections import ChainMap
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import parse_qs, urlsplit
+
+from distro2sbom import cli
+from distro2sbom.distrobuilder.responsecache import ResponseCache
+from distro2sbom.distrobuilder.systemwatcher import SystemWatcher
+from distro2sbom.version import VERSION
+
+# Server mode. The installed system is analysed when the server is started
+# and the packages and relationships are retained so that only the packages
+# which have changed are analysed when the package database changes.
+# Generated SBOMs are cached until the set of installed packages changes.
+
+CONTENT_TYPES = {
+    "tag": "text/plain",
+    "json": "application/json",
+    "yaml": "application/yaml",
+}
+
+
+class SBOMService:
+    def __init__(self, args, app_name):
+        self.args = args
+        self.app_name = app_name
+        self.distro_type = args["distro"]
+        self.watcher = SystemWatcher(args["root"], debug=args["debug"])
+        self.cache = ResponseCache()
+        self.packages = {}
+        self.relationships = []
+        # Builder used to analyse the system is retained so that package
+        # information is reused for package SBOMs
+        self.builder = None
+        self.installed = set()
+        self.sbom_data = None
+        self.project_name = None
+        self.directory = tempfile.TemporaryDirectory()
+        # Builders are not thread safe so requests are processed in turn
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.directory.cleanup()
+
+    def create_builder(self, args):
+        sbom_build = cli.create_builder(args, self.distro_type)
+        if args["cache_dir"] != "":
+            from distro2sbom.distrobuilder.metadatacache import MetadataCache
+
+            sbom_build.set_cache(MetadataCache(args["cache_dir"]))
+        return sbom_build
+
+    def close_builder(self, sbom_build):
+        if sbom_build.cache is not None:
+            sbom_build.cache.close()
+
+    def refresh(self):
+        # Analyse the system if the package database has changed since the
+        # system was last analysed
+        if self.watcher.has_previous() and not self.watcher.has_changed():
+            return True
+        sbom_build = self.create_builder(self.args)
+        if self.watcher.has_previous():
+            sbom_build.set_previous(
+                self.watcher.get_packages(), self.watcher.get_relationships()
+            )
+        # Retain package information for subsequent package SBOMs
+        sbom_build.reset()
+        sbom_build.process_system()
+        self.close_builder(sbom_build)
+        # Cache is closed once the system has been analysed
+        sbom_build.cache = None
+        packages = sbom_build.get_packages()
+        if len(packages) == 0:
+            print("[ERROR] Unable to find installed packages.")
+            return False
+        relationships = sbom_build.get_relationships()
+        self.watcher.set_previous(packages, relationships)
+        self.packages = packages
+        self.relationships = relationships
+        self.builder = sbom_build
+        self.installed = set()
+        for package_name in sbom_build.get_installed():
+            self.installed.add(package_name)
+            self.installed.add(sbom_build.get_component_name(package_name))
+        if self.cache.set_packages(packages):
+            if self.args["debug"]:
+                print(f"Installed packages changed {self.cache.fingerprint}")
+            self.sbom_data = None
+            self.project_name = sbom_build.get_parent()
+        return True
+
+    def generate(self, project_name, sbom_data, sbom_type, bom_format):
+        output_file = str(Path(self.directory.name) / f"sbom.{bom_format}")
+        cli.write_sbom(
+            self.args.new_child({"sbom": sbom_type, "output_file": output_file}),
+            self.app_name,
+            bom_format,
+            project_name,
+            sbom_data,
+        )
+        try:
+            with open(output_file, "rb") as sbom_file:
+                return sbom_file.read()
+        except OSError:
+            print("[ERROR] Unable to generate SBOM.")
+            return None
+        finally:
+            if os.path.exists(output_file):
+                os.remove(output_file)
+
+    def get_package_sbom(self, package):
+        # Only installed packages are analysed
+        if package not in self.installed:
+            return None, None
+        sbom_build = self.builder
+        sbom_build.reset()
+        sbom_build.process_distro_package(package)
+        if len(sbom_build.get_packages()) == 0:
+            return None, None
+        return sbom_build.get_parent(), cli.create_sbom(
+            self.args,
+            self.args["product_type"],
+            sbom_build.get_packages(),
+            sbom_build.get_relationships(),
+        )
+
+    def get_system_sbom(self):
+        if self.sbom_data is None:
+            self.sbom_data = cli.create_sbom(
+                self.args,
+                "operating-system",
+                self.packages,
+                self.relationships,
+            )
+        return self.project_name, self.sbom_data
+
+    def get_sbom(self, package, sbom_type, bom_format):
+        # Returns HTTP status and SBOM
+        with self.lock:
+            if not self.refresh():
+                return 500, None
+            response = self.cache.get(package, sbom_type, bom_format)
+            if response is not None:
+                return 200, response
+            if package != "":
+                project_name, sbom_data = self.get_package_sbom(package)
+                if sbom_data is None:
+                    print(f"[ERROR] Unable to locate package {package}")
+                    return 404, None
+            else:
+                project_name, sbom_data = self.get_system_sbom()
+            response = self.generate(project_name, sbom_data, sbom_type, bom_format)
+            if response is None:
+                return 500, None
+            self.cache.put(package, sbom_type, bom_format, response)
+            return 200, response
+
+    def get_status(self):
+        with self.lock:
+            return {
+                "version": VERSION,
+                "distro": self.distro_type,
+                "fingerprint": self.cache.fingerprint,
+                "packages": len(self.packages),
+                "cached": len(self.cache.responses),
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+            }
+
+
+class SBOMRequestHandler(BaseHTTPRequestHandler):
+    server_version = f"distro2sbom/{VERSION}"
+
+    def address_string(self):
+        # Clients connected to a Unix socket have no address
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return "local"
+
+    def log_message(self, format, *args):
+        if self.server.service.args["debug"]:
+            super().log_message(format, *args)
+
+    def send_content(self, status, content, content_type="text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def send_message(self, status, message):
+        self.send_content(status, f"{message}\n".encode("utf-8"))
+
+    def do_GET(self):
+        request = urlsplit(self.path)
+        query = {
+            parameter: values[-1] for parameter, values in parse_qs(request.query).items()
+        }
+        if request.path == "/status":
+            self.send_content(
+                200,
+                json.dumps(self.server.service.get_status(), indent=2).encode("utf-8"),
+                CONTENT_TYPES["json"],
+            )
+            return
+        elif request.path != "/sbom":
+            self.send_message(404, f"Unknown resource {request.path}")
+            return
+        sbom_type = query.get("sbom", "spdx")
+        bom_format = query.get("format", "tag")
+        package = query.get("package", "")
+        # Package name is passed to the package manager application
+        if package.startswith("-") or any(c.isspace() for c in package):
+            self.send_message(400, f"Invalid package name {package}")
+            return
+        elif sbom_type not in ["spdx", "cyclonedx"]:
+            self.send_message(400, f"Invalid SBOM type {sbom_type}")
+            return
+        elif bom_format not in CONTENT_TYPES:
+            self.send_message(400, f"Invalid format {bom_format}")
+            return
+        # Ensure format is aligned with type of SBOM
+        if sbom_type != "spdx" and bom_format in ["tag", "yaml"]:
+            # Only json format valid for CycloneDX
+            bom_format = "json"
+        status, response = self.server.service.get_sbom(package, sbom_type, bom_format)
+        if status == 404:
+            self.send_message(status, f"Unable to locate package {package}")
+        elif status != 200:
+            self.send_message(status, "Unable to generate SBOM")
+        else:
+            self.send_content(status, response, CONTENT_TYPES[bom_format])
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(args, service):
+    if args["socket"] != "":
+        socket_path = Path(args["socket"])
+        # Remove socket left by a previous server
+        if socket_path.exists() and stat.S_ISSOCK(socket_path.stat().st_mode):
+            socket_path.unlink()
+        server = UnixHTTPServer(str(socket_path), SBOMRequestHandler)
+    else:
+        server = ThreadingHTTPServer((args["host"], args["port"]), SBOMRequestHandler)
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    argv = argv or sys.argv
+    app_name = "distro2sbom"
+    parser = argparse.ArgumentParser(
+        prog="distro2sbom-server",
+        description=textwrap.dedent(
+            """
+            Distro2Sbom server mode generates a Software Bill of Materials for
+            the installed system or a package within the installed system on
+            request.
+            """
+        ),
+    )
+    input_group = parser.add_argument_group("Input")
+    input_group.add_argument(
+        "--distro",
+        action="store",
+        default="auto",
+        choices=["rpm", "deb", "freebsd", "auto"],
+        help="type of distribution (default: auto)",
+    )
+    input_group.add_argument(
+        "-n",
+        "--name",
+        action="store",
+        help="name of distribution",
+    )
+    input_group.add_argument(
+        "-r",
+        "--release",
+        action="store",
+        help="release identity of distribution",
+    )
+    input_group.add_argument(
+        "--root",
+        action="store",
+        default="",
+        help="location of distribution packages",
+    )
+    input_group.add_argument(
+        "--distro-namespace",
+        action="store",
+        default="",
+        help="namespace for distribution",
+    )
+    input_group.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        type=int,
+        default=1,
+        help="number of package queries to run concurrently (default: 1)",
+    )
+    input_group.add_argument(
+        "--cache-dir",
+        action="store",
+        default="",
+        help="directory for cache of package metadata",
+    )
+
+    server_group = parser.add_argument_group("Server")
+    server_group.add_argument(
+        "--host",
+        action="store",
+        default="127.0.0.1",
+        help="address to listen on (default: 127.0.0.1)",
+    )
+    server_group.add_argument(
+        "--port",
+        action="store",
+        type=int,
+        default=8080,
+        help="port to listen on (default: 8080)",
+    )
+    server_group.add_argument(
+        "--socket",
+        action="store",
+        default="",
+        help="Unix socket to listen on instead of a port",
+    )
+
+    output_group = parser.add_argument_group("Output")
+    output_group.add_argument(
+        "-d",
+        "--debug",
+        action="store_true",
+        default=False,
+        help="add debug information",
+    )
+
+    parser.add_argument("-V", "--version", action="version", version=VERSION)
+
+    defaults = {
+        "package": "",
+        "package_file": "",
+        "input_file": "",
+        "product_type": "application",
+        "product_name": "",
+        "product_version": "",
+        "product_author": "",
+        "stream": True,
+    }
+    args = ChainMap(vars(parser.parse_args(argv[1:])), defaults)
+
+    if args["jobs"] < 1:
+        print("[ERROR] number of jobs must be at least 1.")
+        return -1
+    elif args["socket"] != "" and not hasattr(socket, "AF_UNIX"):
+        print("[ERROR] Unix socket not supported.")
+        return -1
+
+    if args["debug"]:
+        print("Distro type:", args["distro"])
+        print("Distro name:", args["name"])
+        print("Distro release:", args["release"])
+        print("Distro root:", args["root"])
+        print("Distro namespace:", args["distro_namespace"])
+        print("Jobs:", args["jobs"])
+        print("Cache directory:", args["cache_dir"])
+        print("Host:", args["host"])
+        print("Port:", args["port"])
+        print("Socket:", args["socket"])
+
+    distro_type = cli.get_distro_type(args)
+    if distro_type is None:
+        return -1
+    service = SBOMService(args.new_child({"distro": distro_type}), app_name)
+    try:
+        # Analyse system before accepting requests
+        if not service.refresh():
+            return -1
+        try:
+            server = create_server(args, service)
+        except OSError as e:
+            print(f"[ERROR] Unable to start server: {e}")
+            return -1
+        # Server is stopped when terminated as well as when interrupted
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        if args["debug"]:
+            print(f"Listening on {args['socket'] or (args['host'], args['port'])}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if args["socket"] != "" and os.path.exists(args["socket"]):
+                os.remove(args["socket"])
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -43,6 +43,8 @@ setup_kwargs = dict(
     entry_points={
         "console_scripts": [
             "distro2sbom = distro2sbom.cli:main",
+            "distro2sbom-fleet = distro2sbom.fleet:main",
+            "distro2sbom-server = distro2sbom.server:main",
         ],
     },
 )
@@ -0,0 +1,247 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+# Generates the package database fixtures used by the tests.
+#
+# Run from the root of the repository
+#   python test/fixtures/make_fixtures.py
+#
+# rpm/var/lib/rpm/rpmdb.sqlite contains headers built in the same layout as
+# rpm (index entries sorted by tag with the immutable region entry first
+# and the region trailer at the end of the data store).
+# freebsd/var/db/pkg/local.sqlite contains the pkg tables which are read.
+
+import sqlite3
+import struct
+from pathlib import Path
+
+FIXTURES = Path(__file__).resolve().parent
+
+RPMTAG_HEADERIMMUTABLE = 63
+BIN_TYPE = 7
+# Tag type and alignment of data
+TYPES = {
+    "int16": (3, 2, "H"),
+    "int32": (4, 4, "I"),
+    "string": (6, 1, None),
+    "string_array": (8, 1, None),
+    "i18nstring": (9, 1, None),
+}
+
+RPM_PACKAGES = [
+    [
+        (1000, "string", "bash"),
+        (1001, "string", "5.1.8"),
+        (1002, "string", "6.el9"),
+        (1004, "i18nstring", ["The GNU Bourne Again shell"]),
+        (1006, "int32", [1668506400]),
+        (1008, "int32", [1668592800]),
+        (1009, "int32", [7738634]),
+        (1011, "string", "Rocky Enterprise Software Foundation"),
+        (1014, "string", "GPLv3+"),
+        (1015, "string", "Rocky Linux Build System (Peridot) <releng@rockylinux.org>"),
+        (1020, "string", "https://www.gnu.org/software/bash"),
+        (1022, "string", "x86_64"),
+        (1030, "int16", [0o100755, 0o120777, 0o100644, 0o100644]),
+        (
+            1035,
+            "string_array",
+            [
+                "d8b9be1c6f56a4a0b69be4b5f3e1b0e5b0c1c6a0a3b4d5e6f708192a3b4c5d6e",
+                "",
+                "0d2a6f1d31f2a3c4b5d6e7f8091a2b3c4d5e6f708192a3b4c5d6e7f8091a2b3c",
+                "",
+            ],
+        ),
+        (1037, "int32", [0, 0, 1, 64]),
+        (1047, "string_array", ["bash", "bash(x86-64)", "/bin/sh"]),
+        (
+            1049,
+            "string_array",
+            ["libc.so.6()(64bit)", "/usr/bin/bash", "rpmlib(CompressedFileNames)"],
+        ),
+        (1116, "int32", [0, 0, 1, 2]),
+        (1117, "string_array", ["bash", "sh", "bashrc", "bash.log"]),
+        (1118, "string_array", ["/usr/bin/", "/etc/", "/var/log/"]),
+        (5011, "int32", [8]),
+    ],
+    [
+        (1000, "string", "glibc"),
+        (1001, "string", "2.34"),
+        (1002, "string", "60.el9"),
+        (1004, "i18nstring", ["The GNU libc libraries"]),
+        (1014, "string", "LGPLv2+ and GPLv2+"),
+        (1022, "string", "x86_64"),
+        (1030, "int16", [0o100755]),
+        (1035, "string_array", ["0cc175b9c0f1b6a831c399e269772661"]),
+        (1037, "int32", [0]),
+        (1047, "string_array", ["glibc", "libc.so.6()(64bit)"]),
+        (1049, "string_array", ["/usr/bin/sh", "rpmlib(PayloadIsZstd)"]),
+        (1116, "int32", [0]),
+        (1117, "string_array", ["libc.so.6"]),
+        (1118, "string_array", ["/usr/lib64/"]),
+    ],
+]
+
+
+def rpm_header(tags):
+    index = []
+    data = bytearray()
+    for tag, tag_type, value in tags:
+        type_id, alignment, integer_format = TYPES[tag_type]
+        while len(data) % alignment:
+            data.append(0)
+        offset = len(data)
+        if integer_format is not None:
+            data += struct.pack(f">{len(value)}{integer_format}", *value)
+            count = len(value)
+        elif tag_type == "string":
+            data += value.encode("utf-8") + b"\x00"
+            count = 1
+        else:
+            data += b"".join(element.encode("utf-8") + b"\x00" for element in value)
+            count = len(value)
+        index.append(struct.pack(">iIiI", tag, type_id, offset, count))
+    # Region trailer refers back to the start of the index
+    entries = len(index) + 1
+    trailer_offset = len(data)
+    data += struct.pack(">iIiI", RPMTAG_HEADERIMMUTABLE, BIN_TYPE, -entries * 16, 16)
+    index.insert(0, struct.pack(">iIiI", RPMTAG_HEADERIMMUTABLE, BIN_TYPE, trailer_offset, 16))
+    return struct.pack(">II", entries, len(data)) + b"".join(index) + bytes(data)
+
+
+def create_database(filename, schema, rows):
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    if filename.exists():
+        filename.unlink()
+    connection = sqlite3.connect(filename)
+    connection.executescript(schema)
+    for statement, values in rows:
+        connection.execute(statement, values)
+    connection.commit()
+    connection.close()
+
+
+def make_rpm():
+    create_database(
+        FIXTURES / "rpm" / "var" / "lib" / "rpm" / "rpmdb.sqlite",
+        "CREATE TABLE 'Packages' (hnum INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "blob BLOB NOT NULL);",
+        [
+            ("INSERT INTO Packages (blob) VALUES (?)", (rpm_header(tags),))
+            for tags in RPM_PACKAGES
+        ],
+    )
+
+
+def make_freebsd():
+    create_database(
+        FIXTURES / "freebsd" / "var" / "db" / "pkg" / "local.sqlite",
+        """
+        CREATE TABLE packages (id INTEGER PRIMARY KEY, origin TEXT NOT NULL,
+            name TEXT NOT NULL, version TEXT NOT NULL, comment TEXT NOT NULL,
+            desc TEXT NOT NULL, arch TEXT NOT NULL, maintainer TEXT NOT NULL,
+            www TEXT, prefix TEXT NOT NULL, flatsize INTEGER NOT NULL,
+            licenselogic INTEGER NOT NULL);
+        CREATE TABLE deps (origin TEXT NOT NULL, name TEXT NOT NULL,
+            version TEXT NOT NULL, package_id INTEGER REFERENCES packages(id));
+        CREATE TABLE files (path TEXT PRIMARY KEY, sha256 TEXT,
+            package_id INTEGER REFERENCES packages(id));
+        CREATE TABLE licenses (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+        CREATE TABLE pkg_licenses (package_id INTEGER REFERENCES packages(id),
+            license_id INTEGER REFERENCES licenses(id));
+        """,
+        [
+            (
+                "INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    1,
+                    "shells/bash",
+                    "bash",
+                    "5.2.26",
+                    "GNU Project's Bourne Again SHell",
+                    "",
+                    "FreeBSD:14:amd64",
+                    "ehaupt@FreeBSD.org",
+                    "https://www.gnu.org/software/bash/",
+                    "/usr/local",
+                    9437184,
+                    1,
+                ),
+            ),
+            (
+                "INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    2,
+                    "devel/gettext-runtime",
+                    "gettext-runtime",
+                    "0.22.5",
+                    "GNU gettext runtime libraries and programs",
+                    "",
+                    "FreeBSD:14:amd64",
+                    "tijl@FreeBSD.org",
+                    None,
+                    "/usr/local",
+                    1048576,
+                    38,
+                ),
+            ),
+            (
+                "INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    3,
+                    "converters/libiconv",
+                    "libiconv",
+                    "1.17_1",
+                    "Character set conversion library",
+                    "",
+                    "FreeBSD:14:*",
+                    "bapt@FreeBSD.org",
+                    "https://www.gnu.org/software/libiconv/",
+                    "/usr/local",
+                    2097152,
+                    1,
+                ),
+            ),
+            ("INSERT INTO licenses VALUES (?, ?)", (1, "GPLv3+")),
+            ("INSERT INTO licenses VALUES (?, ?)", (2, "LGPL21")),
+            ("INSERT INTO licenses VALUES (?, ?)", (3, "GPLv3")),
+            ("INSERT INTO pkg_licenses VALUES (?, ?)", (1, 1)),
+            ("INSERT INTO pkg_licenses VALUES (?, ?)", (2, 2)),
+            ("INSERT INTO pkg_licenses VALUES (?, ?)", (2, 3)),
+            ("INSERT INTO pkg_licenses VALUES (?, ?)", (3, 2)),
+            (
+                "INSERT INTO deps VALUES (?, ?, ?, ?)",
+                ("devel/gettext-runtime", "gettext-runtime", "0.22.5", 1),
+            ),
+            (
+                "INSERT INTO deps VALUES (?, ?, ?, ?)",
+                ("converters/libiconv", "libiconv", "1.17_1", 2),
+            ),
+            (
+                "INSERT INTO deps VALUES (?, ?, ?, ?)",
+                ("converters/libiconv", "libiconv", "1.17_1", 1),
+            ),
+            (
+                "INSERT INTO files VALUES (?, ?, ?)",
+                (
+                    "/usr/local/bin/bash",
+                    "1$6f9d3c2a8e1b7d4f5a6c3e2b1d0f9e8d7c6b5a4f3e2d1c0b9a8f7e6d5c4b3a2f",
+                    1,
+                ),
+            ),
+            (
+                "INSERT INTO files VALUES (?, ?, ?)",
+                ("/usr/local/bin/rbash", "1$" + "0" * 64, 1),
+            ),
+            (
+                "INSERT INTO files VALUES (?, ?, ?)",
+                ("/usr/local/lib/libintl.so.8", "2$abc", 2),
+            ),
+        ],
+    )
+
+
+if __name__ == "__main__":
+    make_rpm()
+    make_freebsd()
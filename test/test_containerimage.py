@@ -0,0 +1,208 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from distro2sbom.distrobuilder.containerimage import ContainerImage
+
+OS_RELEASE = b'ID=debian\nVERSION_ID="12"\n'
+STATUS = b"Package: bash\nStatus: install ok installed\nVersion: 5.2.15-2+b2\n"
+UPDATED_STATUS = STATUS + b"\nPackage: zlib1g\nStatus: install ok installed\n"
+
+# Contents of each layer as (name, data or None for a directory, link target)
+BASE_LAYER = [
+    ("etc/os-release", OS_RELEASE, None),
+    ("var/lib/dpkg/status", STATUS, None),
+    ("usr/bin/bash", b"\x7fELF", None),
+    ("usr/share/doc/bash/copyright", b"bash copyright", None),
+    ("usr/share/doc/bash/changelog.gz", b"changes", None),
+    ("usr/share/doc/zlib1g/copyright", b"zlib copyright", None),
+    ("var/db/pkg/local.sqlite", b"old", None),
+    ("var/db/pkg/repo.sqlite", b"repo", None),
+    ("../outside", b"outside", None),
+]
+UPPER_LAYER = [
+    ("var/lib/dpkg/status", UPDATED_STATUS, None),
+    ("usr/share/doc/.wh.zlib1g", b"", None),
+    ("usr/bin/.wh.bash", b"", None),
+    ("var/db/pkg/.wh..wh..opq", b"", None),
+    ("var/db/pkg/local.sqlite", b"new", None),
+    ("usr/share/doc/libc6", None, None),
+    ("usr/share/doc/libc6/copyright", b"libc copyright", None),
+    ("usr/share/doc/libc6-dev", None, "/usr/share/doc/libc6"),
+    ("usr/lib/os-release", None, "../../etc/os-release"),
+]
+
+
+def create_layer(members, compress=False):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w") as layer:
+        for name, content, link in members:
+            info = tarfile.TarInfo(name)
+            if link is not None:
+                info.type = tarfile.SYMTYPE
+                info.linkname = link
+                layer.addfile(info)
+            elif content is None:
+                info.type = tarfile.DIRTYPE
+                layer.addfile(info)
+            else:
+                info.size = len(content)
+                layer.addfile(info, io.BytesIO(content))
+    layer_data = data.getvalue()
+    diff_id = f"sha256:{hashlib.sha256(layer_data).hexdigest()}"
+    return (gzip.compress(layer_data) if compress else layer_data), diff_id
+
+
+def add_file(archive, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    archive.addfile(info, io.BytesIO(data))
+
+
+def create_docker_image(filename, layers):
+    # Image in docker save format
+    config = {"rootfs": {"type": "layers", "diff_ids": []}}
+    manifest = [{"Config": "config.json", "Layers": []}]
+    with tarfile.open(filename, "w") as archive:
+        for number, members in enumerate(layers):
+            layer, diff_id = create_layer(members)
+            add_file(archive, f"layer{number}/layer.tar", layer)
+            manifest[0]["Layers"].append(f"layer{number}/layer.tar")
+            config["rootfs"]["diff_ids"].append(diff_id)
+        add_file(archive, "config.json", json.dumps(config).encode("utf-8"))
+        add_file(archive, "manifest.json", json.dumps(manifest).encode("utf-8"))
+    return filename
+
+
+def create_oci_image(directory, layers):
+    # Image in OCI image layout with compressed layers
+    blobs = directory / "blobs" / "sha256"
+    blobs.mkdir(parents=True)
+
+    def add_blob(data):
+        digest = hashlib.sha256(data).hexdigest()
+        (blobs / digest).write_bytes(data)
+        return {"digest": f"sha256:{digest}", "size": len(data)}
+
+    config = {"rootfs": {"type": "layers", "diff_ids": []}}
+    manifest = {"layers": []}
+    for members in layers:
+        layer, diff_id = create_layer(members, compress=True)
+        manifest["layers"].append(add_blob(layer))
+        config["rootfs"]["diff_ids"].append(diff_id)
+    manifest["config"] = add_blob(json.dumps(config).encode("utf-8"))
+    index = {"manifests": [add_blob(json.dumps(manifest).encode("utf-8"))]}
+    (directory / "index.json").write_text(json.dumps(index))
+    return directory
+
+
+def get_files(root):
+    files = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = Path(directory) / filename
+            files[os.path.relpath(path, root)] = path.read_bytes()
+    return files
+
+
+@pytest.fixture
+def image(tmp_path):
+    return create_docker_image(tmp_path / "image.tar", [BASE_LAYER, UPPER_LAYER])
+
+
+def check_root(root):
+    assert get_files(root) == {
+        "etc/os-release": OS_RELEASE,
+        "usr/lib/os-release": OS_RELEASE,
+        "var/lib/dpkg/status": UPDATED_STATUS,
+        "usr/share/doc/bash/copyright": b"bash copyright",
+        "usr/share/doc/libc6/copyright": b"libc copyright",
+        "var/db/pkg/local.sqlite": b"new",
+    }
+    # Links are resolved within the image
+    assert os.readlink(os.path.join(root, "usr/share/doc/libc6-dev")) == "libc6"
+
+
+def test_extract(image):
+    container = ContainerImage(str(image))
+    try:
+        root = container.extract()
+        # Only package metadata is extracted. Whiteouts and opaque
+        # directories remove the contents of lower layers.
+        check_root(root)
+        assert container.get_distro_type() == "deb"
+        assert container.layers_processed == 2
+        assert container.layers_cached == 0
+    finally:
+        container.close()
+    assert not os.path.exists(root)
+
+
+def test_extract_oci(tmp_path):
+    directory = create_oci_image(tmp_path / "oci", [BASE_LAYER, UPPER_LAYER])
+    container = ContainerImage(str(directory))
+    try:
+        check_root(container.extract())
+    finally:
+        container.close()
+
+
+def test_layer_cache(image, tmp_path):
+    cache_dir = tmp_path / "cache"
+    container = ContainerImage(str(image), cache_dir=str(cache_dir))
+    try:
+        check_root(container.extract())
+        assert container.layers_cached == 0
+    finally:
+        container.close()
+    # Layers are identified by the digest of their uncompressed content so
+    # are shared by images in any format
+    oci = create_oci_image(tmp_path / "oci", [BASE_LAYER, UPPER_LAYER])
+    container = ContainerImage(str(oci), cache_dir=str(cache_dir))
+    try:
+        check_root(container.extract())
+        assert container.layers_processed == 2
+        assert container.layers_cached == 2
+    finally:
+        container.close()
+
+
+def test_layer_cache_version(image, tmp_path):
+    cache_dir = tmp_path / "cache"
+    container = ContainerImage(str(image), cache_dir=str(cache_dir))
+    container.extract()
+    container.close()
+    # Layers cached in a different format are extracted again
+    for layer_file in (cache_dir / "layers").glob("*/layer.json"):
+        contents = json.loads(layer_file.read_text())
+        contents["version"] = 0
+        layer_file.write_text(json.dumps(contents))
+    container = ContainerImage(str(image), cache_dir=str(cache_dir))
+    try:
+        check_root(container.extract())
+        assert container.layers_cached == 0
+    finally:
+        container.close()
+
+
+def test_invalid_image(tmp_path, capsys):
+    invalid = tmp_path / "invalid.tar"
+    invalid.write_bytes(b"not an image")
+    container = ContainerImage(str(invalid))
+    assert container.extract() is None
+    container.close()
+    container = ContainerImage(str(tmp_path / "missing.tar"))
+    assert container.extract() is None
+    container.close()
+    output = capsys.readouterr().out
+    assert f"[ERROR] Unable to process container image {invalid}" in output
+    assert "[ERROR] Unable to locate container image" in output
@@ -0,0 +1,111 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+from distro2sbom.distrobuilder.dependencygraph import DependencyGraph
+
+# Dependencies of each package (missing is not installed)
+PACKAGES = {
+    "app": ["libfoo", "libbar", "missing"],
+    "libfoo": ["libc", "libbar"],
+    "libbar": ["libc"],
+    "libc": ["app"],
+}
+
+
+class Walker:
+    def __init__(self):
+        self.processed = []
+        self.links = []
+        self.prefetched = []
+        self.queries = []
+
+    def process(self, name, parent):
+        self.processed.append((name, parent))
+        if name not in PACKAGES:
+            return None
+        return {"name": name, "depends": PACKAGES[name]}
+
+    def dependencies(self, record):
+        return record["name"], record["depends"]
+
+    def link(self, parent, name):
+        self.links.append((parent, name))
+
+    def prefetch(self, names):
+        self.prefetched.append(names)
+
+    def query(self, names):
+        self.queries.append(names)
+        return {name: self.process(name, "-") for name in names}
+
+
+def test_walk():
+    graph = DependencyGraph()
+    walker = Walker()
+    graph.walk("app", "-", walker.process, walker.dependencies, walker.link)
+    # Depth first in the order the dependencies are listed
+    assert walker.processed == [
+        ("app", "-"),
+        ("libfoo", "app"),
+        ("libc", "libfoo"),
+        ("libbar", "libfoo"),
+        ("missing", "app"),
+    ]
+    # Packages already visited are only linked, including cycles, and only
+    # if they have been found
+    assert walker.links == [("libc", "app"), ("libbar", "libc"), ("app", "libbar")]
+    assert graph.found("libc")
+    assert graph.visited("missing")
+    assert not graph.found("missing")
+    assert graph.get_record("libbar") == {"name": "libbar", "depends": ["libc"]}
+
+
+def test_walk_shared_graph():
+    # Packages visited by a previous walk are not processed again
+    graph = DependencyGraph()
+    walker = Walker()
+    graph.add("libbar", {"name": "libbar", "depends": ["libc"]})
+    graph.add("missing", None)
+    graph.walk("libfoo", "-", walker.process, walker.dependencies, walker.link)
+    assert walker.processed == [("libfoo", "-"), ("libc", "libfoo"), ("app", "libc")]
+    assert walker.links == [
+        ("app", "libfoo"),
+        ("app", "libbar"),
+        ("libfoo", "libbar"),
+    ]
+    walker.processed = []
+    walker.links = []
+    graph.walk("app", "-", walker.process, walker.dependencies, walker.link)
+    assert walker.processed == []
+    assert walker.links == [("-", "app")]
+
+
+def test_walk_prefetch():
+    graph = DependencyGraph()
+    walker = Walker()
+    graph.add("libc", {"name": "libc", "depends": []})
+    graph.walk(
+        "libfoo", "-", walker.process, walker.dependencies, walker.link, walker.prefetch
+    )
+    # Only dependencies which are yet to be visited are prefetched
+    assert walker.prefetched == [["libbar"], []]
+    assert walker.processed == [("libfoo", "-"), ("libbar", "libfoo")]
+
+
+def test_resolve():
+    graph = DependencyGraph()
+    walker = Walker()
+    graph.resolve(["app"], walker.dependencies, walker.query)
+    # Each level is queried together and each package is only queried once
+    assert walker.queries == [["app"], ["libfoo", "libbar", "missing"], ["libc"]]
+    # Resolving does not visit the packages
+    assert not graph.visited("app")
+
+
+def test_resolve_visited():
+    graph = DependencyGraph()
+    walker = Walker()
+    graph.add("libfoo", {"name": "libfoo", "depends": ["libc", "libbar"]})
+    graph.resolve(["libfoo", "libbar"], walker.dependencies, walker.query)
+    # Packages already visited are not queried
+    assert walker.queries == [["libbar"], ["libc"], ["app"], ["missing"]]
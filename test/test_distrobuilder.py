@@ -0,0 +1,193 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import codecs
+import gzip
+import lzma
+import threading
+
+import pytest
+
+from distro2sbom.distrobuilder import distrobuilder
+from distro2sbom.distrobuilder.distrobuilder import DistroBuilder
+
+LINES = ["Package: bash\n", "Description: GNU Bourne Again SHell \u00e9\n"]
+
+
+def create_builder(jobs=1):
+    builder = DistroBuilder(jobs=jobs)
+    commands = []
+    lock = threading.Lock()
+
+    def run_program(command_line):
+        with lock:
+            commands.append(command_line)
+        return command_line.split()[2:]
+
+    builder.run_program = run_program
+    return builder, commands
+
+
+def test_run_batches_jobs():
+    builder, commands = create_builder(jobs=3)
+    packages = [f"pkg{number}" for number in range(7)]
+    batches = list(builder.run_batches("dpkg -s", packages))
+    builder.executor.shutdown()
+    # Results are returned in order, independent of completion order
+    assert batches == [
+        (["pkg0", "pkg1", "pkg2"], ["pkg0", "pkg1", "pkg2"]),
+        (["pkg3", "pkg4", "pkg5"], ["pkg3", "pkg4", "pkg5"]),
+        (["pkg6"], ["pkg6"]),
+    ]
+    assert sorted(commands) == [
+        "dpkg -s pkg0 pkg1 pkg2",
+        "dpkg -s pkg3 pkg4 pkg5",
+        "dpkg -s pkg6",
+    ]
+
+
+def test_run_batches_single_job():
+    builder, commands = create_builder()
+    packages = [f"pkg{number}" for number in range(7)]
+    assert list(builder.run_batches("dpkg -s", packages)) == [(packages, packages)]
+    assert list(builder.run_batches("dpkg -s", [])) == []
+    assert commands == ["dpkg -s " + " ".join(packages)]
+
+
+def test_read_lines(tmp_path):
+    builder = DistroBuilder()
+    text = "".join(LINES).encode("utf-8")
+    plain = tmp_path / "status"
+    plain.write_bytes(text)
+    assert list(builder.read_lines(plain)) == LINES
+    compressed = tmp_path / "status.gz"
+    compressed.write_bytes(gzip.compress(text))
+    assert list(builder.read_lines(compressed)) == LINES
+    compressed = tmp_path / "status.xz"
+    compressed.write_bytes(lzma.compress(text))
+    assert list(builder.read_lines(compressed)) == LINES
+    # Compression is identified by content rather than name of file
+    compressed = tmp_path / "status.txt"
+    compressed.write_bytes(gzip.compress(text))
+    assert list(builder.read_lines(compressed)) == LINES
+
+
+def test_read_lines_concatenated(tmp_path):
+    builder = DistroBuilder()
+    compressed = tmp_path / "status.gz"
+    compressed.write_bytes(
+        gzip.compress(LINES[0].encode("utf-8")) + gzip.compress(LINES[1].encode("utf-8"))
+    )
+    assert list(builder.read_lines(compressed)) == LINES
+    compressed = tmp_path / "status.xz"
+    compressed.write_bytes(
+        lzma.compress(LINES[0].encode("utf-8")) + lzma.compress(LINES[1].encode("utf-8"))
+    )
+    assert list(builder.read_lines(compressed)) == LINES
+
+
+def test_read_lines_zstd(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    builder = DistroBuilder()
+    compressor = zstandard.ZstdCompressor()
+    compressed = tmp_path / "status.zst"
+    compressed.write_bytes(
+        compressor.compress(LINES[0].encode("utf-8"))
+        + compressor.compress(LINES[1].encode("utf-8"))
+    )
+    assert list(builder.read_lines(compressed)) == LINES
+
+
+@pytest.mark.parametrize(
+    "bom, encoding",
+    [
+        (codecs.BOM_UTF8, "utf-8"),
+        (codecs.BOM_UTF16_LE, "utf-16-le"),
+        (codecs.BOM_UTF16_BE, "utf-16-be"),
+    ],
+)
+def test_read_lines_bom(tmp_path, bom, encoding):
+    # Byte order mark is removed and identifies the encoding
+    builder = DistroBuilder()
+    filename = tmp_path / "installed.txt"
+    filename.write_bytes(bom + "".join(LINES).encode(encoding))
+    assert list(builder.read_lines(filename, encoding="latin-1")) == LINES
+    compressed = tmp_path / "installed.txt.gz"
+    compressed.write_bytes(gzip.compress(filename.read_bytes()))
+    assert list(builder.read_lines(compressed)) == LINES
+
+
+def test_read_lines_encoding(tmp_path):
+    # Encoding is used if there is no byte order mark
+    builder = DistroBuilder()
+    filename = tmp_path / "installed.txt"
+    filename.write_bytes("".join(LINES).encode("latin-1"))
+    assert list(builder.read_lines(filename, encoding="latin-1")) == LINES
+
+
+def test_parse_supplier(monkeypatch):
+    monkeypatch.setattr(DistroBuilder, "suppliers", {})
+    builder = DistroBuilder()
+    supplier = "Debian Bash Maintainers <bash@packages.debian.org>"
+    assert builder.parse_supplier(supplier) == (
+        "Organization",
+        "Debian Bash Maintainers (bash@packages.debian.org)",
+        "debian_bash_maintainers",
+    )
+    assert builder.parse_supplier("Jane Doe <jane@example.org>") == (
+        "Person",
+        "Jane Doe (jane@example.org)",
+        "jane_doe",
+    )
+    assert builder.parse_supplier("") == ("UNKNOWN", "NOASSERTION", None)
+
+
+def test_parse_supplier_cached(monkeypatch):
+    monkeypatch.setattr(DistroBuilder, "suppliers", {})
+    supplier = "Debian Bash Maintainers <bash@packages.debian.org>"
+    expected = DistroBuilder().parse_supplier(supplier)
+
+    def format_supplier(supplier_info, include_email=True):
+        raise AssertionError("supplier parsed again")
+
+    # Each supplier is only parsed once and is shared by all builders
+    builder = DistroBuilder()
+    builder.format_supplier = format_supplier
+    assert builder.parse_supplier(supplier) == expected
+    assert list(DistroBuilder.suppliers) == [supplier]
+
+
+def test_run_batches_command_length(monkeypatch):
+    monkeypatch.setattr(distrobuilder, "MAX_COMMAND_LENGTH", 30)
+    builder, commands = create_builder()
+    # Each package adds 5 characters to the command line
+    packages = [f"pkg{number}" for number in range(8)]
+    batches = [batch for batch, _ in builder.run_batches("dpkg -s", packages)]
+    assert batches == [packages[0:4], packages[4:8]]
+    assert commands == ["dpkg -s pkg0 pkg1 pkg2 pkg3", "dpkg -s pkg4 pkg5 pkg6 pkg7"]
+    assert all(len(command) <= 30 for command in commands)
+
+
+def test_run_batches_long_argument(monkeypatch):
+    monkeypatch.setattr(distrobuilder, "MAX_COMMAND_LENGTH", 30)
+    builder, commands = create_builder()
+    # Argument longer than the maximum is still queried on its own
+    packages = ["pkg0", "a" * 40, "pkg2"]
+    batches = [batch for batch, _ in builder.run_batches("dpkg -s", packages)]
+    assert batches == [["pkg0"], ["a" * 40], ["pkg2"]]
+    assert commands[1] == "dpkg -s " + "a" * 40
+
+
+def test_run_batches_jobs_command_length(monkeypatch):
+    monkeypatch.setattr(distrobuilder, "MAX_COMMAND_LENGTH", 30)
+    builder, commands = create_builder(jobs=2)
+    # Batches are limited by the number of jobs
+    packages = [f"pkg{number}" for number in range(6)]
+    batches = [batch for batch, _ in builder.run_batches("dpkg -s", packages)]
+    assert batches == [packages[0:3], packages[3:6]]
+    # and by the length of the command line
+    packages = [f"pkg{number}" for number in range(10)]
+    batches = [batch for batch, _ in builder.run_batches("dpkg -s", packages)]
+    builder.executor.shutdown()
+    assert batches == [packages[0:4], packages[4:8], packages[8:10]]
+    assert all(len(command) <= 30 for command in commands)
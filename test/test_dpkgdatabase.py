@@ -0,0 +1,98 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import pytest
+
+from distro2sbom.distrobuilder.dpkgdatabase import DpkgDatabase
+
+STATUS = """\
+Package: bash
+Status: install ok installed
+Priority: required
+Architecture: amd64
+Version: 5.2.15-2+b2
+Depends: base-files (>= 2.1.12), debianutils (>= 5.6-0.1)
+Description: GNU Bourne Again SHell
+ Bash is an sh-compatible command language interpreter.
+ .
+ Bash can be configured to be POSIX-conformant by default.
+
+Package: libc6
+Status: install ok installed
+Architecture: amd64
+Version: 2.36-9
+
+Package: libc6
+Status: install ok installed
+Architecture: i386
+Version: 2.36-9
+
+Package: vim
+Status: deinstall ok config-files
+Architecture: amd64
+Version: 2:9.0.1378-2
+
+Package: zlib1g
+Status: hold ok installed
+Architecture: amd64
+Version: 1:1.2.13.dfsg-1
+"""
+
+
+@pytest.fixture
+def root(tmp_path):
+    status = tmp_path / "var" / "lib" / "dpkg" / "status"
+    status.parent.mkdir(parents=True)
+    status.write_text(STATUS)
+    return tmp_path
+
+
+def test_parse():
+    database = DpkgDatabase()
+    stanzas = list(database.parse(STATUS.splitlines(keepends=True)))
+    assert len(stanzas) == 5
+    bash = stanzas[0]
+    assert bash["Package"] == "bash"
+    assert bash["Depends"] == "base-files (>= 2.1.12), debianutils (>= 5.6-0.1)"
+    # Continuation lines are appended to the previous field
+    assert bash["Description"] == (
+        "GNU Bourne Again SHell\n"
+        "Bash is an sh-compatible command language interpreter.\n"
+        ".\n"
+        "Bash can be configured to be POSIX-conformant by default."
+    )
+    # Final stanza does not need to be followed by a blank line
+    assert stanzas[4]["Version"] == "1:1.2.13.dfsg-1"
+
+
+def test_parse_blank_lines():
+    database = DpkgDatabase()
+    lines = ["\n", "Package: a\n", "  \n", "\n", "Package: b\n", "Version: 1\n", "\n"]
+    assert list(database.parse(lines)) == [
+        {"Package": "a"},
+        {"Package": "b", "Version": "1"},
+    ]
+
+
+def test_installed(root):
+    database = DpkgDatabase(str(root))
+    assert database.available()
+    # Names are qualified by architecture if multiple architectures are
+    # installed. As for dpkg -l, only packages selected for install (ii)
+    # are listed.
+    assert database.get_installed() == ["bash", "libc6:amd64", "libc6:i386"]
+    assert database.get_package("zlib1g")["Version"] == "1:1.2.13.dfsg-1"
+    assert database.get_package("bash")["Version"] == "5.2.15-2+b2"
+    assert database.get_package("bash:amd64") is database.get_package("bash")
+    # First architecture is used if package name is not qualified
+    assert database.get_package("libc6")["Architecture"] == "amd64"
+    assert database.get_package("libc6:i386")["Architecture"] == "i386"
+    # Packages which are not installed are not indexed
+    assert database.get_package("vim") is None
+
+
+def test_missing_status(tmp_path):
+    database = DpkgDatabase(str(tmp_path))
+    assert not database.available()
+    assert database.get_installed() == []
+    assert database.get_package("bash") is None
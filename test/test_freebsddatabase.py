@@ -0,0 +1,125 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from distro2sbom.distrobuilder.freebsdbuilder import FreeBSDBuilder
+from distro2sbom.distrobuilder.freebsddatabase import FreeBSDDatabase
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+PKG_DATABASE = Path("var") / "db" / "pkg" / "local.sqlite"
+
+BASH_DIGEST = "6f9d3c2a8e1b7d4f5a6c3e2b1d0f9e8d7c6b5a4f3e2d1c0b9a8f7e6d5c4b3a2f"
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "freebsd"
+    shutil.copytree(FIXTURES / "freebsd", root)
+    return root
+
+
+def create_builder(root):
+    return FreeBSDBuilder("FreeBSD", "14.0", root=str(root))
+
+
+def test_read_database(root):
+    database_file = root / PKG_DATABASE
+    modified = database_file.stat().st_mtime_ns
+    database = FreeBSDDatabase(str(root))
+    assert database.available()
+    assert database.get_installed() == ["bash", "gettext-runtime", "libiconv"]
+    bash = database.get_package("bash")
+    assert bash["Version"] == "5.2.26"
+    assert bash["Comment"] == "GNU Project's Bourne Again SHell"
+    assert bash["Architecture"] == "FreeBSD:14:amd64"
+    assert bash["Maintainer"] == "ehaupt@FreeBSD.org"
+    assert bash["WWW"] == "https://www.gnu.org/software/bash/"
+    assert bash["Licenses"] == ["GPLv3+"]
+    # Dependencies are ordered by name
+    assert bash["Depends"] == "gettext-runtime libiconv"
+    gettext = database.get_package("gettext-runtime")
+    assert gettext["WWW"] == ""
+    assert gettext["Licenses"] == ["GPLv3", "LGPL21"]
+    assert gettext["Depends"] == "libiconv"
+    assert database.get_package("libiconv")["Depends"] == ""
+    assert database.get_package("zsh") is None
+    # Files are only read if requested
+    assert database.files == {}
+    # Database is never modified
+    assert database_file.stat().st_mtime_ns == modified
+    assert not os.path.exists(f"{database_file}-journal")
+
+
+def test_license_operator(root):
+    database = FreeBSDDatabase(str(root))
+    assert database.get_license_operator(database.get_package("gettext-runtime")) == " AND "
+    assert database.get_license_operator(database.get_package("bash")) == " OR "
+
+
+def test_missing_database(tmp_path):
+    database = FreeBSDDatabase(str(tmp_path))
+    assert not database.available()
+    assert database.get_installed() == []
+
+
+def test_package_files(root):
+    builder = create_builder(root)
+    builder.set_files()
+    assert list(builder.get_package_files("bash")) == [
+        ("/usr/local/bin/bash", "SHA256", BASH_DIGEST),
+        ("/usr/local/bin/rbash", "SHA256", "0" * 64),
+    ]
+    # Only SHA256 checksums (type 1) are used
+    assert list(builder.get_package_files("gettext-runtime")) == [
+        ("/usr/local/lib/libintl.so.8", None, None)
+    ]
+    assert list(builder.get_package_files("libiconv")) == []
+    assert builder.get_file_digest("2$abc") is None
+    assert builder.get_file_digest(BASH_DIGEST) == BASH_DIGEST
+
+
+def test_process_system(root):
+    builder = create_builder(root)
+    builder.process_system()
+    packages = builder.get_packages()
+    licenses = {
+        name: package["licensedeclared"]
+        for (name, _), package in packages.items()
+        if name != "freebsd"
+    }
+    assert licenses == {
+        "bash": "GPL-3.0-or-later",
+        "gettext-runtime": "GPL-3.0-only AND LGPL-2.1-only",
+        "libiconv": "LGPL-2.1-only",
+    }
+    relationships = {
+        (relationship["source"], relationship["type"], relationship["target"])
+        for relationship in builder.get_relationships()
+    }
+    assert relationships == {
+        ("Distro-FreeBSD", "DESCRIBES", "freebsd"),
+        ("freebsd", "DEPENDS_ON", "bash"),
+        ("freebsd", "DEPENDS_ON", "gettext-runtime"),
+        ("freebsd", "DEPENDS_ON", "libiconv"),
+        ("bash", "DEPENDS_ON", "gettext-runtime"),
+        ("bash", "DEPENDS_ON", "libiconv"),
+        ("gettext-runtime", "DEPENDS_ON", "libiconv"),
+    }
+
+
+def test_process_distro_packages(root):
+    builder = create_builder(root)
+    # Packages which are not installed are returned
+    assert builder.process_distro_packages(["gettext-runtime", "nosuch", "bash"]) == [
+        "nosuch"
+    ]
+    assert sorted(name for name, _ in builder.get_packages()) == [
+        "bash",
+        "gettext-runtime",
+        "libiconv",
+    ]
@@ -0,0 +1,90 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import sqlite3
+import time
+from pathlib import Path
+
+from distro2sbom.distrobuilder.freebsdbuilder import FreeBSDBuilder
+from distro2sbom.distrobuilder.metadatacache import CACHE_FILE, MetadataCache
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+PACKAGE = {"name": "bash", "version": "5.2.26", "licensedeclared": "GPL-3.0-or-later"}
+
+
+def set_last_used(cache_dir, name, last_used):
+    connection = sqlite3.connect(cache_dir / CACHE_FILE)
+    connection.execute("UPDATE packages SET last_used = ? WHERE name = ?", (last_used, name))
+    connection.commit()
+    connection.close()
+
+
+def test_get_put(tmp_path):
+    cache = MetadataCache(tmp_path)
+    digest = cache.digest({"Name": "bash"}, "FreeBSD", "14.0")
+    cache.put("freebsd", "bash", "5.2.26", "amd64", digest, PACKAGE)
+    # Entries are only written when the cache is closed
+    assert cache.get("freebsd", "bash", "5.2.26", "amd64", digest) is None
+    cache.close()
+    cache = MetadataCache(tmp_path)
+    assert cache.get("freebsd", "bash", "5.2.26", "amd64", digest) == PACKAGE
+    # Entry is specific to the ecosystem, version and architecture
+    assert cache.get("rpm", "bash", "5.2.26", "amd64", digest) is None
+    assert cache.get("freebsd", "bash", "5.2.27", "amd64", digest) is None
+    assert cache.get("freebsd", "bash", "5.2.26", "i386", digest) is None
+    assert (cache.hits, cache.misses) == (1, 3)
+    cache.close()
+
+
+def test_digest_invalidation(tmp_path):
+    cache = MetadataCache(tmp_path)
+    digest = cache.digest({"Name": "bash", "License": "GPLv3+"}, "FreeBSD", "14.0")
+    # Digest does not depend on the order of the attributes
+    assert digest == cache.digest({"License": "GPLv3+", "Name": "bash"}, "FreeBSD", "14.0")
+    cache.put("freebsd", "bash", "5.2.26", "amd64", digest, PACKAGE)
+    cache.close()
+    cache = MetadataCache(tmp_path)
+    # Entry is invalid if the package database record has changed
+    changed = cache.digest({"Name": "bash", "License": "GPLv2"}, "FreeBSD", "14.0")
+    assert cache.get("freebsd", "bash", "5.2.26", "amd64", changed) is None
+    # or if the distribution has changed
+    renamed = cache.digest({"Name": "bash", "License": "GPLv3+"}, "FreeBSD", "14.1")
+    assert cache.get("freebsd", "bash", "5.2.26", "amd64", renamed) is None
+    cache.close()
+
+
+def test_eviction(tmp_path):
+    cache = MetadataCache(tmp_path, max_age=30)
+    cache.put("freebsd", "bash", "5.2.26", "amd64", "1", PACKAGE)
+    cache.put("freebsd", "libiconv", "1.17_1", "amd64", "2", {"name": "libiconv"})
+    cache.close()
+    old = int(time.time()) - 31 * 86400
+    set_last_used(tmp_path, "bash", old)
+    set_last_used(tmp_path, "libiconv", old)
+    cache = MetadataCache(tmp_path, max_age=30)
+    # Entries which are used are retained
+    assert cache.get("freebsd", "bash", "5.2.26", "amd64", "1") == PACKAGE
+    cache.close()
+    cache = MetadataCache(tmp_path, max_age=30)
+    assert cache.get("freebsd", "bash", "5.2.26", "amd64", "1") == PACKAGE
+    assert cache.get("freebsd", "libiconv", "1.17_1", "amd64", "2") is None
+    cache.close()
+
+
+def test_builder_cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("DISTRO2SBOM_ROOT_PATH", raising=False)
+    root = str(FIXTURES / "freebsd")
+    builder = FreeBSDBuilder("FreeBSD", "14.0", root=root)
+    cache = MetadataCache(tmp_path / "cache")
+    builder.set_cache(cache)
+    builder.process_system()
+    assert (cache.hits, cache.misses) == (0, 3)
+    cache.close()
+    cached_builder = FreeBSDBuilder("FreeBSD", "14.0", root=root)
+    cache = MetadataCache(tmp_path / "cache")
+    cached_builder.set_cache(cache)
+    cached_builder.process_system()
+    assert (cache.hits, cache.misses) == (3, 0)
+    cache.close()
+    assert dict(cached_builder.get_packages()) == dict(builder.get_packages())
@@ -0,0 +1,67 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+from lib4sbom.data.package import SBOMPackage
+
+from distro2sbom.distrobuilder.packagestore import PackageStore
+
+
+def create_package(name, version, supplier="Debian"):
+    package = SBOMPackage()
+    package.initialise()
+    package.set_name(name)
+    package.set_version(version)
+    package.set_supplier("Organization", supplier)
+    package.set_licensedeclared("GPL-3.0-or-later")
+    package.set_purl(f"pkg:deb/debian/{name}@{version}")
+    return package.get_package()
+
+
+def test_store():
+    store = PackageStore()
+    bash = create_package("bash", "5.2.15")
+    store[("bash", "5.2.15")] = bash
+    # Packages are returned as package dictionaries
+    assert store[("bash", "5.2.15")] == bash
+    assert list(store[("bash", "5.2.15")]) == list(bash)
+    assert ("bash", "5.2.15") in store
+    assert ("bash", "5.2.16") not in store
+    assert len(store) == 1
+
+
+def test_order_and_replace():
+    store = PackageStore()
+    store[("bash", "5.2.15")] = create_package("bash", "5.2.15")
+    store[("zlib", "1.2.13")] = create_package("zlib", "1.2.13")
+    store[("bash", "5.2.15")] = create_package("bash", "5.2.15", supplier="Ubuntu")
+    # Packages are returned in the order first added
+    assert list(store) == [("bash", "5.2.15"), ("zlib", "1.2.13")]
+    assert store[("bash", "5.2.15")]["supplier"] == "Ubuntu"
+    assert dict(store) == {key: store[key] for key in store}
+
+
+def test_shared_values():
+    store = PackageStore()
+    store[("bash", "5.2.15")] = create_package("bash", "5.2.15")
+    store[("zlib", "1.2.13")] = create_package("zlib", "1.2.13")
+    bash = store.records[("bash", "5.2.15")]
+    zlib = store.records[("zlib", "1.2.13")]
+    # Names of attributes and repeated values are only stored once
+    assert bash.attributes is zlib.attributes
+    supplier = bash.attributes.index("supplier")
+    assert bash.values[supplier] is zlib.values[supplier]
+    # Lists are stored as tuples
+    reference = bash.attributes.index("externalreference")
+    assert bash.values[reference] == (
+        ("PACKAGE_MANAGER", "purl", "pkg:deb/debian/bash@5.2.15"),
+    )
+
+
+def test_lists_not_shared():
+    store = PackageStore()
+    store[("bash", "5.2.15")] = create_package("bash", "5.2.15")
+    # Modifying a retrieved package does not change the stored package
+    package = store[("bash", "5.2.15")]
+    package["externalreference"].append(["SECURITY", "cpe23Type", "cpe:2.3:a:gnu:bash"])
+    package["name"] = "dash"
+    assert store[("bash", "5.2.15")] == create_package("bash", "5.2.15")
@@ -0,0 +1,110 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+from pathlib import Path
+
+import pytest
+
+from distro2sbom import cli
+from distro2sbom.distrobuilder.freebsdbuilder import FreeBSDBuilder
+from distro2sbom.distrobuilder.previoussbom import PreviousSBOM
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+ROOT = str(FIXTURES / "freebsd")
+
+
+@pytest.fixture(autouse=True)
+def root_path(monkeypatch):
+    monkeypatch.delenv("DISTRO2SBOM_ROOT_PATH", raising=False)
+
+
+def generate_sbom(filename, sbom_type="spdx", bom_format="tag"):
+    arguments = ["distro2sbom", "--distro", "freebsd", "--system", "--root", ROOT]
+    arguments += ["--name", "FreeBSD", "--release", "14.0", "--sbom", sbom_type]
+    arguments += ["--format", bom_format, "-o", str(filename)]
+    assert cli.main(arguments) == 0
+    return filename
+
+
+def create_builder():
+    return FreeBSDBuilder("FreeBSD", "14.0", root=ROOT)
+
+
+def get_relationships(builder):
+    return {
+        (relationship["source"], relationship["type"], relationship["target"])
+        for relationship in builder.get_relationships()
+    }
+
+
+@pytest.mark.parametrize(
+    "sbom_type, bom_format",
+    [("spdx", "tag"), ("spdx", "json"), ("spdx", "yaml"), ("cyclonedx", "json")],
+)
+def test_load(tmp_path, sbom_type, bom_format):
+    # Format is identified from the content, not the name of the file
+    filename = generate_sbom(tmp_path / "system.sbom", sbom_type, bom_format)
+    previous = PreviousSBOM(str(filename))
+    assert previous.load()
+    packages = {package["name"]: package for package in previous.get_packages()}
+    assert sorted(packages) == ["bash", "freebsd", "gettext-runtime", "libiconv"]
+    assert packages["libiconv"]["version"] == "1.17_1"
+    assert packages["libiconv"]["id"] == "libiconv_1.17_1"
+    relationships = {
+        (relationship["source"], relationship["type"], relationship["target"])
+        for relationship in previous.get_relationships()
+    }
+    assert ("bash", "DEPENDS_ON", "gettext-runtime") in relationships
+    assert ("gettext-runtime", "DEPENDS_ON", "libiconv") in relationships
+
+
+@pytest.mark.parametrize("bom_format", ["tag", "json", "yaml"])
+def test_load_spdx_licenses(tmp_path, bom_format):
+    # License expressions are taken from the document
+    previous = PreviousSBOM(str(generate_sbom(tmp_path / "system.sbom", "spdx", bom_format)))
+    assert previous.load()
+    packages = {package["name"]: package for package in previous.get_packages()}
+    gettext = packages["gettext-runtime"]
+    assert gettext["licensedeclared"] == "GPL-3.0-only AND LGPL-2.1-only"
+    assert gettext["filesanalysis"] is False
+
+
+def test_load_invalid(tmp_path):
+    assert not PreviousSBOM(str(tmp_path / "missing.json")).load()
+    invalid = tmp_path / "invalid.json"
+    invalid.write_text("{invalid")
+    assert not PreviousSBOM(str(invalid)).load()
+
+
+def load_previous(tmp_path):
+    previous = PreviousSBOM(str(generate_sbom(tmp_path / "system.json", "spdx", "json")))
+    assert previous.load()
+    builder = create_builder()
+    builder.set_previous(previous.get_packages(), previous.get_relationships())
+    return builder
+
+
+def test_carry_over(tmp_path):
+    builder = load_previous(tmp_path)
+    installed = builder.get_installed()
+    # Version of libiconv has changed and gettext-runtime has been removed
+    installed["libiconv"] = "1.18"
+    del installed["gettext-runtime"]
+    assert builder.carry_over(installed, "freebsd") == ["libiconv"]
+    assert list(builder.get_packages()) == [("bash", "5.2.26")]
+    # Relationships to packages which are no longer installed are removed
+    assert get_relationships(builder) == {
+        ("freebsd", "DEPENDS_ON", "bash"),
+        ("bash", "DEPENDS_ON", "libiconv"),
+    }
+    assert builder.graph.found("bash")
+    assert not builder.graph.visited("libiconv")
+
+
+def test_process_system_previous(tmp_path):
+    builder = create_builder()
+    builder.process_system()
+    previous_builder = load_previous(tmp_path)
+    previous_builder.process_system()
+    assert sorted(previous_builder.get_packages()) == sorted(builder.get_packages())
+    assert get_relationships(previous_builder) == get_relationships(builder)
@@ -0,0 +1,62 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+from lib4sbom.data.relationship import SBOMRelationship
+
+from distro2sbom.distrobuilder.relationshipstore import RelationshipStore
+
+
+def create_relationship(source, relationship_type, target):
+    relationship = SBOMRelationship()
+    relationship.initialise()
+    relationship.set_relationship(source, relationship_type, target)
+    return relationship.get_relationship()
+
+
+def test_store():
+    store = RelationshipStore()
+    relationships = [
+        create_relationship("Distro-Debian", "DESCRIBES", "debian"),
+        create_relationship("debian", "DEPENDS_ON", "bash"),
+        create_relationship("bash", "DEPENDS_ON", "libc6"),
+    ]
+    for relationship in relationships:
+        store.append(relationship)
+    # Relationships are returned in lib4sbom format in the order added
+    assert list(store) == relationships
+    assert len(store) == 3
+
+
+def test_duplicates():
+    store = RelationshipStore()
+    store.append(create_relationship("debian", "DEPENDS_ON", "bash"))
+    store.append(create_relationship("bash", "DEPENDS_ON", "libc6"))
+    store.append(create_relationship("debian", "DEPENDS_ON", "bash"))
+    # Duplicates are only stored once in the order first added
+    assert len(store) == 2
+    assert [relationship["target"] for relationship in store] == ["bash", "libc6"]
+    # Relationships differing in type or direction are distinct
+    store.append(create_relationship("debian", "CONTAINS", "bash"))
+    store.append(create_relationship("bash", "DEPENDS_ON", "debian"))
+    assert len(store) == 4
+
+
+def test_element_attributes():
+    store = RelationshipStore()
+    relationship = create_relationship("bash", "CONTAINS", "/usr/bin/bash")
+    relationship["source_id"] = "SPDXRef-Package-1-bash"
+    relationship["target_type"] = "file"
+    store.append(relationship)
+    # Element type is only included if specified
+    assert list(store) == [relationship]
+    assert "source_type" not in list(store)[0]
+    # Elements with the same name but a different id are distinct
+    other = dict(relationship, source_id="SPDXRef-Package-2-bash")
+    store.append(other)
+    assert list(store) == [relationship, other]
+    # Each distinct element is only stored once
+    assert store.element_list == [
+        ("bash", "SPDXRef-Package-1-bash", None),
+        ("/usr/bin/bash", None, "file"),
+        ("bash", "SPDXRef-Package-2-bash", None),
+    ]
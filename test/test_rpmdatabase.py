@@ -0,0 +1,271 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import importlib.util
+import os
+import shutil
+import sqlite3
+import stat
+import struct
+from pathlib import Path
+
+import pytest
+
+from distro2sbom.distrobuilder.rpmbuilder import RpmBuilder
+from distro2sbom.distrobuilder.rpmheader import (
+    RPMTAG_FILEDIGESTALGO,
+    RPMTAG_FILEMODES,
+    RPMTAG_NAME,
+    RPMTAG_SUMMARY,
+    RpmHeader,
+)
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+RPM_DATABASE = Path("var") / "lib" / "rpm" / "rpmdb.sqlite"
+
+BASH_DIGEST = "d8b9be1c6f56a4a0b69be4b5f3e1b0e5b0c1c6a0a3b4d5e6f708192a3b4c5d6e"
+BASHRC_DIGEST = "0d2a6f1d31f2a3c4b5d6e7f8091a2b3c4d5e6f708192a3b4c5d6e7f8091a2b3c"
+LIBC_DIGEST = "0cc175b9c0f1b6a831c399e269772661"
+
+# Headers are built as for the fixtures
+spec = importlib.util.spec_from_file_location("make_fixtures", FIXTURES / "make_fixtures.py")
+make_fixtures = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(make_fixtures)
+
+GLIBC_I686 = [
+    (1000, "string", "glibc"),
+    (1001, "string", "2.34"),
+    (1002, "string", "60.el9"),
+    (1004, "i18nstring", ["The GNU libc libraries"]),
+    (1014, "string", "LGPLv2+ and GPLv2+"),
+    (1022, "string", "i686"),
+    (1030, "int16", [0o100755]),
+    (1035, "string_array", ["92eb5ffee6ae2fec3ad71c777531578f"]),
+    (1037, "int32", [0]),
+    (1047, "string_array", ["glibc", "libc.so.6"]),
+    (1049, "string_array", ["/usr/bin/sh"]),
+    (1116, "int32", [0]),
+    (1117, "string_array", ["libc.so.6"]),
+    (1118, "string_array", ["/usr/lib/"]),
+]
+ZLIB_I686 = [
+    (1000, "string", "zlib"),
+    (1001, "string", "1.2.11"),
+    (1002, "string", "40.el9"),
+    (1014, "string", "zlib and Boost"),
+    (1022, "string", "i686"),
+    (1047, "string_array", ["zlib", "libz.so.1"]),
+    (1049, "string_array", ["libc.so.6"]),
+]
+
+
+def read_headers(root):
+    connection = sqlite3.connect(root / RPM_DATABASE)
+    try:
+        return [
+            RpmHeader(blob)
+            for (blob,) in connection.execute("SELECT blob FROM Packages ORDER BY hnum")
+        ]
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def root(tmp_path):
+    # Read only copy of the database so that it is only opened read only
+    root = tmp_path / "rpm"
+    shutil.copytree(FIXTURES / "rpm", root)
+    database = root / RPM_DATABASE
+    database.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    database.parent.chmod(stat.S_IRUSR | stat.S_IXUSR)
+    yield root
+    database.parent.chmod(stat.S_IRWXU)
+
+
+def create_builder(root):
+    return RpmBuilder("Rocky", "9.3", root=str(root))
+
+
+def test_header_values():
+    bash, glibc = read_headers(FIXTURES / "rpm")
+    assert bash.get_string(RPMTAG_NAME) == "bash"
+    assert bash.get(RPMTAG_SUMMARY) == ["The GNU Bourne Again shell"]
+    assert bash.get(RPMTAG_FILEMODES) == [0o100755, 0o120777, 0o100644, 0o100644]
+    assert bash.get_string(RPMTAG_FILEDIGESTALGO) == "8"
+    assert bash.get_filenames() == [
+        "/usr/bin/bash",
+        "/usr/bin/sh",
+        "/etc/bashrc",
+        "/var/log/bash.log",
+    ]
+    assert bash.get_files() == [
+        ("/usr/bin/bash", BASH_DIGEST, 0o100755, 0),
+        ("/usr/bin/sh", "", 0o120777, 0),
+        ("/etc/bashrc", BASHRC_DIGEST, 0o100644, 1),
+        ("/var/log/bash.log", "", 0o100644, 64),
+    ]
+    assert glibc.get_string(RPMTAG_NAME) == "glibc"
+    # Tag not present
+    assert glibc.get_string(RPMTAG_FILEDIGESTALGO) == ""
+
+
+def test_invalid_header():
+    with pytest.raises(ValueError):
+        RpmHeader(b"\x00\x00\x00")
+    # Index entry with data beyond the end of the data store
+    blob = struct.pack(">II", 1, 4) + struct.pack(">iIiI", 1000, 6, 8, 1) + b"bash"
+    with pytest.raises(ValueError):
+        RpmHeader(blob)
+    # Data store shorter than stated
+    with pytest.raises(ValueError):
+        RpmHeader(struct.pack(">II", 1, 64) + struct.pack(">iIiI", 1000, 6, 0, 1))
+
+
+def test_read_database(root):
+    database = root / RPM_DATABASE
+    modified = database.stat().st_mtime_ns
+    builder = create_builder(root)
+    assert builder.database.get_installed() == ["bash", "glibc"]
+    assert builder.database.database_file is not None
+    bash = builder.database.get_package("bash")
+    assert bash["Name"] == "bash"
+    assert bash["Version"] == "5.1.8"
+    assert bash["Release"] == "6.el9"
+    assert bash["Architecture"] == "x86_64"
+    assert bash["License"] == "GPLv3+"
+    assert bash["Vendor"] == "Rocky Enterprise Software Foundation"
+    assert bash["Summary"] == "The GNU Bourne Again shell"
+    assert bash["Size"] == "7738634"
+    assert bash["Requires"] == [
+        "libc.so.6()(64bit)",
+        "/usr/bin/bash",
+        "rpmlib(CompressedFileNames)",
+    ]
+    assert bash["Provides"] == ["bash", "bash(x86-64)", "/bin/sh"]
+    glibc = builder.database.get_package("glibc")
+    assert glibc["Version"] == "2.34"
+    assert glibc["Release"] == "60.el9"
+    assert glibc["License"] == "LGPLv2+ and GPLv2+"
+    assert glibc["Vendor"] == ""
+    # Dependencies are resolved from provides and owners of files. A package
+    # does not depend on itself.
+    assert bash["Depends"] == "glibc"
+    assert glibc["Depends"] == "bash"
+    # Database is never modified
+    assert database.stat().st_mtime_ns == modified
+    assert not os.path.exists(f"{database}-journal")
+
+
+def test_package_files(root):
+    builder = create_builder(root)
+    builder.set_files()
+    # Links and ghost files are not included
+    assert list(builder.get_package_files("bash")) == [
+        ("/usr/bin/bash", "SHA256", BASH_DIGEST),
+        ("/etc/bashrc", "SHA256", BASHRC_DIGEST),
+    ]
+    # Digest algorithm is MD5 if not specified
+    assert list(builder.get_package_files("glibc")) == [
+        ("/usr/lib64/libc.so.6", "MD5", LIBC_DIGEST)
+    ]
+
+
+def test_files_not_requested(root):
+    builder = create_builder(root)
+    assert builder.database.get_package("bash") is not None
+    assert builder.database.files == {}
+
+
+def test_package_files_sha1(root):
+    # Installed files are read to add the SHA1 digest required by SPDX
+    bash = root / "usr" / "bin" / "bash"
+    bash.parent.mkdir(parents=True)
+    bash.write_bytes(b"#!/bin/sh\n")
+    builder = create_builder(root)
+    builder.set_files("SHA1")
+    builder.add_files("bash", "bash")
+    files = builder.get_files()
+    # /etc/bashrc can not be read so is not included
+    assert list(files) == ["/usr/bin/bash"]
+    checksums = files["/usr/bin/bash"]["checksum"]
+    assert ["SHA256", BASH_DIGEST] in checksums
+    assert ["SHA1", hashlib.sha1(b"#!/bin/sh\n").hexdigest()] in checksums
+
+
+def test_multilib(tmp_path):
+    # Both architectures of a package may be installed
+    root = tmp_path / "rpm"
+    shutil.copytree(FIXTURES / "rpm", root)
+    connection = sqlite3.connect(root / RPM_DATABASE)
+    for tags in (GLIBC_I686, ZLIB_I686):
+        connection.execute(
+            "INSERT INTO Packages (blob) VALUES (?)", (make_fixtures.rpm_header(tags),)
+        )
+    connection.commit()
+    connection.close()
+    builder = create_builder(root)
+    builder.set_files()
+    database = builder.database
+    assert database.get_installed() == [
+        "bash",
+        "glibc-2.34-60.el9.x86_64",
+        "glibc-2.34-60.el9.i686",
+        "zlib",
+    ]
+    # Package name refers to the first instance
+    assert database.get_package("glibc")["Architecture"] == "x86_64"
+    assert database.get_package("glibc-2.34-60.el9.i686")["Architecture"] == "i686"
+    # Dependencies are resolved to the instance which provides the capability
+    assert database.get_package("bash")["Depends"] == "glibc-2.34-60.el9.x86_64"
+    assert database.get_package("zlib")["Depends"] == "glibc-2.34-60.el9.i686"
+    assert list(builder.get_package_files("glibc-2.34-60.el9.i686")) == [
+        ("/usr/lib/libc.so.6", "MD5", "92eb5ffee6ae2fec3ad71c777531578f")
+    ]
+    builder.process_system()
+    packages = builder.get_packages()
+    assert sorted(packages) == [
+        ("bash", "5.1.8-6.el9"),
+        ("glibc", "2.34-60.el9", "i686"),
+        ("glibc", "2.34-60.el9", "x86_64"),
+        ("rocky", "9.3"),
+        ("zlib", "1.2.11-40.el9"),
+    ]
+    assert "arch=i686" in packages[("glibc", "2.34-60.el9", "i686")]["externalreference"][0][2]
+    relationships = {
+        (relationship["source"], relationship["type"], relationship["target"])
+        for relationship in builder.get_relationships()
+    }
+    assert ("bash", "DEPENDS_ON", "glibc") in relationships
+    assert ("zlib", "DEPENDS_ON", "glibc") in relationships
+    assert ("rocky", "DEPENDS_ON", "glibc") in relationships
+    assert list(builder.get_files()) == [
+        "/usr/bin/bash",
+        "/etc/bashrc",
+        "/usr/lib64/libc.so.6",
+        "/usr/lib/libc.so.6",
+    ]
+
+
+def test_invalid_database_header(tmp_path, capsys):
+    # Packages are queried using rpm rather than omitting the package
+    root = tmp_path / "rpm"
+    shutil.copytree(FIXTURES / "rpm", root)
+    connection = sqlite3.connect(root / RPM_DATABASE)
+    connection.execute("INSERT INTO Packages (blob) VALUES (?)", (b"\x00\x00\x00",))
+    connection.commit()
+    connection.close()
+    builder = create_builder(root)
+    commands = []
+
+    def run_program(command_line):
+        commands.append(command_line)
+        return ["Name\tbash", "Version\t5.1.8", "Release\t6.el9", "Architecture\tx86_64"]
+
+    builder.run_program = run_program
+    assert builder.database.get_installed() == ["bash"]
+    assert builder.database.database_file is None
+    assert len(commands) == 1
+    assert commands[0].startswith(f"rpm --root {root} ")
+    assert "-qa --queryformat=" in commands[0]
+    assert "[ERROR] Unable to read" in capsys.readouterr().out
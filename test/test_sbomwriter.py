@@ -0,0 +1,57 @@
+# Copyright (C) 2025 Anthony Harrison
+# SPDX-License-Identifier: Apache-2.0
+
+import gzip
+import re
+from pathlib import Path
+
+import pytest
+
+from distro2sbom import cli
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+ROOT = str(FIXTURES / "freebsd")
+
+# Values which differ each time a document is generated
+UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z")
+
+
+@pytest.fixture(autouse=True)
+def root_path(monkeypatch):
+    monkeypatch.delenv("DISTRO2SBOM_ROOT_PATH", raising=False)
+
+
+def generate_sbom(filename, sbom_type, bom_format, stream=False):
+    arguments = ["distro2sbom", "--distro", "freebsd", "--system", "--files"]
+    arguments += ["--root", ROOT, "--name", "FreeBSD", "--release", "14.0"]
+    arguments += ["--sbom", sbom_type, "--format", bom_format, "-o", str(filename)]
+    if stream:
+        arguments.append("--stream")
+    assert cli.main(arguments) == 0
+    return filename
+
+
+def normalise(document):
+    return TIMESTAMP_PATTERN.sub("TIMESTAMP", UUID_PATTERN.sub("UUID", document))
+
+
+@pytest.mark.parametrize(
+    "sbom_type, bom_format",
+    [("spdx", "tag"), ("spdx", "json"), ("cyclonedx", "json")],
+)
+def test_stream(tmp_path, sbom_type, bom_format):
+    # Streamed document is the same as the document generated by lib4sbom
+    expected = generate_sbom(tmp_path / "system.sbom", sbom_type, bom_format)
+    streamed = generate_sbom(tmp_path / "stream.sbom", sbom_type, bom_format, stream=True)
+    document = normalise(streamed.read_text())
+    assert "libiconv" in document
+    assert document == normalise(expected.read_text())
+
+
+def test_stream_compressed(tmp_path):
+    # Output is compressed based on the suffix of the filename
+    expected = generate_sbom(tmp_path / "system.json", "spdx", "json")
+    compressed = generate_sbom(tmp_path / "stream.json.gz", "spdx", "json", stream=True)
+    with gzip.open(compressed, "rt", encoding="utf-8") as stream_file:
+        assert normalise(stream_file.read()) == normalise(expected.read_text())